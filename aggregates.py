@@ -0,0 +1,364 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+增量统计汇总
+
+AggregateState 保存每个版本对统计结果的贡献，以及按 日期/分支/作者 累计的汇总表和月度、每日、作者、分支统计。
+新的提交列表与已有状态逐个版本对比贡献记录，只重新应用贡献有变化的版本（新增的版本，以及截断后重新获取、
+忽略规则变化、获取失败后重试等原因行数变化的版本）、撤销不再包含的版本，并在应用时同步更新各统计，
+刷新统计的开销与变化的版本数成正比，而不是重新累计全部提交记录。
+
+状态按查询（日期范围、版本范围、筛选条件）分别保存到缓存目录，进程重启后直接加载，无需重新计算。
+"""
+import hashlib
+import json
+import os
+import threading
+
+from path_trie import match_file_details
+
+STATE_VERSION = 4
+STATE_DIR_NAME = 'aggregates'
+# 内存中最多保留的汇总状态数（不同查询各一个）
+MAX_STATES = 8
+# 磁盘上保留的汇总状态文件数，超过时删除最久未更新的
+MAX_FILES = 50
+
+# 版本贡献记录字段下标: [作者, 日期, {分支: [修改文件数, 新增行数, 删除行数]}, 修改文件数, 新增行数, 删除行数]
+AUTHOR, DAY, BRANCHES, FILES, ADDED, DELETED = range(6)
+
+
+def commit_record(commit):
+    """
+    提取提交记录中参与统计的字段
+    """
+    return [commit['author'], commit['date'][:10], branch_lines(commit),
+            commit['files_changed'], commit['lines_added'], commit['lines_deleted']]
+
+
+def branch_lines(commit):
+    """
+    按分支拆分提交的修改文件数和代码行数
+    修改文件数按 changed_files 中各路径所属分支计数；文件级行数按 file_details 与 changed_files
+    的路径对应计入文件所属分支，无法对应的行数（如缓存已压缩）按各分支修改文件数的比例分摊
+    :return: {分支: [修改文件数, 新增行数, 删除行数]}
+    """
+    branches = commit['branches']
+    if len(branches) == 1:
+        return {branches[0]: [commit['files_changed'], commit['lines_added'], commit['lines_deleted']]}
+
+    values = {branch: [0, 0, 0] for branch in branches}
+    branch_of = {}
+    for changed in commit.get('changed_files', []):
+        branch = changed.get('branch')
+        if changed.get('path') and branch in values:
+            branch_of[changed['path']] = branch
+            values[branch][0] += 1
+
+    remaining_added = commit['lines_added']
+    remaining_deleted = commit['lines_deleted']
+    for path, (added, deleted) in match_file_details(list(branch_of), commit.get('file_details') or {}).items():
+        entry = values[branch_of[path]]
+        entry[1] += added
+        entry[2] += deleted
+        remaining_added -= added
+        remaining_deleted -= deleted
+
+    weights = [values[branch][0] for branch in branches]
+    for index, remaining in ((1, remaining_added), (2, remaining_deleted)):
+        for branch, share in zip(branches, _split(remaining, weights)):
+            values[branch][index] += share
+    return values
+
+
+def _split(total, weights):
+    """
+    按权重把整数拆分为若干份，份额之和等于 total（最大余数法）
+    """
+    if total <= 0:
+        return [0] * len(weights)
+    if not any(weights):
+        weights = [1] * len(weights)
+    weight_sum = sum(weights)
+    shares = [total * weight // weight_sum for weight in weights]
+    remainders = sorted(range(len(weights)), key=lambda i: total * weights[i] % weight_sum, reverse=True)
+    for i in remainders[:total - sum(shares)]:
+        shares[i] += 1
+    return shares
+
+
+class AggregateState:
+    """
+    可增量更新的统计汇总
+    """
+
+    def __init__(self):
+        # {版本号: 贡献记录}
+        self.records = {}
+        # {(日期, 分支, 作者): [修改文件数, 新增行数, 删除行数, 提交数]}
+        self.daily = {}
+        # {(月份, 分支, 作者): 提交数}
+        self.monthly_commits = {}
+        # {日期: {分支: {作者: {'files_changed', 'lines_added', 'lines_deleted'}}}}，应用版本时同步更新
+        self.daily_stats = {}
+        # {月份: {分支: {作者: {...}}}}
+        self.monthly_stats = {}
+        # {作者: {'commits', 'files_changed', 'lines_added', 'lines_deleted', 'branches': {分支: 提交数}}}
+        self.authors = {}
+        # {分支: {'commits', 'files_changed', 'lines_added', 'lines_deleted', 'authors': {作者: 提交数}}}
+        self.branches = {}
+        # to_stats 返回后被修改过（已复制）的日期/月份子表，其余子表与返回值共用
+        self._owned_days = set()
+        self._owned_months = set()
+        self.lock = threading.RLock()
+
+    def apply(self, revision, record):
+        """
+        应用一个版本的贡献；该版本已存在时先撤销旧的贡献
+        """
+        revision = str(revision)
+        if revision in self.records:
+            self.retract(revision)
+        self.records[revision] = record
+        self._accumulate(record, 1)
+
+    def retract(self, revision):
+        """
+        撤销一个版本的贡献
+        :return: 是否存在该版本
+        """
+        record = self.records.pop(str(revision), None)
+        if record is None:
+            return False
+        self._accumulate(record, -1)
+        return True
+
+    def _accumulate(self, record, sign):
+        author, day = record[AUTHOR], record[DAY]
+        month = day[:7]
+        files, added, deleted = sign * record[FILES], sign * record[ADDED], sign * record[DELETED]
+
+        author_entry = self.authors.get(author)
+        if author_entry is None:
+            author_entry = self.authors[author] = {'commits': 0, 'files_changed': 0, 'lines_added': 0,
+                                                   'lines_deleted': 0, 'branches': {}}
+        author_entry['commits'] += sign
+        author_entry['files_changed'] += files
+        author_entry['lines_added'] += added
+        author_entry['lines_deleted'] += deleted
+
+        for branch, (branch_files, branch_added, branch_deleted) in record[BRANCHES].items():
+            branch_files, branch_added, branch_deleted = sign * branch_files, sign * branch_added, sign * branch_deleted
+            key = (day, branch, author)
+            values = self.daily.get(key)
+            if values is None:
+                values = self.daily[key] = [0, 0, 0, 0]
+            values[0] += branch_files
+            values[1] += branch_added
+            values[2] += branch_deleted
+            values[3] += sign
+            if values[3] <= 0:
+                del self.daily[key]
+            _add_stats(self.daily_stats, self._owned_days, day, branch, author,
+                       branch_files, branch_added, branch_deleted, values[3] <= 0)
+            month_key = (month, branch, author)
+            self.monthly_commits[month_key] = self.monthly_commits.get(month_key, 0) + sign
+            month_empty = self.monthly_commits[month_key] <= 0
+            if month_empty:
+                del self.monthly_commits[month_key]
+            _add_stats(self.monthly_stats, self._owned_months, month, branch, author,
+                       branch_files, branch_added, branch_deleted, month_empty)
+
+            branch_entry = self.branches.get(branch)
+            if branch_entry is None:
+                branch_entry = self.branches[branch] = {'commits': 0, 'files_changed': 0, 'lines_added': 0,
+                                                        'lines_deleted': 0, 'authors': {}}
+            branch_entry['commits'] += sign
+            branch_entry['files_changed'] += branch_files
+            branch_entry['lines_added'] += branch_added
+            branch_entry['lines_deleted'] += branch_deleted
+            _count(branch_entry['authors'], author, sign)
+            _count(author_entry['branches'], branch, sign)
+            if branch_entry['commits'] <= 0:
+                del self.branches[branch]
+
+        if author_entry['commits'] <= 0:
+            del self.authors[author]
+
+    def sync(self, commits):
+        """
+        使状态与给定的提交列表一致：逐个版本比较贡献记录，重新应用有变化的版本（撤销旧的贡献后应用新的），
+        撤销不在列表中的版本；贡献未变化的版本不修改统计
+        调用方需要同时获取统计时应在同一次 lock 持有期间调用 sync 和 to_stats
+        :return: (应用的版本数, 撤销的版本数)
+        """
+        with self.lock:
+            by_revision = {str(commit['revision']): commit for commit in commits}
+            retracted = 0
+            for revision in self.records.keys() - by_revision.keys():
+                self.retract(revision)
+                retracted += 1
+            applied = 0
+            for revision in sorted(by_revision, key=_revision_order):
+                record = commit_record(by_revision[revision])
+                if self.records.get(revision) != record:
+                    self.apply(revision, record)
+                    applied += 1
+            return applied, retracted
+
+    def to_stats(self):
+        """
+        返回与 get_monthly_stats/get_author_stats/get_branch_stats/get_daily_stats 相同结构的统计
+        月度、每日统计在应用版本时已同步更新，这里只复制顶层字典；之后再修改某个日期/月份时先复制该子表，
+        已返回的统计不会被改变（调用方不应修改返回值）
+        :return: (monthly_stats, author_stats, branch_stats, daily_stats)
+        """
+        with self.lock:
+            self._owned_days.clear()
+            self._owned_months.clear()
+            author_stats = {author: dict(entry, branches=list(entry['branches']))
+                            for author, entry in self.authors.items()}
+            branch_stats = {branch: dict(entry, authors=list(entry['authors']))
+                            for branch, entry in self.branches.items()}
+            return dict(self.monthly_stats), author_stats, branch_stats, dict(self.daily_stats)
+
+    def to_dict(self):
+        with self.lock:
+            return {
+                'version': STATE_VERSION,
+                'records': self.records,
+                'daily': [[day, branch, author] + values for (day, branch, author), values in self.daily.items()],
+                'authors': self.authors,
+                'branches': self.branches,
+            }
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls()
+        if data.get('version') != STATE_VERSION:
+            return state
+        state.records = data.get('records', {})
+        state.daily = {(row[0], row[1], row[2]): row[3:] for row in data.get('daily', [])}
+        state.authors = data.get('authors', {})
+        state.branches = data.get('branches', {})
+        # 由 (日期, 分支, 作者) 汇总表恢复月度、每日统计，不需要遍历版本记录
+        for (day, branch, author), (files, added, deleted, commits) in sorted(state.daily.items()):
+            _add_stats(state.daily_stats, state._owned_days, day, branch, author, files, added, deleted, False)
+            _add_stats(state.monthly_stats, state._owned_months, day[:7], branch, author, files, added, deleted, False)
+            month_key = (day[:7], branch, author)
+            state.monthly_commits[month_key] = state.monthly_commits.get(month_key, 0) + commits
+        return state
+
+
+def _revision_order(revision):
+    return int(revision) if revision.isdigit() else 0
+
+
+def _add_stats(stats, owned, period, branch, author, files, added, deleted, remove):
+    """
+    累加 {时间: {分支: {作者: 统计}}} 中的一项，remove 为True时删除该项及变空的上级
+    :param owned: 已复制过的时间子表；不在其中的子表可能已被 to_stats 返回，修改前先复制
+    """
+    table = stats.get(period)
+    if table is None:
+        table = stats[period] = {}
+        owned.add(period)
+    elif period not in owned:
+        table = stats[period] = {name: {person: dict(entry) for person, entry in by_author.items()}
+                                 for name, by_author in table.items()}
+        owned.add(period)
+    by_author = table.setdefault(branch, {})
+    if remove:
+        by_author.pop(author, None)
+        if not by_author:
+            del table[branch]
+        if not table:
+            del stats[period]
+            owned.discard(period)
+        return
+    entry = by_author.get(author)
+    if entry is None:
+        entry = by_author[author] = {'files_changed': 0, 'lines_added': 0, 'lines_deleted': 0}
+    entry['files_changed'] += files
+    entry['lines_added'] += added
+    entry['lines_deleted'] += deleted
+
+
+def _count(counter, key, sign):
+    value = counter.get(key, 0) + sign
+    if value > 0:
+        counter[key] = value
+    else:
+        counter.pop(key, None)
+
+
+class AggregateStore:
+    """
+    按查询保存的汇总状态，首次使用时从缓存目录加载
+    """
+
+    def __init__(self, cache_dir):
+        self.state_dir = os.path.join(cache_dir, STATE_DIR_NAME)
+        self.states = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def signature(start_date=None, end_date=None, revision_range=None, filters=None):
+        """
+        查询的签名：日期范围、版本范围和筛选条件（值排序后）
+        """
+        normalized = {field: sorted(values) for field, values in (filters or {}).items() if values}
+        query = {'start_date': start_date, 'end_date': end_date, 'revision_range': revision_range or '',
+                 'filters': normalized}
+        return hashlib.md5(json.dumps(query, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def state_path(self, signature):
+        return os.path.join(self.state_dir, f'{signature}.json')
+
+    def get(self, start_date=None, end_date=None, revision_range=None, filters=None):
+        """
+        获取查询对应的汇总状态
+        """
+        signature = self.signature(start_date, end_date, revision_range, filters)
+        with self._lock:
+            state = self.states.pop(signature, None)
+            if state is None:
+                state = self._load(signature)
+            # 按最近使用顺序保留
+            self.states[signature] = state
+            while len(self.states) > MAX_STATES:
+                self.states.pop(next(iter(self.states)))
+            return state
+
+    def _load(self, signature):
+        path = self.state_path(signature)
+        if not os.path.exists(path):
+            return AggregateState()
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return AggregateState.from_dict(json.load(f))
+        except (OSError, ValueError):
+            return AggregateState()
+
+    def save(self, state, start_date=None, end_date=None, revision_range=None, filters=None):
+        """
+        原子写入汇总状态
+        """
+        path = self.state_path(self.signature(start_date, end_date, revision_range, filters))
+        os.makedirs(self.state_dir, exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state.to_dict(), f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, path)
+        self._prune()
+
+    def _prune(self):
+        try:
+            names = [name for name in os.listdir(self.state_dir) if name.endswith('.json')]
+            if len(names) <= MAX_FILES:
+                return
+            paths = sorted((os.path.join(self.state_dir, name) for name in names), key=os.path.getmtime)
+            for path in paths[:len(paths) - MAX_FILES]:
+                os.remove(path)
+        except OSError:
+            pass
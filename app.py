@@ -1,1759 +1,23 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
-from flask import Flask, render_template, request, jsonify, send_from_directory
-import xml.etree.ElementTree as ET
-import json
-import yaml
-import os
-from datetime import datetime, timedelta
-import subprocess
-import threading
 import time
-import hashlib
-
-app = Flask(__name__)
-
-# 配置文件路径（优先使用yml格式）
-CONFIG_FILE = os.path.join(os.path.dirname(__file__), 'config.yml')
-
-# 读取配置
-config = {
-    "svn_base_url": "http://svn.my.com/project/iorder-saas",
-    "default_branch": "trunk",
-    "debug": False,
-    "svn_username": "svnuser",
-    "svn_password": "svnpassword",
-    "log_range_days": 180
-}
-
-# 加载配置文件
-def load_config():
-    global config
-    
-    # 优先尝试加载yml配置文件
-    if os.path.exists(CONFIG_FILE):
-        try:
-            with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-                loaded_config = yaml.safe_load(f)
-                if loaded_config:
-                    config.update(loaded_config)
-            print(f"[{datetime.now()}] LOAD - 从yml配置文件加载配置成功: {CONFIG_FILE}")
-            print(f"[{datetime.now()}] LOAD - 当前配置: {config}")
-            return
-        except Exception as e:
-            print(f"[{datetime.now()}] LOAD - 加载yml配置文件失败: {e}")
-    
-    # 如果都不存在，使用默认配置
-    print(f"[{datetime.now()}] LOAD - 未找到配置文件，使用默认配置")
-
-# 初始化配置
-load_config()
-
-
-# 缓存文件路径
-CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'svn_cache.json')
-
-# 缓存结构设计:
-# {
-#     "version": "1.1",
-#     "cache": {
-#         "revision_file": {
-#             "file_cache_key": {
-#                 "revision": "600100",
-#                 "file_path": "/path/to/file.java",
-#                 "hash": "md5_hash_of_file_content",
-#                 "author": "user123",
-#                 "lines_added": 10,
-#                 "lines_deleted": 5,
-#                 "timestamp": 1620000000
-#             }
-#         },
-#         "revision_summary": {
-#             "revision_cache_key": {
-#                 "revision": "600100",
-#                 "branch_url": "http://svn.example.com/repo",
-#                 "total_lines_added": 100,
-#                 "total_lines_deleted": 50,
-#                 "file_count": 10,
-#                 "timestamp": 1620000000
-#             }
-#         }
-#     }
-# }
-
-# JSON序列化自定义编码器，处理datetime对象
-class DateTimeEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        return super().default(obj)
-    
-# 加载缓存
-def load_cache():
-    """
-    加载缓存数据
-    """
-    # 创建cache目录（如果不存在）
-    cache_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache')
-    if not os.path.exists(cache_dir):
-        os.makedirs(cache_dir)
-        print(f"[{datetime.now()}] cache - 已创建cache目录: {cache_dir}")
-    else:
-        print(f"[{datetime.now()}] cache - 目录已存在: {cache_dir}")
-    if os.path.exists(CACHE_FILE):
-        try:
-            with open(CACHE_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"[{datetime.now()}] cache - 加载缓存失败: {e}")
-            print(f"[{datetime.now()}] cache - 缓存文件损坏，将重置缓存")
-            # 删除损坏的缓存文件
-            try:
-                os.remove(CACHE_FILE)
-                print(f"[{datetime.now()}] cache - 已删除损坏的缓存文件")
-            except Exception as delete_error:
-                print(f"[{datetime.now()}] cache - 删除缓存文件失败: {delete_error}")
-    
-    # 返回默认缓存结构
-    return {
-        "version": "1.1",
-        "cache": {
-            "revision_file": {},
-            "revision_summary": {}
-        }
-    }
-
-# 保存缓存
-def save_cache(cache_data):
-    """
-    保存缓存数据
-    """
-    try:
-        # 只保存缓存数据，不保存分析结果
-        cache_to_save = cache_data.copy()
-        # 移除可能存在的results字段
-        if 'results' in cache_to_save:
-            del cache_to_save['results']
-        
-        with open(CACHE_FILE, 'w', encoding='utf-8') as f:
-            json.dump(cache_to_save, f, indent=2, ensure_ascii=False, cls=DateTimeEncoder)
-            
-        cache_file_size = os.path.getsize(CACHE_FILE)
-        print(f"[{datetime.now()}] cache - 缓存已保存到: {CACHE_FILE}, 缓存文件大小：{cache_file_size / 1024:.2f} kb")
-        return True
-    except Exception as e:
-        print(f"[{datetime.now()}] cache - 保存缓存失败: {e}")
-        return False
-
-# 生成文件级缓存键
-def generate_file_cache_key(revision, file_path):
-    """
-    生成文件级缓存键
-    :param revision: 版本号
-    :param file_path: 文件路径
-    :return: 缓存键字符串
-    """
-    key_str = f"{revision}|{file_path}"
-    return hashlib.md5(key_str.encode()).hexdigest()
-
-# 生成版本级缓存键
-def generate_revision_cache_key(revision, branch_url):
-    """
-    生成版本级缓存键
-    :param revision: 版本号
-    :param branch_url: 分支URL
-    :return: 缓存键字符串
-    """
-    # key_str = f"{revision}|{branch_url}"
-    # return hashlib.md5(key_str.encode()).hexdigest()
-    return revision
-
-
-# 全局缓存对象
-cache_data = load_cache()
-
-# 全局任务状态
-task_status = {
-    'running': False,
-    'progress': 0,
-    'message': '',
-    'completed': False,
-    'error': None,
-    'execution_details': []  # 新增：执行明细列表
-}
-
-# 初始化分析结果，不从缓存加载
-analysis_results = {}
-
-# 获取SVN externals配置
-def get_svn_externals(branch_url, username=None, password=None):
-    """
-    从SVN服务器获取指定分支的externals配置，包括特定子目录的externals
-    :param branch_url: SVN分支URL
-    :param username: SVN用户名
-    :param password: SVN密码
-    :return: 包含externals信息的字典列表
-    """
-    global task_status
-    externals = []
-    
-    # 记录开始获取externals
-    task_status['execution_details'].append({
-        'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-        'message': '开始获取SVN externals配置',
-        'level': 'info'
-    })
-    
-    # 需要检查externals的目录列表
-    check_dirs = [
-        "src/main/java/com/fh/iasp/app",  # 用户指定的Java目录
-        "src/main/resources/com/fh/iasp/app"  # 用户指定的资源目录
-    ]
-    
-    for check_dir in check_dirs:
-        # 构建完整的URL
-        if check_dir:
-            target_url = f"{branch_url.rstrip('/')}/{check_dir}"
-        else:
-            target_url = branch_url
-        
-        # 记录正在检查的目录
-        task_status['execution_details'].append({
-            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-            'message': f'正在检查目录: {target_url}',
-            'level': 'info'
-        })
-        
-        cmd = ['svn', 'propget', 'svn:externals', '--no-auth-cache']
-        
-        if username:
-            cmd.extend(['--username', username])
-        if password:
-            cmd.extend(['--password', password])
-        
-        cmd.append(target_url)
-        
-        print(f"[{datetime.now()}] SVN任务 - 正在获取externals配置: {' '.join(cmd)}")
-        
-        try:
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
-            
-            if result.returncode != 0:
-                error_msg = f'获取 {target_url} externals失败: {result.stderr}'
-                print(f"[{datetime.now()}] SVN任务 - {error_msg}")
-                task_status['execution_details'].append({
-                    'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-                    'message': error_msg,
-                    'level': 'warning'
-                })
-                continue
-            
-            # 解析结果
-            for line in result.stdout.strip().split('\n'):
-                print(f"[{datetime.now()}] SVN任务 - 解析external: {line}")
-                if line.strip():
-                    # 解析externals行（格式：relative_path external_url）
-                    parts = line.strip().split()
-                    if len(parts) >= 2:
-                        relative_path = parts[0]
-                        app = parts[1]
-                        
-                        # 替换所有以"^/trunk/"开头的SVN路径引用为完整URL
-                        if relative_path.startswith("^/trunk/"):
-                            relative_path = "{}{}".format(config.get("svn_base_url", ""), relative_path)
-                    
-                        
-                        externals.append({
-                            'path': app,
-                            'url': relative_path
-                        })
-                        external_msg = f'发现external: {app} -> {relative_path}'
-                        print(f"[{datetime.now()}] SVN任务 - {external_msg}")
-                        task_status['execution_details'].append({
-                            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-                            'message': external_msg,
-                            'level': 'info'
-                        })
-        except Exception as e:
-            error_msg = f'获取 {target_url} externals发生错误: {e}'
-            print(f"[{datetime.now()}] SVN任务 - {error_msg}")
-            task_status['execution_details'].append({
-                'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-                'message': error_msg,
-                'level': 'error'
-            })
-            continue
-    
-    # 记录完成获取externals
-    task_status['execution_details'].append({
-        'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-        'message': f'完成获取externals，共发现 {len(externals)} 个配置',
-        'level': 'info'
-    })
-    
-    print(f"[{datetime.now()}] SVN任务 - 共发现 {len(externals)} 个externals配置")
-    return externals
-
-# 获取文件内容哈希值
-def get_svn_file_content_hash(branch_url, revision, file_path, username=None, password=None):
-    """
-    获取指定版本文件的内容哈希值
-    :param branch_url: SVN分支URL
-    :param revision: 版本号
-    :param file_path: 文件路径
-    :param username: SVN用户名
-    :param password: SVN密码
-    :return: 文件内容的MD5哈希值
-    """
-    # 构建命令获取文件内容
-    cmd = ['svn', 'cat', f'-r{revision}', f'{branch_url}/{file_path}']
-    
-    if username:
-        cmd.extend(['--username', username])
-    if password:
-        cmd.extend(['--password', password])
-    
-    try:
-        # 执行命令获取文件内容（不使用encoding参数）
-        result = subprocess.run(cmd, capture_output=True, text=False, timeout=30)
-        
-        # 手动解码输出
-        content = ""
-        try:
-            content = result.stdout.decode('utf-8')
-        except UnicodeDecodeError:
-            try:
-                content = result.stdout.decode('gbk')
-            except UnicodeDecodeError:
-                content = result.stdout.decode('latin-1')
-        
-        if result.returncode != 0:
-            return None
-        
-        # 计算MD5哈希值
-        file_hash = hashlib.md5(content.encode()).hexdigest()
-        return file_hash
-    except Exception as e:
-        print(f"获取文件内容哈希失败 ({revision}:{file_path}): {e}")
-        return None
-    
-# 从SVN服务器获取特定版本的diff
-def get_svn_log(branch_url, username=None, password=None, revision_range=None):
-    """
-    从SVN服务器获取指定分支的提交记录
-    :param branch_url: SVN分支URL
-    :param username: SVN用户名
-    :param password: SVN密码
-    :param revision_range: 版本范围，格式如"1234:5678"或"HEAD"
-    :return: SVN log的XML字符串
-    """
- 
-    # 获取该分支的最新版本号
-    latest_revision = get_latest_revision_for_branch(branch_url)
-    print(f"[{datetime.now()}] SVN-log - 最新版本号: {latest_revision}")
-    
-    # 确定版本范围
-    branch_revision_range = revision_range
-    if latest_revision:
-        # 如果找到最新版本号，使用从最新版本开始的版本范围
-        if revision_range:
-            if revision_range.contains(":"):
-                start_rev, end_rev = revision_range.split(":")
-                branch_revision_range = f"{latest_revision}:{end_rev}"
-            else:
-                branch_revision_range = f"{latest_revision}:{revision_range}"
-        else:
-            branch_revision_range = f"{latest_revision}:HEAD"
-        
-        task_status['execution_details'].append({
-            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-            'message': f'分支 {branch_url} 最新版本号: {latest_revision}，使用版本范围: {branch_revision_range}',
-            'level': 'info'
-        })
-    print(f"[{datetime.now()}] SVN-log - 分支 {branch_url} 版本范围: {branch_revision_range}")
-
-    # 从SVN服务器获取指定分支的提交记录
-    cmd = ['svn', 'log', '--xml', '--verbose', '--no-auth-cache']  # 添加--no-auth-cache参数
-    
-    if username:
-        cmd.extend(['--username', username])
-    if password:
-        cmd.extend(['--password', password])
-    if branch_revision_range:
-        cmd.extend(['-r', branch_revision_range])
-
-    cmd.append(branch_url)
-    
-    print(f"[{datetime.now()}] SVN-log - 正在执行SVN命令: {' '.join(cmd)}")
-    try:
-        # 不使用encoding参数，获取原始字节输出
-        result = subprocess.run(cmd, capture_output=True, text=False, timeout=600)  # 增加超时时间到600秒
-        
-        # 手动解码输出
-        stdout = stderr = ""
-        try:
-            stdout = result.stdout.decode('utf-8')
-            stderr = result.stderr.decode('utf-8')
-        except UnicodeDecodeError:
-            print(f"[{datetime.now()}] SVN-log - UTF-8编码解码失败，尝试使用GBK编码")
-            try:
-                stdout = result.stdout.decode('gbk')
-                stderr = result.stderr.decode('gbk')
-            except UnicodeDecodeError:
-                # 如果GBK也失败，尝试使用latin-1（不会失败）
-                stdout = result.stdout.decode('latin-1')
-                stderr = result.stderr.decode('latin-1')
-                print(f"[{datetime.now()}] SVN-log - GBK编码解码失败，使用latin-1编码")
-        
-        if result.returncode != 0:
-            error_msg = f'SVN命令执行失败: {stderr}'
-            print(f"[{datetime.now()}] SVN-log - 错误: {error_msg}")
-            task_status['error'] = error_msg
-            task_status['running'] = False
-            return
-        
-        print(f"[{datetime.now()}] SVN-log - SVN命令执行成功，返回码: {result.returncode}")
-        
-        # 构造并返回结果对象
-        class Result:
-            def __init__(self, stdout, stderr, returncode):
-                self.stdout = stdout
-                self.stderr = stderr
-                self.returncode = returncode
-        
-        return Result(stdout, stderr, result.returncode)
-    except subprocess.TimeoutExpired:
-        error_msg = f'SVN命令超时，请减小版本范围或检查网络连接\n命令: {" ".join(cmd)}'
-        print(f"[{datetime.now()}] SVN-log - 错误: {error_msg}")
-        task_status['error'] = error_msg
-        task_status['running'] = False
-        return
-    except Exception as e:
-        error_msg = f'获取SVN日志失败: {e}'
-        print(f"[{datetime.now()}] SVN-log - 错误: {error_msg}")
-        task_status['error'] = error_msg
-        task_status['running'] = False
-        return
-
-# 从SVN服务器获取特定版本的diff
-def get_svn_diff(branch_url, revision, username=None, password=None, use_cache=False):
-    """
-    获取特定版本的代码变化，支持细粒度文件缓存和增量分析
-    :param branch_url: SVN分支URL
-    :param revision: 版本号
-    :param username: SVN用户名
-    :param password: SVN密码
-    :param use_cache: 是否直接从缓存中获取数据
-    :return: (新增行数, 删除行数, 文件详情字典)
-    """
-    # print(f"[{datetime.now()}] SVN - branch_url: {branch_url}, revision: {revision}, username: {username}, password: {'*' * len(password) if password else 'None'}, use_cache: {use_cache}")
-    
-    # 生成版本级缓存键
-    revision_cache_key = generate_revision_cache_key(revision, branch_url);
-    
-    # 如果使用缓存，先检查版本级缓存
-    if use_cache:
-        if revision_cache_key in cache_data['cache']['revision_summary']:
-            # 版本级缓存存在，获取缓存的摘要信息
-            cached_summary = cache_data['cache']['revision_summary'][revision_cache_key]
-            total_lines_added = cached_summary['total_lines_added']
-            total_lines_deleted = cached_summary['total_lines_deleted']
-            file_list = cached_summary['file_list']
-            
-            need_refresh = False
-            
-            # 构建文件详情字典
-            file_details = {}
-            for file_path in file_list:
-                file_cache_key = generate_file_cache_key(revision, file_path)
-                if file_cache_key in cache_data['cache']['revision_file']:
-                    cached_file = cache_data['cache']['revision_file'][file_cache_key]
-                    file_details[file_path] = {
-                        'lines_added': cached_file['lines_added'],
-                        'lines_deleted': cached_file['lines_deleted'],
-                        'cached': True,
-                        'author': cached_file['author']
-                    }
-                else:
-                    # 如果文件缓存不存在，标记为需要重新获取
-                    need_refresh = True
-            if not need_refresh:
-                print(f"[{datetime.now()}] SVN-diff 缓存版本 {revision} 数据存在,使用缓存数据")
-                return (total_lines_added, total_lines_deleted, file_details)
-    
-    print(f"[{datetime.now()}] SVN-diff - 重新获取svn diff, revision: {revision}")
-    # 解析SVN diff结果，获取每个文件的变化
-    cmd = ['svn', 'diff', '-c', str(revision), '--no-auth-cache']
-    
-    if username:
-        cmd.extend(['--username', username])
-    if password:
-        cmd.extend(['--password', password])
-    
-    cmd.append(branch_url)
-    
-    try:
-        print(f"[{datetime.now()}] SVN-diff 获取diff (rev {revision})")
-        # 使用text=False获取原始字节输出
-        result = subprocess.run(cmd, capture_output=True, text=False, timeout=60)
-        
-        # 手动解码输出
-        diff_output = ""
-        try:
-            diff_output = result.stdout.decode('utf-8')
-        except UnicodeDecodeError:
-            try:
-                diff_output = result.stdout.decode('gbk')
-            except UnicodeDecodeError:
-                diff_output = result.stdout.decode('latin-1')
-        
-        if result.returncode != 0:
-            return (0, 0, {})
-        
-        # 解析diff结果
-        
-        # 初始化统计变量
-        total_lines_added = 0
-        total_lines_deleted = 0
-        file_details = {}
-        
-        # 正则表达式匹配文件块
-        import re
-        file_block_pattern = re.compile(r'---\s+(.*?)\s+\d+.*?\n\+\+\+\s+(.*?)\s+\d+.*?(?=\n---|\Z)', re.DOTALL)
-        
-        # 遍历所有文件块
-        for match in file_block_pattern.finditer(diff_output):
-            old_file = match.group(1).strip()
-            new_file = match.group(2).strip()
-            
-            # 提取相对文件路径
-            if old_file.startswith('/'):
-                file_path = old_file.lstrip('/')
-            else:
-                # 从分支URL解析相对路径
-                file_path = new_file.split('/')[-1]
-                if len(new_file.split('/')) > 1:
-                    file_path = '/'.join(new_file.split('/')[-2:])
-            
-            # 获取文件内容
-            file_content = match.group(0)
-            
-            # 计算该文件的新增和删除行数
-            author = ''
-            lines_added = 0
-            lines_deleted = 0
-            
-            for line in file_content.split('\n'):
-                if line.startswith('+') and not line.startswith('+++'):
-                    lines_added += 1
-                elif line.startswith('-') and not line.startswith('---'):
-                    lines_deleted += 1
-            
-            # 生成文件级缓存键
-            file_cache_key = generate_file_cache_key(revision, file_path)
-            
-            # 获取文件当前版本的哈希值
-            current_file_hash = get_svn_file_content_hash(branch_url, revision, file_path, username, password)
-            
-            # 检查文件缓存
-            use_cached = False
-            if file_cache_key in cache_data['cache']['revision_file']:
-                cached_file = cache_data['cache']['revision_file'][file_cache_key]
-                if cached_file['hash'] == current_file_hash:
-                    # 文件内容未变化，使用缓存数据
-                    lines_added = cached_file['lines_added']
-                    lines_deleted = cached_file['lines_deleted']
-                    author = cached_file['author']
-                    use_cached = True
-                    print(f"[{datetime.now()}] SVN-diff 使用缓存文件数据: {file_path}")
-            
-            # 如果没有缓存或文件内容变化，更新缓存
-            if not use_cached:
-                # 保存文件级缓存
-                cache_data['cache']['revision_file'][file_cache_key] = {
-                    'revision': revision,
-                    'file_path': file_path,
-                    'hash': current_file_hash,
-                    'author': author,
-                    'lines_added': lines_added,
-                    'lines_deleted': lines_deleted,
-                    'timestamp': int(time.time())
-                }
-            
-            # 累加到总统计
-            total_lines_added += lines_added
-            total_lines_deleted += lines_deleted
-            
-            # 保存文件详情
-            file_details[file_path] = {
-                'lines_added': lines_added,
-                'lines_deleted': lines_deleted,
-                'cached': use_cached,
-                'author': author
-            }
-        
-        # 保存版本级缓存摘要
-        cache_data['cache']['revision_summary'][revision_cache_key] = {
-            'revision': revision,
-            'branch_url': branch_url,
-            'total_lines_added': total_lines_added,
-            'total_lines_deleted': total_lines_deleted,
-            'file_count': len(file_details),
-            'file_list': list(file_details.keys()),
-            'timestamp': int(time.time())
-        }
-        
-        # 保存缓存文件
-        save_cache(cache_data)
-        
-        return (total_lines_added, total_lines_deleted, file_details)
-    except Exception as e:
-        print(f"[{datetime.now()}] SVN-diff 获取diff失败 (rev {revision}): {e}")
-        import traceback
-        traceback.print_exc()
-        return (0, 0, {})
-
-# 从文件路径中提取分支信息
-def extract_branch(path):
-    if '/src/main/' in path:
-        branch_part = path.split('/src/main/')[0]
-        return branch_part
-    return 'trunk'
-
-
-
-# 获取指定分支的最新版本号
-def get_latest_revision_for_branch(branch_url):
-    """
-    从svn.cache中获取指定分支的最新版本号
-    :param branch_url: SVN分支URL
-    :return: 最新版本号，如果没有找到则返回None
-    """
-    try:
-        global cache_data
-        
-        # 检查缓存中是否有该分支的版本记录
-        cache_keys = sorted(cache_data['cache']['revision_summary'].keys(), reverse=True)
-        for key in cache_keys:
-            cached_summary = cache_data['cache']['revision_summary'][key]
-            if branch_url == cached_summary['branch_url']:
-                latest_revision = cached_summary['revision']
-                print(f"[{datetime.now()}] 从缓存中找到分支 {branch_url} 的最新版本号: {latest_revision}")
-                return latest_revision
-        else:
-            print(f"[{datetime.now()}] 缓存中未找到分支 {branch_url} 的版本记录")
-            return None
-    except Exception as e:
-        print(f"[{datetime.now()}] 获取分支 {branch_url} 最新版本号时出错: {e}")
-        return None
-
-# 获取年份对应的日志文件路径
-def get_year_log_file(year, root_path=None):
-    """
-    获取指定年份的日志文件路径
-    :param year: 年份
-    :param root_path: 根目录路径，默认使用app.root_path
-    :return: 日志文件的绝对路径
-    """
-    if root_path is None:
-        root_path = app.root_path
-    logs_dir = os.path.join(root_path, 'logs')
-    return os.path.join(logs_dir, f'svn_{year}.log')
-
-# 获取所有年份日志文件
-def get_all_year_log_files(start_date=None, end_date=None, root_path=None):
-    """
-    获取所有年份日志文件的列表
-    :param start_date: 开始日期
-    :param end_date: 结束日期   
-    :param root_path: 根目录路径，默认使用app.root_path
-    :return: 日志文件路径列表，按年份从早到晚排序
-    """
-    
-    if root_path is None:
-        root_path = app.root_path
-    logs_dir = os.path.join(root_path, 'logs')
-    log_files = []
-    
-    # 解析开始日期和结束日期，提取年份
-    start_year = None
-    end_year = None
-    
-    if start_date:
-        start_year = int(start_date.split('-')[0])
-    
-    if end_date:
-        end_year = int(end_date.split('-')[0])
-    
-    # 查找所有svn_YYYY.log格式的文件
-    for filename in os.listdir(logs_dir):
-        if filename.startswith('svn_') and filename.endswith('.log'):
-            # 提取文件名中的年份
-            try:
-                year = int(filename[4:-4])  # 从文件名'svn_YYYY.log'中提取YYYY
-                
-                # 检查年份是否在指定范围内
-                if ((start_year is None or year >= start_year) and 
-                    (end_year is None or year <= end_year)):
-                    log_files.append(os.path.join(logs_dir, filename))
-            except ValueError:
-                continue  # 跳过文件名格式不正确的文件
-    
-    # 按年份排序（文件名格式：svn_2023.log）
-    log_files.sort()
-    return log_files
-
-# 写入SVN日志文件
-def write_svn_log(all_log_results):
-    # 创建字典存储每个版本的最新日志条目（使用revision作为键）
-    logentries_dict = {}
-    old_revisions = 0
-    new_revisions = 0
-    
-    # 读取所有年份日志文件中的现有日志
-    all_log_files = get_all_year_log_files()
-    print(f"[{datetime.now()}] SVN任务 - 找到 {len(all_log_files)} 个年份日志文件")
-    
-    for log_file in all_log_files:
-        try:
-            # 解析现有日志文件
-            existing_tree = ET.parse(log_file)
-            existing_root = existing_tree.getroot()
-            
-            # 添加现有日志条目
-            for logentry in existing_root.findall('logentry'):
-                revision = logentry.get('revision')
-                logentries_dict[revision] = logentry
-            
-            print(f"[{datetime.now()}] SVN任务 - 从 {log_file} 加载了 {len([entry for entry in existing_root.findall('logentry')])} 个版本")
-        except ET.ParseError as e:
-            print(f"[{datetime.now()}] SVN任务 - 解析 {log_file} 时XML解析错误: {e}")
-            # 尝试修复XML文件
-            with open(log_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # 简单的XML修复：移除或替换无效字符
-            import re
-            # 移除所有控制字符，只保留空格、制表符、换行符
-            content = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f]', '', content)
-            # 替换特殊字符为HTML实体
-            content = content.replace('&', '&amp;')
-            
-            # 重新写入修复后的内容
-            with open(log_file, 'w', encoding='utf-8') as f:
-                f.write(content)
-            
-            print(f"[{datetime.now()}] SVN任务 - {log_file} XML文件已修复，重新尝试解析")
-            try:
-                # 重新尝试解析
-                existing_tree = ET.parse(log_file)
-                existing_root = existing_tree.getroot()
-                
-                # 添加现有日志条目
-                for logentry in existing_root.findall('logentry'):
-                    revision = logentry.get('revision')
-                    logentries_dict[revision] = logentry
-                
-                print(f"[{datetime.now()}] SVN任务 - 从修复后的 {log_file} 加载了 {len([entry for entry in existing_root.findall('logentry')])} 个版本")
-            except ET.ParseError as e2:
-                print(f"[{datetime.now()}] SVN任务 - {log_file} 修复后仍无法解析: {e2}")
-                continue
-    
-    old_revisions = len(logentries_dict)
-
-    # 处理所有获取的日志结果（主分支+externals）
-    for log_result in all_log_results:
-        try:
-            # 解析新获取的日志数据
-            new_tree = ET.ElementTree(ET.fromstring(log_result.stdout))
-            new_root = new_tree.getroot()
-            
-            # 添加新日志条目（相同版本会覆盖现有条目，保留最新）
-            for logentry in new_root.findall('logentry'):
-                revision = logentry.get('revision')
-                logentries_dict[revision] = logentry
-        except ET.ParseError as e:
-            print(f"[{datetime.now()}] SVN任务 - 解析新日志结果时XML解析错误: {e}")
-            # 尝试修复XML内容
-            content = log_result.stdout
-            import re
-            # 移除所有控制字符，只保留空格、制表符、换行符
-            content = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f]', '', content)
-            # 替换特殊字符为HTML实体
-            content = content.replace('&', '&amp;')
-            
-            try:
-                # 重新尝试解析修复后的XML
-                new_tree = ET.ElementTree(ET.fromstring(content))
-                new_root = new_tree.getroot()
-                
-                # 添加新日志条目
-                for logentry in new_root.findall('logentry'):
-                    revision = logentry.get('revision')
-                    logentries_dict[revision] = logentry
-                
-                print(f"[{datetime.now()}] SVN任务 - 新日志XML已修复并成功解析")
-            except ET.ParseError as e2:
-                print(f"[{datetime.now()}] SVN任务 - 修复后仍无法解析XML: {e2}")
-                continue
-        
-    new_revisions = len(logentries_dict) - old_revisions
-    
-    print(f"[{datetime.now()}] SVN任务 - 合并完成，共 {len(logentries_dict)} 个唯一版本，新增 {new_revisions} 个版本")
-    
-    # 按年份分组日志条目
-    logentries_by_year = {}
-    for rev in logentries_dict:
-        logentry = logentries_dict[rev]
-        date_str = logentry.find('date').text
-        date = datetime.fromisoformat(date_str[:-1])
-        year = str(date.year)
-        
-        if year not in logentries_by_year:
-            logentries_by_year[year] = []
-        logentries_by_year[year].append(logentry)
-    
-    # 写入每年的日志到对应的文件
-    for year in logentries_by_year:
-        # 按版本号降序排序（最新版本在前）
-        year_logentries = logentries_by_year[year]
-        year_logentries.sort(key=lambda x: int(x.get('revision')), reverse=True)
-        
-        # 构建XML根元素
-        year_root = ET.Element('log')
-        for logentry in year_logentries:
-            year_root.append(logentry)
-        
-        # 获取年份日志文件路径
-        year_log_file = get_year_log_file(year)
-        
-        # 写入日志到文件
-        year_tree = ET.ElementTree(year_root)
-        year_tree.write(year_log_file, encoding='utf-8', xml_declaration=True)
-        print(f"[{datetime.now()}] SVN任务 - 已保存 {year} 年日志到 {year_log_file}，共 {len(year_logentries)} 条记录")
-
-# 解析svn.log文件
-def parse_svn_log(startDate=None, endDate=None):
-    """
-    解析一个或多个svn.log文件
-    :param log_files: 单个文件路径字符串或文件路径列表
-    :param startDate: 开始日期
-    :param endDate: 结束日期
-    :return: 提交记录列表
-    """
-
-    # 获取所有年份日志文件
-    log_files = get_all_year_log_files(startDate, endDate)
-    
-    # 如果是单个文件路径，转换为列表
-    if isinstance(log_files, str):
-        log_files = [log_files]
-    
-    print(f"[{datetime.now()}] SVN任务 - 要处理的日志文件: {(log_files)}")
-    all_commits = []
-    
-    for log_file in log_files:
-        try:
-            tree = ET.parse(log_file)
-            root = tree.getroot()
-        except ET.ParseError as e:
-            print(f"[{datetime.now()}] SVN任务 - 解析 {log_file} 时XML解析错误: {e}")
-            # 尝试修复XML文件
-            with open(log_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # 简单的XML修复：移除或替换无效字符
-            import re
-            # 移除所有控制字符，只保留空格、制表符、换行符
-            content = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f]', '', content)
-            # 替换特殊字符为HTML实体
-            content = content.replace('&', '&amp;')
-            
-            # 重新写入修复后的内容
-            with open(log_file, 'w', encoding='utf-8') as f:
-                f.write(content)
-            
-            print(f"[{datetime.now()}] SVN任务 - {log_file} XML文件已修复，重新尝试解析")
-            try:
-                # 重新尝试解析
-                tree = ET.parse(log_file)
-                root = tree.getroot()
-            except ET.ParseError as e2:
-                print(f"[{datetime.now()}] SVN任务 - {log_file} 修复后仍无法解析: {e2}")
-                continue
-        
-        # 过滤日期范围
-        parsed_startDate = None
-        parsed_endDate = None
-        if startDate and endDate:
-            parsed_startDate = datetime.fromisoformat(startDate[:])
-            parsed_endDate = datetime.fromisoformat(endDate[:])
-            print(f"[{datetime.now()}] SVN任务 - 要处理的日期范围: {startDate} 到 {endDate}")
-        
-        # 解析当前文件的提交记录
-        commits = []
-        for logentry in root.findall('logentry'):
-            revision = logentry.get('revision')
-            author = logentry.find('author').text if logentry.find('author') is not None else 'unknown'
-            date_str = logentry.find('date').text
-            date = datetime.fromisoformat(datetime.fromisoformat(date_str[:-1]).strftime('%Y-%m-%d')[:])
-            # print(f"[{datetime.now()}] SVN任务 - 处理版本 {revision}，日期 {date}")
-            
-            # 过滤日期范围
-            if parsed_startDate and parsed_endDate:
-                if date < parsed_startDate or date > parsed_endDate:
-                    # print(f"[{datetime.now()}] SVN任务 - 版本 {revision} - {date < parsed_startDate or date > parsed_endDate}")
-                    continue
-            
-            # 计算修改的文件数和提取分支信息
-            paths = logentry.find('paths')
-            files_changed = len(paths.findall('path'))
-            
-            # 提取所有相关分支和修改的文件信息
-            branches = set()
-            changed_files = []
-            for path in paths.findall('path'):
-                if path.text:
-                    file_path = path.text
-                    action = path.get('action') or 'M'  # 默认修改
-                    
-                    # 提取分支信息
-                    branch = extract_branch(file_path)
-                    branches.add(branch)
-                    
-                    # 记录详细的文件修改信息
-                    changed_files.append({
-                        'path': file_path,
-                        'action': action,
-                        'branch': branch
-                    })
-
-            if branches:
-                tmp_branch_url = list(branches)[0]
-                if tmp_branch_url.startswith('/trunk'):
-                    branch_url = "{}{}".format(config.get("svn_base_url", ""), branch)
-                else:
-                    branch_url = tmp_branch_url
-            
-            # 代码行数统计（初始化为0，后续通过svn diff获取）
-            lines_added = 0
-            lines_deleted = 0
-            
-            commits.append({
-                'revision': revision,
-                'author': author,
-                'date': date.isoformat(),
-                'date_str': date_str,
-                'branch_url': branch_url,
-                'files_changed': files_changed,
-                'changed_files': changed_files,
-                'branches': list(branches),
-                'lines_added': lines_added,
-                'lines_deleted': lines_deleted
-            })
-        
-        all_commits.extend(commits)
-    
-    # 按revision排序，确保正确顺序
-    all_commits.sort(key=lambda x: int(x['revision']))
-
-    return all_commits
-
-# 多分支SVN日志获取任务
-def multi_branch_svn_log_task(branches, revision_range, start_date=None, end_date=None):
-    global task_status
-
-    print(f"[{datetime.now()}] SVN任务 - 开始执行多分支SVN代码统计任务")
-    print(f"[{datetime.now()}] SVN任务 - 参数: 分支数量: {len(branches)}, 版本范围: {revision_range}, 开始日期: {start_date}, 结束日期: {end_date}")
-    
-    try:
-        # 重置执行明细
-        task_status['execution_details'] = []
-        
-        task_status['running'] = True
-        task_status['progress'] = 5
-        task_status['message'] = '正在准备分析多个分支...'
-        
-        # 添加执行明细
-        task_status['execution_details'].append({
-            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-            'message': f'开始执行多分支SVN代码统计任务，共 {len(branches)} 个分支',
-            'level': 'info'
-        })
-        
-        # 收集所有分支的日志结果
-        all_branch_results = []
-        
-        # 遍历每个分支
-        for i, branch_config in enumerate(branches, 1):
-            branch_url = branch_config.get('branch_url')
-            username = branch_config.get('username')
-            password = branch_config.get('password')
-            
-            task_status['progress'] = 5 + (i - 1) * 15
-            task_status['message'] = f'正在分析分支 {i}/{len(branches)}...'
-            
-            task_status['execution_details'].append({
-                'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-                'message': f'开始分析分支 {i}/{len(branches)}: {branch_url}',
-                'level': 'info'
-            })
-            
-            try:
-                
-                # 获取SVN日志（主分支）
-                main_result = get_svn_log(branch_url, username, password, revision_range)
-                
-                # 检查结果是否为None（表示获取失败）
-                if main_result is None:
-                    error_msg = f'获取分支 {branch_url} 日志失败，请检查网络连接或SVN配置'
-                    print(f"[{datetime.now()}] SVN任务 - 错误: {error_msg}")
-                    task_status['execution_details'].append({
-                        'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-                        'message': error_msg,
-                        'level': 'warning'
-                    })
-                    continue
-                
-                # 检查命令执行结果
-                if main_result.returncode != 0:
-                    error_msg = f'分支 {branch_url} SVN命令执行失败: {main_result.stderr}'
-                    print(f"[{datetime.now()}] SVN任务 - 错误: {error_msg}")
-                    task_status['execution_details'].append({
-                        'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-                        'message': error_msg,
-                        'level': 'warning'
-                    })
-                    continue
-                
-                print(f"[{datetime.now()}] SVN任务 - 分支 {branch_url} SVN命令执行成功")
-                all_branch_results.append(main_result)
-                
-                success_msg = f'分支 {branch_url} 日志获取成功， 版本范围: {revision_range}，分支日志数: {len(main_result.stdout)}'
-                print(f"[{datetime.now()}] SVN任务 - {success_msg}")
-                task_status['execution_details'].append({
-                    'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-                    'message': success_msg,
-                    'level': 'success'
-                })
-                
-            except Exception as e:
-                error_msg = f'分支 {branch_url} 处理失败: {e}'
-                print(f"[{datetime.now()}] SVN任务 - 错误: {error_msg}")
-                task_status['execution_details'].append({
-                    'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-                    'message': error_msg,
-                    'level': 'error'
-                })
-                continue
-        
-        if not all_branch_results:
-            task_status['error'] = '所有分支日志获取失败，请检查网络连接或SVN配置'
-            task_status['running'] = False
-            return
-        
-        task_status['progress'] = 50
-        task_status['message'] = '正在保存日志...'
-        
-        print(f"[{datetime.now()}] SVN任务 - 正在保存日志到文件")
-        
-        # 增量写入日志文件：合并现有日志和所有新获取的日志（主分支+externals）  
-        write_svn_log(all_branch_results)
-
-        task_status['execution_details'].append({
-            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-            'message': f'日志获取完成，已按年份保存到 logs 目录下',
-            'level': 'info'
-        })
-        
-        task_status['progress'] = 60
-        task_status['message'] = '正在解析日志并获取代码行数...'
-        task_status['execution_details'].append({
-            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-            'message': '开始解析日志文件',
-            'level': 'info'
-        })
-        
-        print(f"[{datetime.now()}] SVN任务 - 开始解析日志文件")
-        
-        # 解析日志获取版本列表
-        commits = parse_svn_log(start_date, end_date)
-        print(f"[{datetime.now()}] SVN任务 - 日志解析完成，共找到 {len(commits)} 条提交记录")
-        task_status['execution_details'].append({
-            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-            'message': f'日志解析完成，共找到 {len(commits)} 条提交记录',
-            'level': 'info'
-        })
-        
-        total_commits = len(commits)
-        if total_commits == 0:
-            task_status['error'] = f'在指定日期范围内没有找到提交记录\n开始日期: {start_date or "无"}\n结束日期: {end_date or "无"}'
-            task_status['running'] = False
-            return
-        
-        task_status['execution_details'].append({
-            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-            'message': f'开始获取代码行数，共 {total_commits} 个版本需要分析',
-            'level': 'info'
-        })
-        
-        # 获取每个版本的代码行数变化
-        print(f"[{datetime.now()}] SVN任务 - 开始获取代码行数变化，共 {total_commits} 个版本需要分析")
-        for i, commit in enumerate(commits):
-            revision = commit['revision']
-            
-            print(f"[{datetime.now()}] SVN任务 - 分析版本 {revision} ({i + 1}/{total_commits})")
-            task_status['execution_details'].append({
-                'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-                'message': f'分析版本 {revision} ({i + 1}/{total_commits})',
-                'level': 'debug'
-            })
-            
-            # 获取代码行数变化，包含文件详情
-            # 对于多分支分析，我们需要根据提交记录中的分支信息来获取对应的分支URL
-            # 这里简化处理，使用第一个分支的配置
-            if branches and len(branches) > 0:
-                username = branches[0].get('username')
-                password = branches[0].get('password')
-            else:
-                username = ""
-                password = ""
-            
-            print(f"[{datetime.now()}] SVN任务 - 调用 get_svn_diff 获取版本 {revision} 的代码行数变化")
-            lines_added, lines_deleted, file_details = get_svn_diff(commit['branch_url'], revision, username, password, True)
-            print(f"[{datetime.now()}] SVN任务 - 版本 {revision} 分析完成，新增 {lines_added} 行，删除 {lines_deleted} 行，涉及 {len(file_details)} 个文件")
-            
-            # 保存到提交记录
-            commit['lines_added'] = lines_added
-            commit['lines_deleted'] = lines_deleted
-            commit['file_details'] = file_details
-            
-            # 更新进度
-            progress = 60 + (i + 1) * 40 // total_commits
-            task_status['progress'] = progress
-            task_status['message'] = f'正在获取代码行数... ({i + 1}/{total_commits})'
-            print(f"[{datetime.now()}] SVN任务 - 进度更新: {progress}%")
-        
-        task_status['progress'] = 80
-        task_status['message'] = '正在分析日志...'
-        print(f"[{datetime.now()}] SVN任务 - 开始生成统计数据")
-        
-        # 生成统计
-        print(f"[{datetime.now()}] SVN任务 - 生成新的统计数据")
-        task_status['execution_details'].append({
-            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-            'message': '生成新的统计数据',
-            'level': 'info'
-        })
-        # 生成新的统计，不使用现有结果
-        gen_analysis_results(commits, start_date, end_date, revision_range)
-
-        # 更新缓存文件，只保存缓存数据
-        print(f"[{datetime.now()}] SVN任务 - 正在更新缓存文件")
-        task_status['execution_details'].append({
-            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-            'message': '正在更新缓存文件',
-            'level': 'info'
-        })
-        
-        try:
-            # 只保存缓存数据，不保存分析结果
-            save_cache(cache_data)
-            print(f"[{datetime.now()}] SVN任务 - 缓存文件更新完成")
-            task_status['execution_details'].append({
-                'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-                'message': '缓存文件更新完成',
-                'level': 'info'
-            })
-        except Exception as e:
-            print(f"[{datetime.now()}] SVN任务 - 更新缓存文件失败: {e}")
-            task_status['execution_details'].append({
-                'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-                'message': f'更新缓存文件失败: {e}',
-                'level': 'error'
-            })
-        
-        task_status['progress'] = 100
-        task_status['message'] = f'分析完成! 共{len(commits)}条提交记录'
-        task_status['completed'] = True
-        task_status['running'] = False
-        
-        task_status['execution_details'].append({
-            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-            'message': f'任务执行完成，共处理 {len(commits)} 条提交记录',
-            'level': 'success'
-        })
-        
-        print(f"[{datetime.now()}] SVN任务 - 任务执行完成，状态: 成功")
-    except Exception as e:
-        error_msg = str(e)
-        print(f"[{datetime.now()}] SVN任务 - 任务执行失败: {error_msg}")
-        task_status['error'] = error_msg
-        task_status['running'] = False
-        task_status['execution_details'].append({
-            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-            'message': f'任务执行失败: {error_msg}',
-            'level': 'error'
-        })
-        import traceback
-        traceback.print_exc()
-
-# SVN日志获取任务
-def svn_log_task(branch_url, username, password, revision_range, start_date=None, end_date=None, withExternals=False):
-    global task_status
-
-    print(f"[{datetime.now()}] SVN任务 - 开始执行SVN代码统计任务")
-    print(f"[{datetime.now()}] SVN任务 - 参数: 分支URL: {branch_url}, 版本范围: {revision_range}, 开始日期: {start_date}, 结束日期: {end_date}")
-    
-    try:
-        # 重置执行明细
-        task_status['execution_details'] = []
-        
-        task_status['running'] = True
-        task_status['progress'] = 10
-        task_status['message'] = '正在连接SVN服务器...'
-        
-        # 添加执行明细
-        task_status['execution_details'].append({
-            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-            'message': '开始执行SVN代码统计任务',
-            'level': 'info'
-        })
-        print(f"[{datetime.now()}] SVN任务 - 执行明细已重置，状态已更新")
-        
 
-        task_status['execution_details'].append({
-            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-            'message': f'使用用户名: {username}',
-            'level': 'info'
-        })
-    
-        # 密码脱敏
-        task_status['execution_details'].append({
-            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-            'message': '使用密码: ******',
-            'level': 'info'
-        })
-
-        task_status['execution_details'].append({
-            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-            'message': f'使用版本范围: {revision_range}',
-            'level': 'info'
-        })
-
-        task_status['execution_details'].append({
-            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-            'message': f'分析SVN分支: {branch_url}',
-            'level': 'info'
-        })
-        
-        task_status['progress'] = 30
-        task_status['message'] = '正在获取SVN日志...'
-        
-        # 获取SVN日志（主分支）
-        main_result = get_svn_log(branch_url, username, password, revision_range)
-        
-        # 检查结果是否为None（表示获取失败）
-        if main_result is None:
-            error_msg = '获取SVN日志失败，请检查网络连接或SVN配置'
-            print(f"[{datetime.now()}] SVN任务 - 错误: {error_msg}")
-            task_status['error'] = error_msg
-            task_status['running'] = False
-            return
-        
-        # 检查命令执行结果
-        if main_result.returncode != 0:
-            error_msg = f'SVN命令执行失败: {main_result.stderr}'
-            print(f"[{datetime.now()}] SVN任务 - 错误: {error_msg}")
-            task_status['error'] = error_msg
-            task_status['running'] = False
-            return
-        
-        print(f"[{datetime.now()}] SVN任务 - 主分支SVN命令执行成功，返回码: {main_result.returncode}")
-        
-        
-        # 收集所有日志结果（主分支+externals）
-        all_log_results = [main_result]
-    
-        # 获取并处理SVN externals
-        if withExternals:
-            task_status['execution_details'].append({
-                'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-                'message': '开始处理SVN externals',
-                'level': 'info'
-            })
-
-            externals = get_svn_externals(branch_url, username, password)
-        
-            task_status['execution_details'].append({
-                'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-                'message': f'开始获取 {len(externals)} 个external分支的日志',
-                'level': 'info'
-            })
-            
-            # 获取每个external的日志
-            for i, external in enumerate(externals, 1):
-                external_msg = f'正在获取external分支日志 ({i}/{len(externals)}): {external["url"]}'
-                print(f"[{datetime.now()}] SVN任务 - {external_msg}")
-                task_status['execution_details'].append({
-                    'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-                    'message': external_msg,
-                    'level': 'info'
-                })
-                
-                external_result = get_svn_log(external['url'], username, password, revision_range)
-                
-                if external_result and external_result.returncode == 0:
-                    all_log_results.append(external_result)
-                    success_msg = f'external分支日志获取成功: {external["url"]}'
-                    print(f"[{datetime.now()}] SVN任务 - {success_msg}")
-                    task_status['execution_details'].append({
-                        'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-                        'message': success_msg,
-                        'level': 'success'
-                    })
-                else:
-                    error_msg = f'external分支日志获取失败: {external["url"]}'
-                    print(f"[{datetime.now()}] SVN任务 - {error_msg}")
-                    task_status['execution_details'].append({
-                        'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-                        'message': error_msg,
-                        'level': 'warning'
-                    })
-        else:
-            task_status['execution_details'].append({
-                'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-                'message': '未发现任何external配置',
-                'level': 'info'
-            })
-        
-        task_status['progress'] = 40
-        task_status['message'] = '正在保存日志...'
-        
-        print(f"[{datetime.now()}] SVN任务 - 正在保存日志")
-        
-        # 增量写入日志文件：合并现有日志和所有新获取的日志（主分支+externals）  
-        write_svn_log(all_log_results)
-        
-        task_status['execution_details'].append({
-            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-            'message': f'日志获取完成，已按年份保存到 logs 目录下',
-            'level': 'info'
-        })
-        
-        task_status['progress'] = 50
-        task_status['message'] = '正在解析日志并获取代码行数...'
-        task_status['execution_details'].append({
-            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-            'message': '开始解析日志文件',
-            'level': 'info'
-        })
-        
-        print(f"[{datetime.now()}] SVN任务 - 开始解析日志文件")
-
-        # 解析日志获取版本列表
-        commits = parse_svn_log(start_date, end_date)
-        print(f"[{datetime.now()}] SVN任务 - 日志解析完成，共找到 {len(commits)} 条提交记录")
-        task_status['execution_details'].append({
-            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-            'message': f'日志解析完成，共找到 {len(commits)} 条提交记录',
-            'level': 'info'
-        })
-        
-        total_commits = len(commits)
-        if total_commits == 0:
-            task_status['error'] = f'在指定日期范围内没有找到提交记录\n开始日期: {start_date or "无"}\n结束日期: {end_date or "无"}'
-            task_status['running'] = False
-            return
-        
-        task_status['execution_details'].append({
-            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-            'message': f'开始获取代码行数，共 {total_commits} 个版本需要分析',
-            'level': 'info'
-        })
-        
-        # 获取每个版本的代码行数变化
-        print(f"[{datetime.now()}] SVN任务 - 开始获取代码行数变化，共 {total_commits} 个版本需要分析")
-        for i, commit in enumerate(commits):
-            revision = commit['revision']
-            
-            print(f"[{datetime.now()}] SVN任务 - 分析版本 {revision} ({i + 1}/{total_commits})")
-            task_status['execution_details'].append({
-                'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-                'message': f'分析版本 {revision} ({i + 1}/{total_commits})',
-                'level': 'debug'
-            })
-            
-            # 获取代码行数变化，包含文件详情
-            print(f"[{datetime.now()}] SVN任务 - 调用 get_svn_diff 获取版本 {revision} 的代码行数变化")
-            lines_added, lines_deleted, file_details = get_svn_diff(commit['branch_url'], revision, username, password, True)
-            print(f"[{datetime.now()}] SVN任务 - 版本 {revision} 分析完成，新增 {lines_added} 行，删除 {lines_deleted} 行，涉及 {len(file_details)} 个文件")
-            
-            # 保存到提交记录
-            commit['lines_added'] = lines_added
-            commit['lines_deleted'] = lines_deleted
-            commit['file_details'] = file_details
-            
-            # 更新进度
-            progress = 50 + (i + 1) * 50 // total_commits
-            task_status['progress'] = progress
-            task_status['message'] = f'正在获取代码行数... ({i + 1}/{total_commits})'
-            print(f"[{datetime.now()}] SVN任务 - 进度更新: {progress}%")
-        
-        task_status['progress'] = 80
-        task_status['message'] = '正在分析日志...'
-        print(f"[{datetime.now()}] SVN任务 - 开始生成统计数据")
-        
-        # 生成统计
-        print(f"[{datetime.now()}] SVN任务 - 生成新的统计数据")
-        task_status['execution_details'].append({
-            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-            'message': '生成新的统计数据',
-            'level': 'info'
-        })
-        # 生成新的统计，不使用现有结果
-        gen_analysis_results(commits, start_date, end_date, revision_range)
-
-        # 更新缓存文件，只保存缓存数据
-        print(f"[{datetime.now()}] SVN任务 - 正在更新缓存文件")
-        task_status['execution_details'].append({
-            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-            'message': '正在更新缓存文件',
-            'level': 'info'
-        })
-        
-        try:
-            # 只保存缓存数据，不保存分析结果
-            save_cache(cache_data)
-            print(f"[{datetime.now()}] SVN任务 - 缓存文件更新完成")
-            task_status['execution_details'].append({
-                'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-                'message': '缓存文件更新完成',
-                'level': 'info'
-            })
-        except Exception as e:
-            print(f"[{datetime.now()}] SVN任务 - 更新缓存文件失败: {e}")
-            task_status['execution_details'].append({
-                'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-                'message': f'更新缓存文件失败: {e}',
-                'level': 'error'
-            })
-        
-        task_status['progress'] = 100
-        task_status['message'] = f'分析完成! 共{len(commits)}条提交记录'
-        task_status['completed'] = True
-        task_status['running'] = False
-        
-        task_status['execution_details'].append({
-            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-            'message': f'任务执行完成，共处理 {len(commits)} 条提交记录',
-            'level': 'success'
-        })
-        
-        print(f"[{datetime.now()}] SVN任务 - 任务执行完成，状态: 成功")
-    except Exception as e:
-        error_msg = str(e)
-        print(f"[{datetime.now()}] SVN任务 - 任务执行失败: {error_msg}")
-        task_status['error'] = error_msg
-        task_status['running'] = False
-        task_status['execution_details'].append({
-            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-            'message': f'任务执行失败: {error_msg}',
-            'level': 'error'
-        })
-        import traceback
-        traceback.print_exc()
+# 模块导入开始时间，用于统计启动耗时
+_import_started = time.perf_counter()
 
-def get_log(start_date=None, end_date=None):
-    """
-    获取SVN任务的日志，包含提交记录的详细信息。
-    
-    参数:
-    branch_url (str): SVN分支URL
-    start_date (str, 可选): 开始日期，格式为 'YYYY-MM-DD'
-    end_date (str, 可选): 结束日期，格式为 'YYYY-MM-DD'
-    withExternals (bool, 可选): 是否包含SVN externals
-    
-    返回:
-    list: 包含提交记录详细信息的列表
-    """
-    global task_status
-    
-    print(f"[{datetime.now()}] SVN任务 - 开始执行SVN代码统计任务")
-    print(f"[{datetime.now()}] SVN任务 - 参数: 开始日期: {start_date}, 结束日期: {end_date}")
-    
-    try:
-        print(f"[{datetime.now()}] SVN任务 - 开始解析日志文件")
-
-        # 解析日志获取版本列表
-        commits = parse_svn_log(start_date, end_date)
-        print(f"[{datetime.now()}] SVN任务 - 日志解析完成，共找到 {len(commits)} 条提交记录")
-        
-        total_commits = len(commits)
-        if total_commits == 0:
-            gen_analysis_results(commits, start_date, end_date, "")
-            return
-        
-        # 获取每个版本的代码行数变化
-        print(f"[{datetime.now()}] SVN任务 - 开始获取代码行数变化，共 {total_commits} 个版本需要分析")
-        for i, commit in enumerate(commits):
-            revision = commit['revision']
-            
-            print(f"[{datetime.now()}] SVN任务 - 分析版本 {revision} ({i + 1}/{total_commits})")
-            
-            # 获取代码行数变化，包含文件详情
-            print(f"[{datetime.now()}] SVN任务 - 调用 get_svn_diff 获取版本 {revision} 的代码行数变化")
-            lines_added, lines_deleted, file_details = get_svn_diff(commit['branch_url'], revision, config.get('svn_username', ""), config.get('svn_password', ""), True)
-            print(f"[{datetime.now()}] SVN任务 - 版本 {revision} 分析完成，新增 {lines_added} 行，删除 {lines_deleted} 行，涉及 {len(file_details)} 个文件")
-            
-            # 保存到提交记录
-            commit['lines_added'] = lines_added
-            commit['lines_deleted'] = lines_deleted
-            commit['file_details'] = file_details
-            
-            # 更新进度
-            progress = 50 + (i + 1) * 50 // total_commits
-            print(f"[{datetime.now()}] SVN任务 - 进度更新: {progress}%")
-        
-        print(f"[{datetime.now()}] SVN任务 - 开始生成统计数据")
-        
-        # 生成新的统计数据
-        gen_analysis_results(commits, start_date, end_date, "")
-
-        # 更新缓存文件，只保存缓存数据
-        print(f"[{datetime.now()}] SVN任务 - 正在更新缓存文件")
-        try:
-            # 只保存缓存数据，不保存分析结果
-            save_cache(cache_data)
-            print(f"[{datetime.now()}] SVN任务 - 缓存文件更新完成")
-        except Exception as e:
-            print(f"[{datetime.now()}] SVN任务 - 更新缓存文件失败: {e}")
-        
-        print(f"[{datetime.now()}] SVN任务 - 任务执行完成，状态: 成功")
-    except Exception as e:
-        error_msg = str(e)
-        print(f"[{datetime.now()}] SVN任务 - 任务执行失败: {error_msg}")
-        import traceback
-        traceback.print_exc()
-
-# 生成分析结果
-def gen_analysis_results(commits, startDate=None, endDate=None, revision_range=None):
-    global analysis_results
-    # 生成统计
-    monthly_stats = get_monthly_stats(commits)
-    author_stats = get_author_stats(commits)
-    branch_stats = get_branch_stats(commits)
-    daily_stats = get_daily_stats(commits)
-    chart_data = prepare_chart_data(monthly_stats, author_stats, branch_stats, daily_stats)
-    print(f"[{datetime.now()}] SVN任务 - 统计数据生成完成")
-    
-    # 保存结果
-    print(f"[{datetime.now()}] SVN任务 - 正在保存分析结果")
-
-    total_files = sum(c['files_changed'] for c in commits)
-    total_lines_added = sum(c['lines_added'] for c in commits)
-    total_lines_deleted = sum(c['lines_deleted'] for c in commits)
-    
-    analysis_results = {
-        'commits': commits,
-        'monthly_stats': monthly_stats,
-        'author_stats': author_stats,
-        'branch_stats': branch_stats,
-        'daily_stats': daily_stats,
-        'chart_data': chart_data,
-        'total_commits': len(commits),
-        'total_files': total_files,
-        'total_lines_added': total_lines_added,
-        'total_lines_deleted': total_lines_deleted,
-        'filter': {
-            'start_date': startDate,
-            'end_date': endDate,
-            'revision_range': revision_range
-        }
-    }
-    
-    print(f"[{datetime.now()}] SVN任务 - 分析结果保存完成，共 {len(commits)} 条提交记录, 新增 {total_lines_added} 行代码, 删除 {total_lines_deleted} 行代码")
-
-# 统计函数
-def get_monthly_stats(commits):
-    monthly_stats = {}
-    for commit in commits:
-        # 将ISO字符串转换为datetime对象
-        commit_date = datetime.fromisoformat(commit['date'])
-        month_key = commit_date.strftime('%Y-%m')
-        author = commit['author']
-        
-        for branch in commit['branches']:
-            if month_key not in monthly_stats:
-                monthly_stats[month_key] = {}
-            
-            if branch not in monthly_stats[month_key]:
-                monthly_stats[month_key][branch] = {}
-            
-            if author not in monthly_stats[month_key][branch]:
-                monthly_stats[month_key][branch][author] = {
-                    'files_changed': 0,
-                    'lines_added': 0,
-                    'lines_deleted': 0
-                }
-            
-            # 更新统计数据
-            monthly_stats[month_key][branch][author]['files_changed'] += commit['files_changed']
-            monthly_stats[month_key][branch][author]['lines_added'] += commit['lines_added']
-            monthly_stats[month_key][branch][author]['lines_deleted'] += commit['lines_deleted']
-    
-    return monthly_stats
-
-def get_author_stats(commits):
-    author_stats = {}
-    for commit in commits:
-        author = commit['author']
-        
-        if author not in author_stats:
-            author_stats[author] = {
-                'commits': 0,
-                'files_changed': 0,
-                'lines_added': 0,
-                'lines_deleted': 0,
-                'branches': set()
-            }
-        
-        # 更新统计数据
-        author_stats[author]['commits'] += 1
-        author_stats[author]['files_changed'] += commit['files_changed']
-        author_stats[author]['lines_added'] += commit['lines_added']
-        author_stats[author]['lines_deleted'] += commit['lines_deleted']
-        
-        for branch in commit['branches']:
-            author_stats[author]['branches'].add(branch)
-    
-    for author in author_stats:
-        author_stats[author]['branches'] = list(author_stats[author]['branches'])
-    
-    return author_stats
-
-def get_branch_stats(commits):
-    branch_stats = {}
-    for commit in commits:
-        for branch in commit['branches']:
-            if branch not in branch_stats:
-                branch_stats[branch] = {
-                    'commits': 0,
-                    'files_changed': 0,
-                    'lines_added': 0,
-                    'lines_deleted': 0,
-                    'authors': set()
-                }
-            
-            # 更新统计数据
-            branch_stats[branch]['commits'] += 1
-            branch_stats[branch]['files_changed'] += commit['files_changed']
-            branch_stats[branch]['lines_added'] += commit['lines_added']
-            branch_stats[branch]['lines_deleted'] += commit['lines_deleted']
-            branch_stats[branch]['authors'].add(commit['author'])
-    
-    for branch in branch_stats:
-        branch_stats[branch]['authors'] = list(branch_stats[branch]['authors'])
-    
-    return branch_stats
+from flask import Flask, Response, render_template, request, jsonify, send_from_directory
+from datetime import datetime, timedelta
+import threading
 
-def get_daily_stats(commits):
-    daily_stats = {}
-    for commit in commits:
-        # 将ISO字符串转换为datetime对象
-        commit_date = datetime.fromisoformat(commit['date'])
-        day_key = commit_date.strftime('%Y-%m-%d')
-        author = commit['author']
-        
-        for branch in commit['branches']:
-            if day_key not in daily_stats:
-                daily_stats[day_key] = {}
-            
-            if branch not in daily_stats[day_key]:
-                daily_stats[day_key][branch] = {}
-            
-            if author not in daily_stats[day_key][branch]:
-                daily_stats[day_key][branch][author] = {
-                    'files_changed': 0,
-                    'lines_added': 0,
-                    'lines_deleted': 0
-                }
-            
-            # 更新统计数据
-            daily_stats[day_key][branch][author]['files_changed'] += commit['files_changed']
-            daily_stats[day_key][branch][author]['lines_added'] += commit['lines_added']
-            daily_stats[day_key][branch][author]['lines_deleted'] += commit['lines_deleted']
-    
-    return daily_stats
+import svn_metrics
+import svn_export
+import svn_stats
+from svn_stats import (ensure_initialized, _task_slot_free, task_status_snapshot, run_task, svn_log_task,
+                       multi_branch_svn_log_task, get_analysis_trie, parse_filters, parse_chart_options,
+                       get_results_snapshot, iter_export_commits)
+from execution_log import ExecutionLog, entries_since
 
-# 准备图表数据
-def prepare_chart_data(monthly_stats, author_stats, branch_stats, daily_stats):
-    authors = list(author_stats.keys())
-    branches = list(branch_stats.keys())
-    
-    months = sorted(monthly_stats.keys())
-    days = sorted(daily_stats.keys())
-    
-    # 准备月度文件数数据
-    monthly_data_files = []
-    for author in authors:
-        author_data = {'label': author, 'data': []}
-        for month in months:
-            total_files = 0
-            for branch in branches:
-                if branch in monthly_stats[month] and author in monthly_stats[month][branch]:
-                    total_files += monthly_stats[month][branch][author]['files_changed']
-            author_data['data'].append(total_files)
-        monthly_data_files.append(author_data)
-    
-    # 准备月度代码行数数据
-    monthly_data_lines = []
-    for author in authors:
-        author_data = {'label': author, 'data': []}
-        for month in months:
-            total_lines = 0
-            for branch in branches:
-                if branch in monthly_stats[month] and author in monthly_stats[month][branch]:
-                    stats = monthly_stats[month][branch][author]
-                    total_lines += stats['lines_added']
-            author_data['data'].append(total_lines)
-        monthly_data_lines.append(author_data)
-    
-    # 准备每日文件数数据
-    daily_data_files = []
-    for author in authors:
-        author_data = {'label': author, 'data': []}
-        for day in days:
-            total_files = 0
-            for branch in branches:
-                if branch in daily_stats[day] and author in daily_stats[day][branch]:
-                    total_files += daily_stats[day][branch][author]['files_changed']
-            author_data['data'].append(total_files)
-        daily_data_files.append(author_data)
-    
-    # 准备每日代码行数数据
-    daily_data_lines = []
-    for author in authors:
-        author_data = {'label': author, 'data': []}
-        for day in days:
-            total_lines = 0
-            for branch in branches:
-                if branch in daily_stats[day] and author in daily_stats[day][branch]:
-                    stats = daily_stats[day][branch][author]
-                    total_lines += stats['lines_added']
-            author_data['data'].append(total_lines)
-        daily_data_lines.append(author_data)
-    
-    return {
-        'months': months,
-        'days': days,
-        'authors': authors,
-        'branches': branches,
-        'monthlyDataFiles': monthly_data_files,
-        'monthlyDataLines': monthly_data_lines,
-        'dailyDataFiles': daily_data_files,
-        'dailyDataLines': daily_data_lines
-    }
+app = Flask(__name__)
 
 
 # 添加静态文件路由
@@ -1761,17 +25,20 @@ def prepare_chart_data(monthly_stats, author_stats, branch_stats, daily_stats):
 def static_files(filename):
     return send_from_directory('static', filename)
 
+@app.before_request
+def before_request():
+    # 首次请求时加载配置并后台预热缓存，不阻塞页面和就绪检查
+    ensure_initialized()
+
 @app.route('/')
 def index():
     return render_template('index.html')
 
 @app.route('/api/start-analysis', methods=['POST'])
 def start_analysis():
-    global task_status
-    
     print(f"[{datetime.now()}] API POST /api/start-analysis - 请求开始分析任务")
     
-    if task_status['running']:
+    if svn_stats.task_status['running'] or not _task_slot_free(svn_stats.state_store.get('task_status')):
         print(f"[{datetime.now()}] API POST /api/start-analysis - 任务正在运行中，拒绝新请求")
         return jsonify({'success': False, 'message': '任务正在运行中...'})
     
@@ -1789,13 +56,13 @@ def start_analysis():
     if not start_date and not end_date:
         # 两者都不存在，取今天作为结束日期，180天前作为开始日期
         end_date = today
-        start_date = (datetime.now() - timedelta(days=config.get('log_range_days', 180))).strftime('%Y-%m-%d')
+        start_date = (datetime.now() - timedelta(days=svn_stats.config.get('log_range_days', 180))).strftime('%Y-%m-%d')
     elif not end_date:
         # 结束日期不存在，取今天作为结束日期
         end_date = today
     elif not start_date:
         # 开始日期不存在，取配置中的天数前作为开始日期
-        start_date = (datetime.now() - timedelta(days=config.get('log_range_days', 180))).strftime('%Y-%m-%d')
+        start_date = (datetime.now() - timedelta(days=svn_stats.config.get('log_range_days', 180))).strftime('%Y-%m-%d')
     
     # 检查是否使用多分支配置
     if branches:
@@ -1815,22 +82,28 @@ def start_analysis():
     print(f"[{datetime.now()}] API POST /api/start-analysis - 配置已保存，准备启动任务")
     
     # 重置状态
-    task_status = {
+    new_status = {
         'running': True,
         'progress': 0,
         'message': '准备开始...',
         'completed': False,
         'error': None,
-        'execution_details': []
+        'execution_details': ExecutionLog()
     }
+
+    # 在共享存储中原子地占用任务，防止多个worker同时启动任务
+    if not svn_stats.state_store.compare_and_set('task_status', _task_slot_free, task_status_snapshot(new_status)):
+        print(f"[{datetime.now()}] API POST /api/start-analysis - 其他worker已启动任务，拒绝新请求")
+        return jsonify({'success': False, 'message': '任务正在运行中...'})
+    svn_stats.task_status = new_status
     
     # 在后台线程中执行任务
     print(f"[{datetime.now()}] API POST /api/start-analysis - 启动后台线程执行任务，输出目录: ./logs")
     
     if branches:
-        thread = threading.Thread(target=multi_branch_svn_log_task, args=(branches, revision_range, start_date, end_date))
+        thread = threading.Thread(target=run_task, args=(multi_branch_svn_log_task, branches, revision_range, start_date, end_date))
     else:
-        thread = threading.Thread(target=svn_log_task, args=(branch_url, username, password, revision_range, start_date, end_date))
+        thread = threading.Thread(target=run_task, args=(svn_log_task, branch_url, username, password, revision_range, start_date, end_date))
     
     thread.start()
     
@@ -1839,33 +112,106 @@ def start_analysis():
 
 @app.route('/api/status')
 def get_status():
-    global task_status, analysis_results
-    
+    # 优先读取共享状态（任务可能运行在其他worker上），读取失败时退回本进程状态
+    try:
+        status = svn_stats.state_store.get('task_status') or svn_stats.task_status
+    except Exception as e:
+        print(f"[{datetime.now()}] API GET /api/status - 读取共享任务状态失败: {e}")
+        status = svn_stats.task_status
+
+    # 执行明细：本进程为 ExecutionLog，共享存储中为其序列化结果；since 为前端已获取的最大序号
+    details = status['execution_details']
+    if isinstance(details, ExecutionLog):
+        details = details.to_dict()
+    since = request.args.get('since', 0, type=int)
+
     response = {
-        'running': task_status['running'],
-        'progress': task_status['progress'],
-        'message': task_status['message'],
-        'completed': task_status['completed'],
-        'error': task_status['error'],
-        'execution_details': task_status['execution_details']
+        'running': status['running'],
+        'progress': status['progress'],
+        'message': status['message'],
+        'completed': status['completed'],
+        'error': status['error'],
+        'execution_details': entries_since(details, since),
+        'execution_counters': details.get('counters', {})
     }
-    
-    if task_status['completed']:
-        response['results'] = analysis_results
+
+    # 执行任务的worker已退出
+    if status['running'] and _task_slot_free(status):
+        response['running'] = False
+        response['error'] = '任务所在的进程已退出，请重新开始分析'
+
+    if status['completed']:
+        try:
+            response['results'] = svn_stats.state_store.get('analysis_results', svn_stats.analysis_results)
+        except Exception as e:
+            print(f"[{datetime.now()}] API GET /api/status - 读取共享分析结果失败: {e}")
+            response['results'] = svn_stats.analysis_results
     
     return jsonify(response)
 
+@app.route('/api/ready')
+def get_ready():
+    # 就绪检查：配置已加载且缓存预热完成时返回200，否则返回503
+    ready = svn_stats.startup_status['config_loaded'] and svn_stats.startup_status['cache_ready']
+    response = dict(svn_stats.startup_status)
+    response['ready'] = ready
+    return jsonify(response), 200 if ready else 503
+
+@app.route('/api/metrics')
+def get_metrics():
+    # Prometheus文本格式的运行指标
+    return Response(svn_metrics.REGISTRY.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+@app.route('/api/modules')
+def get_modules():
+    # 目录/模块汇总：prefix 为路径前缀，depth 为向下展开的层数，limit 为每层最多返回的条数
+    prefix = request.args.get('prefix', '/')
+    depth = max(0, min(request.args.get('depth', 1, type=int), 20))
+    limit = max(0, request.args.get('limit', 0, type=int))
+
+    result = get_analysis_trie().query(prefix, depth, limit)
+    if result is None:
+        return jsonify({'success': False, 'message': f'路径不存在: {prefix}'}), 404
+    return jsonify(result)
+
 @app.route('/api/results', methods=['POST'])
 def get_results():
-    global analysis_results
-
     data = request.json
     startDate = (data.get('startDate') or '').strip() or None
     endDate = (data.get('endDate') or '').strip() or None
 
-    get_log(startDate, endDate)
+    filters = parse_filters(data)
+    chart_options = parse_chart_options(data)
+
+    # 使用本次请求的结果，避免并发请求之间互相覆盖；同一查询有快照时直接返回，过期时在后台刷新
+    results = get_results_snapshot(startDate, endDate, filters, chart_options, refresh=bool(data.get('refresh')))
+
+    return jsonify(results)
+
+@app.route('/api/export/<dataset>')
+def export_results(dataset):
+    # 流式导出：dataset 为 commits/files/daily，format 为 csv/jsonl/parquet，筛选参数与 /api/results 相同
+    fmt = request.args.get('format', 'csv')
+    startDate = (request.args.get('startDate') or '').strip() or None
+    endDate = (request.args.get('endDate') or '').strip() or None
+    filters = parse_filters(request.args)
+    print(f"[{datetime.now()}] API GET /api/export/{dataset} - 格式: {fmt}, 日期范围: {startDate} 到 {endDate}, 筛选: {filters}")
+
+    if dataset not in svn_export.COLUMNS:
+        return jsonify({'success': False, 'message': f'不支持的数据集: {dataset}'}), 404
+    if fmt not in svn_export.available_formats():
+        return jsonify({'success': False, 'message': f'不支持的导出格式: {fmt}',
+                        'formats': svn_export.available_formats()}), 400
+
+    chunks = svn_export.export(dataset, iter_export_commits(startDate, endDate, filters), fmt)
+    return Response(chunks, mimetype=svn_export.FORMATS[fmt],
+                    headers={'Content-Disposition': f'attachment; filename=svn_{dataset}.{fmt}'})
 
-    return jsonify(analysis_results)
+# 记录模块导入耗时
+svn_stats.startup_status['import_seconds'] = time.perf_counter() - _import_started
+svn_stats.STARTUP_SECONDS.set(svn_stats.startup_status['import_seconds'], phase='import')
+print(f"[{datetime.now()}] LOAD - 模块导入完成，耗时 {svn_stats.startup_status['import_seconds']:.3f}s，配置和缓存将在首次请求时加载")
 
 if __name__ == '__main__':
+    ensure_initialized()
     app.run(debug=True, host='0.0.0.0', port=5000)
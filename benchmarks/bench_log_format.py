@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+年份日志存储格式基准测试
+
+在同一份合成日志上分别以 xml 和 jsonl.gz 格式写入年份日志，对比磁盘占用、全量写入、
+增量写入（只包含最新版本的日志）、全量解析、7天范围解析和按作者筛选的耗时，
+以及把XML年份日志迁移为 jsonl.gz 的耗时。
+
+用法:
+    python benchmarks/bench_log_format.py --revisions 20000 --days 1000
+    python benchmarks/bench_log_format.py --revisions 20000 --output log_format.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import types
+import xml.etree.ElementTree as ET
+
+from run_benchmark import FAKE_SVN_DIR, StageRunner, setup_app
+from synthetic import generate_dataset
+
+FORMATS = ('xml', 'jsonl.gz')
+
+
+def split_log(stdout, newest):
+    """
+    将 svn log 输出拆分为较早的版本和最新的 newest 个版本（输出按版本号降序）
+    :return: (较早版本的日志结果, 最新版本的日志结果)
+    """
+    root = ET.fromstring(stdout)
+    entries = root.findall('logentry')
+    parts = []
+    for chunk in (entries[newest:], entries[:newest]):
+        part = ET.Element('log')
+        part.extend(chunk)
+        parts.append(types.SimpleNamespace(stdout=ET.tostring(part, encoding='unicode')))
+    return parts
+
+
+def logs_size(logs_dir, log_format):
+    """
+    指定格式的年份日志（XML包括其索引文件）占用的字节数
+    """
+    suffixes = ('.log', '.idx.json') if log_format == 'xml' else ('.jsonl.gz',)
+    return sum(os.path.getsize(os.path.join(logs_dir, name)) for name in os.listdir(logs_dir)
+               if name.startswith('svn_') and name.endswith(suffixes))
+
+
+def clear_logs(logs_dir):
+    for name in os.listdir(logs_dir):
+        os.remove(os.path.join(logs_dir, name))
+
+
+def run(args):
+    work_dir = tempfile.mkdtemp(prefix='svn-stat-logfmt-')
+    data_dir = os.path.join(work_dir, 'data')
+    call_log = os.path.join(work_dir, 'svn_calls.log')
+    try:
+        print(f"生成合成数据集: {args.revisions} 个版本 -> {data_dir}", file=sys.stderr)
+        meta = generate_dataset(data_dir, revisions=args.revisions, days=args.days, seed=args.seed)
+        os.environ['PATH'] = FAKE_SVN_DIR + os.pathsep + os.environ.get('PATH', '')
+        os.environ['SVN_BENCH_DATA'] = data_dir
+        os.environ['SVN_BENCH_CALL_LOG'] = call_log
+
+        svnapp = setup_app(work_dir, meta)
+        logs_dir = os.path.join(work_dir, 'logs')
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            log_result = svnapp.get_svn_log(meta['repos_root'])
+        older, newest = split_log(log_result.stdout, args.append_revisions)
+        revisions = meta['revisions']
+
+        # 查询范围：中间一周和一个常见作者
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            svnapp.config['log_format'] = 'xml'
+            svnapp.write_svn_log([log_result])
+            commits = svnapp.parse_svn_log(meta['start_date'], meta['end_date'])
+        week_start = commits[len(commits) // 2]['date'][:10]
+        week_end = (svnapp.datetime.fromisoformat(week_start) + svnapp.timedelta(days=6)).strftime('%Y-%m-%d')
+        author = commits[0]['author']
+
+        report = {'params': {'revisions': revisions, 'days': args.days, 'append_revisions': args.append_revisions,
+                             'seed': args.seed}, 'formats': {}}
+        for log_format in FORMATS:
+            print(f"\n[{log_format}]", file=sys.stderr)
+            clear_logs(logs_dir)
+            svnapp.config['log_format'] = log_format
+            runner = StageRunner(call_log, trace_memory=False)
+
+            runner.run('write_svn_log', lambda: svnapp.write_svn_log([older]), items=revisions - args.append_revisions)
+            runner.run('write_svn_log_append', lambda: svnapp.write_svn_log([newest]), items=args.append_revisions)
+            size = logs_size(logs_dir, log_format)
+            runner.run('parse_svn_log', lambda: svnapp.parse_svn_log(meta['start_date'], meta['end_date']), items=len)
+            runner.run('parse_svn_log_7d', lambda: svnapp.parse_svn_log(week_start, week_end), items=len)
+            runner.run('parse_svn_log_author',
+                       lambda: svnapp.parse_svn_log(meta['start_date'], meta['end_date'], {'authors': [author]}),
+                       items=len)
+            print(f"  {'disk':<28} {size / 1048576:>9.2f} MB", file=sys.stderr)
+            report['formats'][log_format] = {'disk_bytes': size, 'stages': runner.stages}
+
+        # 迁移：由XML年份日志生成 jsonl.gz
+        clear_logs(logs_dir)
+        svnapp.config['log_format'] = 'xml'
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            svnapp.write_svn_log([log_result])
+        runner = StageRunner(call_log, trace_memory=False)
+        runner.run('migrate_xml_to_jsonl', lambda: svnapp.log_store.migrate(logs_dir, 'jsonl.gz'), items=revisions)
+        report['migrate'] = runner.stages['migrate_xml_to_jsonl']
+
+        xml, jsonl = report['formats']['xml'], report['formats']['jsonl.gz']
+        print(f"\n对比 jsonl.gz / xml:", file=sys.stderr)
+        print(f"  {'disk':<28} {jsonl['disk_bytes'] / xml['disk_bytes']:>9.2f}x", file=sys.stderr)
+        for name, stage in jsonl['stages'].items():
+            base = xml['stages'][name]['seconds']
+            print(f"  {name:<28} {stage['seconds'] / base if base else 0:>9.2f}x", file=sys.stderr)
+        return report
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='年份日志存储格式基准测试（xml 与 jsonl.gz）')
+    parser.add_argument('--revisions', type=int, default=10000, help='合成版本数量')
+    parser.add_argument('--days', type=int, default=730, help='版本分布的天数跨度')
+    parser.add_argument('--append-revisions', type=int, default=50, help='增量写入的最新版本数')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    parser.add_argument('--output', help='将报告写入JSON文件')
+    args = parser.parse_args()
+
+    report = run(args)
+    report['timestamp'] = time.strftime('%Y-%m-%d %H:%M:%S')
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"报告已写入: {args.output}", file=sys.stderr)
+    else:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,259 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+SVN统计工具基准测试
+
+使用 synthetic.py 生成的合成数据集和 fake_svn/svn 替身，在无需真实SVN服务器的情况下
+对主要处理阶段计时，输出每个阶段的耗时、吞吐量和峰值内存，便于在不同提交之间对比。
+
+用法:
+    python benchmarks/run_benchmark.py --revisions 2000 --output bench.json
+    python benchmarks/run_benchmark.py --revisions 2000 --compare bench.json
+"""
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+FAKE_SVN_DIR = os.path.join(BENCH_DIR, 'fake_svn')
+
+sys.path.insert(0, BENCH_DIR)
+
+from synthetic import generate_dataset  # noqa: E402
+
+
+class StageRunner:
+    """
+    逐阶段执行并记录耗时、吞吐量、峰值内存和svn调用次数
+    """
+
+    def __init__(self, call_log, trace_memory=True, quiet=True):
+        self.call_log = call_log
+        self.trace_memory = trace_memory
+        self.quiet = quiet
+        self.stages = {}
+
+    def _svn_calls(self):
+        if not os.path.exists(self.call_log):
+            return 0
+        with open(self.call_log, 'r', encoding='utf-8') as f:
+            return sum(1 for _ in f)
+
+    def run(self, name, fn, items=None, nbytes=None):
+        """
+        执行一个阶段
+        :param name: 阶段名称
+        :param fn: 无参可调用对象
+        :param items: 本阶段处理的条目数（版本数），用于计算吞吐量
+        :param nbytes: 本阶段处理的字节数，用于计算MB/s
+        :return: fn 的返回值
+        """
+        gc.collect()
+        calls_before = self._svn_calls()
+        if self.trace_memory:
+            tracemalloc.start()
+        with open(os.devnull, 'w') as devnull:
+            redirect = contextlib.redirect_stdout(devnull) if self.quiet else contextlib.nullcontext()
+            with redirect:
+                start = time.perf_counter()
+                result = fn()
+                elapsed = time.perf_counter() - start
+        peak = 0
+        if self.trace_memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+        if callable(items):
+            items = items(result)
+        stage = {
+            'seconds': round(elapsed, 4),
+            'items': items,
+            'items_per_sec': round(items / elapsed, 1) if items and elapsed > 0 else None,
+            'mb_per_sec': round(nbytes / 1048576 / elapsed, 2) if nbytes and elapsed > 0 else None,
+            'peak_mb': round(peak / 1048576, 2) if self.trace_memory else None,
+            'svn_calls': self._svn_calls() - calls_before,
+        }
+        self.stages[name] = stage
+        print(f"  {name:<28} {stage['seconds']:>9.3f}s  "
+              f"{(stage['items_per_sec'] or 0):>10.1f} rev/s  "
+              f"{(stage['peak_mb'] or 0):>8.2f} MB peak  "
+              f"{stage['svn_calls']:>6} svn calls", file=sys.stderr)
+        return result
+
+
+def setup_app(work_dir, meta):
+    """
+    导入svn_stats并将其日志目录、缓存文件和配置重定向到临时工作目录
+    """
+    sys.path.insert(0, REPO_ROOT)
+    os.makedirs(os.path.join(work_dir, 'logs'), exist_ok=True)
+    os.makedirs(os.path.join(work_dir, 'cache'), exist_ok=True)
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        import svn_stats as svnapp
+        # 预热线程会读取共享状态中的仓库信息，须在初始化之前重定向，避免在仓库目录下创建 cache/state.db
+        svnapp.state_store = svnapp.StateStore(os.path.join(work_dir, 'cache', 'state.db'))
+        svnapp.ensure_initialized()
+
+    svnapp.ROOT_PATH = work_dir
+    svnapp.CACHE_FILE = os.path.join(work_dir, 'cache', 'svn_cache.json')
+    svnapp.cache_store = svnapp.svn_cache.ShardedCache(os.path.join(work_dir, 'cache'), config=svnapp.config)
+    svnapp.aggregate_store = svnapp.AggregateStore(os.path.join(work_dir, 'cache'))
+    svnapp.snapshot_store = svnapp.result_snapshots.SnapshotStore(os.path.join(work_dir, 'cache'), config=svnapp.config)
+    svnapp.config['svn_base_url'] = meta['repos_root']
+    svnapp.config['svn_username'] = ''
+    svnapp.config['svn_password'] = ''
+    return svnapp
+
+
+def run(args):
+    work_dir = tempfile.mkdtemp(prefix='svn-stat-bench-')
+    data_dir = os.path.join(work_dir, 'data')
+    call_log = os.path.join(work_dir, 'svn_calls.log')
+    try:
+        print(f"生成合成数据集: {args.revisions} 个版本 -> {data_dir}", file=sys.stderr)
+        meta = generate_dataset(data_dir, revisions=args.revisions, days=args.days, authors=args.authors,
+                                files_per_commit=args.files_per_commit, lines_per_file=args.lines_per_file,
+                                copy_ratio=args.copy_ratio, seed=args.seed)
+
+        os.environ['PATH'] = FAKE_SVN_DIR + os.pathsep + os.environ.get('PATH', '')
+        os.environ['SVN_BENCH_DATA'] = data_dir
+        os.environ['SVN_BENCH_CALL_LOG'] = call_log
+        if args.latency_ms:
+            os.environ['SVN_BENCH_LATENCY_MS'] = str(args.latency_ms)
+
+        svnapp = setup_app(work_dir, meta)
+        if args.concurrency:
+            svnapp.config['svn_max_concurrency'] = args.concurrency
+            svnapp.configure_svn_concurrency()
+        runner = StageRunner(call_log, trace_memory=not args.no_memory, quiet=not args.verbose)
+        revisions = meta['revisions']
+
+        log_result = runner.run('svn_log', lambda: svnapp.get_svn_log(meta['repos_root']),
+                                items=revisions, nbytes=meta['log_bytes'])
+        runner.run('write_svn_log', lambda: svnapp.write_svn_log([log_result]),
+                   items=revisions, nbytes=meta['log_bytes'])
+        commits = runner.run('parse_svn_log', lambda: svnapp.parse_svn_log(meta['start_date'], meta['end_date']),
+                             items=len, nbytes=meta['log_bytes'])
+
+        # 7天范围查询，用于观察日期范围下推的效果
+        week_start = commits[len(commits) // 2]['date'][:10]
+        week_end = svnapp.datetime.fromisoformat(week_start) + svnapp.timedelta(days=6)
+        runner.run('parse_svn_log_7d',
+                   lambda: svnapp.parse_svn_log(week_start, week_end.strftime('%Y-%m-%d')), items=len)
+
+        sample = commits[:args.diff_revisions] if args.diff_revisions else commits
+
+        def diff_all():
+            # 与分析任务相同的并发获取（并发数受 svn_max_concurrency 和自适应并发限制约束）
+            svnapp.analyze_revisions(sample, '', '')
+
+        runner.run('get_svn_diff_cold', diff_all, items=len(sample))
+        runner.run('get_svn_diff_warm', diff_all, items=len(sample))
+
+        def gen_results():
+            svnapp.gen_analysis_results(commits, meta['start_date'], meta['end_date'], '')
+
+        # 首次生成时全量计算汇总状态，再次生成时只同步变化的版本
+        runner.run('gen_analysis_results', gen_results, items=len(commits))
+        runner.run('gen_analysis_results_warm', gen_results, items=len(commits))
+
+        stats = (svnapp.get_monthly_stats(commits), svnapp.get_author_stats(commits),
+                 svnapp.get_branch_stats(commits), svnapp.get_daily_stats(commits))
+        runner.run('prepare_chart_data', lambda: svnapp.prepare_chart_data(*stats), items=len(commits))
+
+        return {
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'params': {
+                'revisions': args.revisions,
+                'days': args.days,
+                'authors': args.authors,
+                'files_per_commit': args.files_per_commit,
+                'lines_per_file': args.lines_per_file,
+                'copy_ratio': args.copy_ratio,
+                'diff_revisions': len(sample),
+                'latency_ms': args.latency_ms,
+                'concurrency': svnapp.config.get('svn_max_concurrency'),
+                'seed': args.seed,
+                'trace_memory': not args.no_memory,
+            },
+            'dataset': meta,
+            'stages': runner.stages,
+        }
+    finally:
+        if args.keep:
+            print(f"保留工作目录: {work_dir}", file=sys.stderr)
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                              capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def compare(report, baseline):
+    """
+    打印与基线报告的逐阶段对比
+    """
+    print(f"\n对比基线 {baseline.get('commit')} -> 当前 {report.get('commit')}", file=sys.stderr)
+    print(f"  {'stage':<28} {'baseline':>10} {'current':>10} {'delta':>9} {'peak MB':>17}", file=sys.stderr)
+    for name, stage in report['stages'].items():
+        base = baseline.get('stages', {}).get(name)
+        if not base:
+            print(f"  {name:<28} {'-':>10} {stage['seconds']:>9.3f}s", file=sys.stderr)
+            continue
+        delta = (stage['seconds'] - base['seconds']) / base['seconds'] * 100 if base['seconds'] else 0.0
+        print(f"  {name:<28} {base['seconds']:>9.3f}s {stage['seconds']:>9.3f}s {delta:>+8.1f}% "
+              f"{(base.get('peak_mb') or 0):>8.2f}->{(stage.get('peak_mb') or 0):<8.2f}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SVN统计工具基准测试（合成数据 + fake svn）')
+    parser.add_argument('--revisions', type=int, default=1000, help='合成版本数量')
+    parser.add_argument('--days', type=int, default=365, help='版本分布的天数跨度')
+    parser.add_argument('--authors', type=int, default=20, help='作者数量')
+    parser.add_argument('--files-per-commit', type=int, default=5, help='每个版本平均修改文件数')
+    parser.add_argument('--lines-per-file', type=int, default=40, help='每个文件平均变更行数')
+    parser.add_argument('--copy-ratio', type=float, default=0.01, help='分支/标签复制版本比例')
+    parser.add_argument('--diff-revisions', type=int, default=200,
+                        help='get_svn_diff 阶段分析的版本数（0表示全部）')
+    parser.add_argument('--latency-ms', type=float, default=0, help='每次svn调用模拟的网络延迟（毫秒）')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    parser.add_argument('--concurrency', type=int, help='svn调用并发硬上限（默认使用配置 svn_max_concurrency）')
+    parser.add_argument('--no-memory', action='store_true', help='不使用tracemalloc统计峰值内存（计时更准确）')
+    parser.add_argument('--output', help='将报告写入JSON文件')
+    parser.add_argument('--compare', help='与之前保存的JSON报告对比')
+    parser.add_argument('--keep', action='store_true', help='保留临时工作目录')
+    parser.add_argument('--verbose', action='store_true', help='显示应用自身的输出')
+    args = parser.parse_args()
+
+    report = run(args)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"报告已写入: {args.output}", file=sys.stderr)
+    else:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare(report, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+合成SVN数据生成器
+
+生成与真实 `svn log --xml --verbose` 及 `svn diff -c` 输出格式一致的数据，
+供基准测试和 fake_svn/svn 回放使用。所有数据由随机种子决定，同一组参数
+在不同提交之间生成完全相同的数据集，保证结果可对比。
+"""
+import json
+import os
+import random
+from datetime import datetime, timedelta
+
+# 数据集文件名
+LOG_FILE_NAME = 'log.xml'
+DIFF_DIR_NAME = 'diffs'
+META_FILE_NAME = 'meta.json'
+
+# 提交信息样例（包含需要转义的字符）
+MESSAGES = [
+    '修复订单查询分页问题',
+    'feat: 新增导出功能 & 优化查询',
+    'refactor <service> 层代码',
+    '合并主干代码',
+    'fix NPE when "status" is null',
+    '调整配置文件',
+]
+
+
+def escape(text):
+    """
+    XML文本转义（避免引入 xml.sax.saxutils，保持 fake svn 启动开销最小）
+    """
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def _module_paths(rng, modules, files_per_module):
+    """
+    为每个模块生成固定的源文件列表
+    :return: {模块名: [相对路径, ...]}
+    """
+    paths = {}
+    for m in range(modules):
+        module = f'module{m:02d}'
+        files = []
+        for f in range(files_per_module):
+            package = f'pkg{rng.randint(0, 9)}'
+            if rng.random() < 0.8:
+                files.append(f'{module}/src/main/java/com/example/{package}/Class{f:04d}.java')
+            else:
+                files.append(f'{module}/src/main/resources/com/example/{package}/config{f:04d}.xml')
+        paths[module] = files
+    return paths
+
+
+def generate_dataset(out_dir, revisions=1000, start_revision=100000, start_date='2023-01-01',
+                     days=365, authors=20, branches=3, modules=8, files_per_module=200,
+                     files_per_commit=5, lines_per_file=40, copy_ratio=0.01, seed=42):
+    """
+    生成合成数据集并写入目录
+    :param out_dir: 输出目录
+    :param revisions: 版本数量
+    :param start_revision: 起始版本号
+    :param start_date: 第一个版本的日期，格式 'YYYY-MM-DD'
+    :param days: 版本分布的天数跨度
+    :param authors: 作者数量
+    :param branches: 除trunk外的分支数量
+    :param modules: 模块数量
+    :param files_per_module: 每个模块的文件数
+    :param files_per_commit: 每个版本平均修改的文件数
+    :param lines_per_file: 每个文件平均变更行数
+    :param copy_ratio: 分支/标签复制版本的比例
+    :param seed: 随机种子
+    :return: 数据集元信息字典
+    """
+    rng = random.Random(seed)
+    os.makedirs(os.path.join(out_dir, DIFF_DIR_NAME), exist_ok=True)
+
+    author_names = [f'dev{a:03d}' for a in range(authors)]
+    branch_roots = ['/trunk'] + [f'/branches/release-{b + 1}.0' for b in range(branches)]
+    module_paths = _module_paths(rng, modules, files_per_module)
+    module_names = sorted(module_paths.keys())
+
+    first_time = datetime.fromisoformat(start_date)
+    span_seconds = days * 86400
+    step = span_seconds / max(revisions, 1)
+
+    log_bytes = 0
+    diff_bytes = 0
+    total_paths = 0
+    with open(os.path.join(out_dir, LOG_FILE_NAME), 'w', encoding='utf-8') as log_f:
+        log_f.write('<?xml version="1.0" encoding="UTF-8"?>\n<log>\n')
+        for i in range(revisions):
+            revision = start_revision + i
+            commit_time = first_time + timedelta(seconds=int(i * step + rng.random() * step))
+            author = author_names[min(int(rng.paretovariate(1.2)) - 1, authors - 1)]
+            branch_root = branch_roots[0] if rng.random() < 0.7 else rng.choice(branch_roots)
+            module = rng.choice(module_names)
+
+            path_entries = []
+            diff_blocks = []
+            if rng.random() < copy_ratio:
+                # 创建分支/标签：一个带copyfrom的目录新增，diff为整棵模块树
+                target = f'/tags/{module}-{revision}'
+                path_entries.append(
+                    f'<path\n   copyfrom-path="{branch_root}/{module}"\n   copyfrom-rev="{revision - 1}"\n'
+                    f'   kind="dir"\n   action="A"\n   prop-mods="false"\n   text-mods="false">{target}</path>')
+                for rel in module_paths[module]:
+                    diff_blocks.append(_diff_block(rng, f'{target[1:]}/{rel[len(module) + 1:]}', revision,
+                                                   added=lines_per_file * 2, deleted=0))
+            else:
+                count = max(1, int(rng.expovariate(1.0 / files_per_commit)))
+                chosen = rng.sample(module_paths[module], min(count, len(module_paths[module])))
+                for rel in chosen:
+                    action = 'M' if rng.random() < 0.85 else rng.choice('AD')
+                    full = f'{branch_root}/{rel}'
+                    path_entries.append(
+                        f'<path\n   prop-mods="false"\n   text-mods="true"\n   kind="file"\n'
+                        f'   action="{action}">{full}</path>')
+                    added = 0 if action == 'D' else max(1, int(rng.expovariate(1.0 / lines_per_file)))
+                    deleted = 0 if action == 'A' else max(0, int(rng.expovariate(2.0 / lines_per_file)))
+                    diff_blocks.append(_diff_block(rng, full[1:], revision, added, deleted))
+            total_paths += len(path_entries)
+
+            entry = (
+                f'<logentry\n   revision="{revision}">\n'
+                f'<author>{author}</author>\n'
+                f'<date>{commit_time.strftime("%Y-%m-%dT%H:%M:%S")}.{rng.randint(0, 999999):06d}Z</date>\n'
+                f'<paths>\n' + '\n'.join(path_entries) + '\n</paths>\n'
+                f'<msg>{escape(rng.choice(MESSAGES))}</msg>\n'
+                f'</logentry>\n'
+            )
+            log_f.write(entry)
+            log_bytes += len(entry.encode('utf-8'))
+
+            diff_text = ''.join(diff_blocks)
+            with open(os.path.join(out_dir, DIFF_DIR_NAME, f'{revision}.diff'), 'w', encoding='utf-8') as diff_f:
+                diff_f.write(diff_text)
+            diff_bytes += len(diff_text.encode('utf-8'))
+        log_f.write('</log>\n')
+
+    meta = {
+        'revisions': revisions,
+        'first_revision': start_revision,
+        'last_revision': start_revision + revisions - 1,
+        'start_date': start_date,
+        'end_date': (first_time + timedelta(days=days)).strftime('%Y-%m-%d'),
+        'total_paths': total_paths,
+        'log_bytes': log_bytes,
+        'diff_bytes': diff_bytes,
+        'repos_root': 'http://svn.bench.local/repo',
+        'uuid': '00000000-0000-4000-8000-%012d' % seed,
+        'seed': seed,
+    }
+    with open(os.path.join(out_dir, META_FILE_NAME), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+def _diff_block(rng, path, revision, added, deleted):
+    """
+    生成单个文件的unified diff块，格式与 `svn diff` 输出一致
+    """
+    lines = [
+        f'Index: {path}\n',
+        '===================================================================\n',
+        f'--- {path}\t(revision {revision - 1})\n',
+        f'+++ {path}\t(revision {revision})\n',
+        f'@@ -1,{deleted + 3} +1,{added + 3} @@\n',
+        ' package com.example;\n',
+    ]
+    for n in range(deleted):
+        lines.append(f'-    int removed{n} = {rng.randint(0, 9999)};\n')
+    for n in range(added):
+        lines.append(f'+    int added{n} = {rng.randint(0, 9999)}; // 新增\n')
+    lines.append(' \n')
+    lines.append(' }\n')
+    return ''.join(lines)
+
+
+def file_content(path, revision):
+    """
+    生成 `svn cat` 返回的文件内容（由路径和版本号决定）
+    """
+    size = 20 + (sum(path.encode('utf-8')) + int(revision)) % 200
+    return ''.join(f'// {path}@{revision} line {n}\n' for n in range(size))
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='生成合成SVN数据集')
+    parser.add_argument('out_dir', help='输出目录')
+    parser.add_argument('--revisions', type=int, default=1000)
+    parser.add_argument('--files-per-commit', type=int, default=5)
+    parser.add_argument('--lines-per-file', type=int, default=40)
+    parser.add_argument('--authors', type=int, default=20)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print(json.dumps(generate_dataset(args.out_dir, revisions=args.revisions,
+                                      files_per_commit=args.files_per_commit,
+                                      lines_per_file=args.lines_per_file,
+                                      authors=args.authors, days=args.days,
+                                      seed=args.seed), indent=2))
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+每日序列降采样
+
+时间跨度较长时，每日图表的点数（天数 x 作者数）会让浏览器渲染卡顿。按请求的最大点数
+自动选择分辨率：天数不超过上限时保持按天；否则依次尝试按周、按月汇总（点的值为该周/月的合计）；
+按月仍超过上限时，在月度合计上用 LTTB（Largest-Triangle-Three-Buckets）选出保持曲线形状的点。
+
+所有序列共用同一组横轴标签，LTTB 按所有序列之和选点，各序列取相同的点。
+"""
+from datetime import date, timedelta
+
+RESOLUTIONS = ('day', 'week', 'month')
+# LTTB 至少保留首尾和中间一个点
+MIN_LTTB_POINTS = 3
+
+
+def bucket_key(day, resolution):
+    """
+    日期所属的时间桶标签：按周为该周周一的日期，按月为 YYYY-MM
+    :param day: 'YYYY-MM-DD'
+    """
+    if resolution == 'month':
+        return day[:7]
+    if resolution == 'week':
+        value = date.fromisoformat(day[:10])
+        return (value - timedelta(days=value.weekday())).isoformat()
+    return day
+
+
+def bucket_series(days, series, resolution):
+    """
+    将按天的序列按时间桶求和
+    :param days: 升序的日期列表
+    :param series: 序列列表，每个序列与 days 等长
+    :return: (时间桶标签列表, 求和后的序列列表)
+    """
+    if resolution == 'day':
+        return list(days), [list(values) for values in series]
+    labels = []
+    positions = []
+    for day in days:
+        key = bucket_key(day, resolution)
+        if not labels or labels[-1] != key:
+            labels.append(key)
+        positions.append(len(labels) - 1)
+    result = []
+    for values in series:
+        sums = [0] * len(labels)
+        for position, value in zip(positions, values):
+            sums[position] += value
+        result.append(sums)
+    return labels, result
+
+
+def lttb_indices(xs, ys, threshold):
+    """
+    Largest-Triangle-Three-Buckets 选点
+    :param xs: 升序的横坐标
+    :param ys: 纵坐标
+    :param threshold: 保留的点数
+    :return: 选中点的下标列表（升序，包含首尾）
+    """
+    count = len(xs)
+    if threshold >= count or threshold < MIN_LTTB_POINTS:
+        return list(range(count))
+
+    selected = [0]
+    # 除首尾外的点均分为 threshold - 2 个桶，每个桶选出与前一选中点、后一桶均值构成最大三角形的点
+    every = (count - 2) / (threshold - 2)
+    previous = 0
+    for bucket in range(threshold - 2):
+        start = int(bucket * every) + 1
+        end = int((bucket + 1) * every) + 1
+        next_start = end
+        next_end = min(int((bucket + 2) * every) + 1, count)
+        if next_start >= next_end:
+            avg_x, avg_y = xs[count - 1], ys[count - 1]
+        else:
+            span = next_end - next_start
+            avg_x = sum(xs[next_start:next_end]) / span
+            avg_y = sum(ys[next_start:next_end]) / span
+
+        best, best_area = start, -1.0
+        px, py = xs[previous], ys[previous]
+        for index in range(start, min(end, count - 1)):
+            area = abs((px - avg_x) * (ys[index] - py) - (px - xs[index]) * (avg_y - py))
+            if area > best_area:
+                best, best_area = index, area
+        selected.append(best)
+        previous = best
+    selected.append(count - 1)
+    return selected
+
+
+def downsample_daily(days, series, max_points):
+    """
+    将每日序列降采样到不超过 max_points 个点
+    :param days: 升序的日期列表
+    :param series: 序列列表，每个序列与 days 等长
+    :param max_points: 最大点数，为0或None时不降采样
+    :return: (横轴标签列表, 降采样后的序列列表, 分辨率 day/week/month/lttb)
+    """
+    if not max_points or len(days) <= max_points:
+        return list(days), [list(values) for values in series], 'day'
+
+    labels, values = days, series
+    for resolution in RESOLUTIONS[1:]:
+        labels, values = bucket_series(days, series, resolution)
+        if len(labels) <= max_points:
+            return labels, values, resolution
+
+    # 按月仍超过上限：在月度合计上按所有序列之和选点
+    xs = [int(label[:4]) * 12 + int(label[5:7]) for label in labels]
+    totals = [sum(column) for column in zip(*values)] if values else [0] * len(labels)
+    indices = lttb_indices(xs, totals, max(max_points, MIN_LTTB_POINTS))
+    return ([labels[index] for index in indices],
+            [[row[index] for index in indices] for row in values], 'lttb')
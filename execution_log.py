@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+任务执行明细
+
+定长的按级别分区环形缓冲区：每条明细分配单调递增的序号，警告和错误全部保留
+（超出容量时淘汰最旧的），逐版本的调试明细按比例采样，并按级别累计计数。
+内存占用和 /api/status 的响应大小与任务规模无关，前端通过 since 参数增量获取。
+"""
+import heapq
+import threading
+from collections import deque
+
+# 各级别的保留策略：(最大保留条数, 采样间隔)，采样间隔为N表示每N条保留1条
+LEVEL_POLICY = {
+    'error': (500, 1),
+    'warning': (500, 1),
+    'success': (100, 1),
+    'info': (200, 1),
+    'debug': (100, 20),
+}
+# 未知级别按info处理
+DEFAULT_LEVEL = 'info'
+
+
+class ExecutionLog:
+    """
+    任务执行明细缓冲区，接口兼容原来的列表用法（append/迭代/len）
+    """
+
+    def __init__(self, policy=None):
+        """
+        :param policy: 级别保留策略，默认使用 LEVEL_POLICY
+        """
+        self.policy = dict(policy or LEVEL_POLICY)
+        self._buffers = {level: deque(maxlen=capacity) for level, (capacity, _) in self.policy.items()}
+        self._seen = {level: 0 for level in self.policy}
+        self._dropped = 0
+        self._evicted = 0
+        self._last_seq = 0
+        self._lock = threading.Lock()
+
+    def append(self, entry):
+        """
+        追加一条明细，分配序号后按级别策略决定是否保留
+        :param entry: {'timestamp', 'message', 'level'}
+        :return: 分配的序号
+        """
+        level = entry.get('level', DEFAULT_LEVEL)
+        if level not in self.policy:
+            level = DEFAULT_LEVEL
+        capacity, sample_every = self.policy[level]
+        with self._lock:
+            self._last_seq += 1
+            seen = self._seen[level]
+            self._seen[level] = seen + 1
+            if seen % sample_every:
+                self._dropped += 1
+                return self._last_seq
+            buffer = self._buffers[level]
+            if len(buffer) == capacity:
+                self._evicted += 1
+            buffer.append(dict(entry, seq=self._last_seq))
+            return self._last_seq
+
+    def entries(self, since=0):
+        """
+        按序号顺序返回保留的明细
+        :param since: 只返回序号大于该值的明细
+        """
+        with self._lock:
+            buffers = [list(buffer) for buffer in self._buffers.values()]
+        merged = heapq.merge(*buffers, key=lambda item: item['seq'])
+        return [item for item in merged if item['seq'] > since]
+
+    def counters(self):
+        """
+        返回累计计数：各级别总条数、采样丢弃数、超出容量淘汰数和最新序号
+        """
+        with self._lock:
+            return {
+                'levels': {level: count for level, count in self._seen.items() if count},
+                'dropped': self._dropped,
+                'evicted': self._evicted,
+                'last_seq': self._last_seq,
+            }
+
+    def to_dict(self):
+        """
+        序列化为可写入共享存储的字典
+        """
+        return {'entries': self.entries(), 'counters': self.counters()}
+
+    def __iter__(self):
+        return iter(self.entries())
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(buffer) for buffer in self._buffers.values())
+
+
+def entries_since(serialized, since=0):
+    """
+    从 to_dict() 的结果中取序号大于since的明细
+    """
+    return [item for item in serialized.get('entries', []) if item['seq'] > since]
@@ -0,0 +1,313 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+年份日志文件的日期索引和倒排索引
+
+每个 logs/svn_YYYY.log 旁边保存一个 svn_YYYY.idx.json，记录每个 logentry 的
+(版本号, 日期, 字节偏移, 长度)。按日期范围查询时先在索引中二分查找，只读取并解析
+范围内条目对应的字节片段，不再解析整年的XML。
+
+同时保存作者、分支、路径前缀（前 PATH_INDEX_DEPTH 级目录）和文件扩展名到条目序号的
+倒排索引，按这些条件筛选时只读取命中的条目。
+
+索引在写入年份日志时生成；日志文件的大小或修改时间与索引记录不一致时自动重建。
+"""
+import bisect
+import json
+import os
+import re
+import threading
+import xml.etree.ElementTree as ET
+
+INDEX_VERSION = 2
+INDEX_SUFFIX = '.idx.json'
+# 路径前缀倒排索引的最大目录层级，更深的前缀先按该层级筛选再逐条校验
+PATH_INDEX_DEPTH = 3
+# 支持的筛选条件（倒排索引名称）
+FILTER_FIELDS = ('authors', 'branches', 'paths', 'extensions')
+
+_ENTRY_START = b'<logentry'
+_ENTRY_END = b'</logentry>'
+_DATE_PATTERN = re.compile(rb'<date>(\d{4}-\d{2}-\d{2})')
+_REVISION_PATTERN = re.compile(rb'revision="(\d+)"')
+_AUTHOR_PATTERN = re.compile(rb'<author>(.*?)</author>', re.DOTALL)
+_PATH_PATTERN = re.compile(rb'<path\b[^>]*>(.*?)</path>', re.DOTALL)
+
+# 进程内已加载的索引: {索引文件路径: ((日志大小, 修改时间), 索引)}
+_loaded = {}
+_loaded_lock = threading.Lock()
+
+
+def index_file_path(log_file):
+    """
+    获取日志文件对应的索引文件路径: svn_2024.log -> svn_2024.idx.json
+    """
+    base, _ = os.path.splitext(log_file)
+    return base + INDEX_SUFFIX
+
+
+def _file_state(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _unescape(raw):
+    text = raw.decode('utf-8', errors='replace')
+    if '&' in text:
+        text = (text.replace('&lt;', '<').replace('&gt;', '>').replace('&quot;', '"')
+                .replace('&apos;', "'").replace('&amp;', '&'))
+    return text
+
+
+def path_prefixes(path, depth=PATH_INDEX_DEPTH):
+    """
+    路径的前 depth 级前缀: '/trunk/a/b/c.java' -> ['/trunk', '/trunk/a', '/trunk/a/b']
+    """
+    parts = path.strip('/').split('/')
+    return ['/' + '/'.join(parts[:i]) for i in range(1, min(depth, len(parts)) + 1)]
+
+
+def path_matches(path, prefix):
+    """
+    路径是否位于前缀目录下（按目录边界匹配）：'/trunk/app' 匹配 '/trunk/app' 和 '/trunk/app/a.java'，
+    不匹配 '/trunk/application'
+    :param prefix: 规范化的前缀（'/' 开头、不以 '/' 结尾，'/' 表示所有路径）
+    """
+    return prefix == '/' or path == prefix or path.startswith(prefix + '/')
+
+
+def path_extension(path):
+    """
+    文件扩展名（小写，包含点），无扩展名时为空字符串
+    """
+    name = path.rsplit('/', 1)[-1]
+    return os.path.splitext(name)[1].lower()
+
+
+def build_log_index(log_file, branch_of=None):
+    """
+    扫描日志文件生成索引并写入索引文件（只做字节查找和正则匹配，不解析XML）
+    :param branch_of: 由文件路径得到分支名的函数，为None时不生成分支索引
+    :return: 索引字典
+    """
+    with open(log_file, 'rb') as f:
+        content = f.read()
+
+    entries = []
+    postings = {field: {} for field in FILTER_FIELDS}
+
+    def add(field, key, position):
+        keys = postings[field].setdefault(key, [])
+        if not keys or keys[-1] != position:
+            keys.append(position)
+
+    pos = content.find(_ENTRY_START)
+    while pos != -1:
+        end = content.find(_ENTRY_END, pos)
+        if end == -1:
+            break
+        end += len(_ENTRY_END)
+        chunk = content[pos:end]
+        revision = _REVISION_PATTERN.search(chunk)
+        date = _DATE_PATTERN.search(chunk)
+        author = _AUTHOR_PATTERN.search(chunk)
+        position = len(entries)
+        entries.append([int(revision.group(1)) if revision else 0,
+                        date.group(1).decode('ascii') if date else '',
+                        pos, end - pos])
+
+        add('authors', _unescape(author.group(1)) if author else 'unknown', position)
+        for match in _PATH_PATTERN.finditer(chunk):
+            path = _unescape(match.group(1))
+            if not path:
+                continue
+            for prefix in path_prefixes(path):
+                add('paths', prefix, position)
+            add('extensions', path_extension(path), position)
+            if branch_of is not None:
+                add('branches', branch_of(path), position)
+        pos = content.find(_ENTRY_START, end)
+
+    # 年份日志按版本号降序写入，日期通常同样单调不增，此时可以按日期二分查找
+    dates = [entry[1] for entry in entries]
+    size, mtime_ns = _file_state(log_file)
+    index = {
+        'version': INDEX_VERSION,
+        'log_size': size,
+        'log_mtime_ns': mtime_ns,
+        'monotonic': all(dates[i] >= dates[i + 1] for i in range(len(dates) - 1)),
+        'path_depth': PATH_INDEX_DEPTH,
+        'entries': entries,
+    }
+    index.update(postings)
+
+    tmp_file = f'{index_file_path(log_file)}.{os.getpid()}.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(index, f, separators=(',', ':'))
+    os.replace(tmp_file, index_file_path(log_file))
+    with _loaded_lock:
+        _loaded[index_file_path(log_file)] = ((size, mtime_ns), index)
+    return index
+
+
+def load_log_index(log_file, branch_of=None):
+    """
+    读取日志文件的索引，索引不存在、版本不符或与日志文件不一致时重建
+    日志文件未变化时复用进程内已加载的索引
+    :param branch_of: 重建索引时使用的分支提取函数
+    :return: 索引字典
+    """
+    index_file = index_file_path(log_file)
+    state = _file_state(log_file)
+    with _loaded_lock:
+        cached = _loaded.get(index_file)
+    if cached is not None and cached[0] == state:
+        return cached[1]
+    try:
+        with open(index_file, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        if (index.get('version') == INDEX_VERSION and index.get('log_size') == state[0]
+                and index.get('log_mtime_ns') == state[1]):
+            with _loaded_lock:
+                _loaded[index_file] = (state, index)
+            return index
+    except (OSError, ValueError):
+        pass
+    return build_log_index(log_file, branch_of)
+
+
+def select_positions(index, start_date=None, end_date=None):
+    """
+    选出日期在 [start_date, end_date] 内的条目序号（按文件中的顺序）
+    :param start_date: 开始日期 'YYYY-MM-DD'，None表示不限
+    :param end_date: 结束日期 'YYYY-MM-DD'，None表示不限
+    :return: 条目序号列表（或range）
+    """
+    entries = index['entries']
+    start_date = start_date[:10] if start_date else None
+    end_date = end_date[:10] if end_date else None
+    if not index.get('monotonic'):
+        return [position for position, entry in enumerate(entries)
+                if (start_date is None or entry[1] >= start_date) and (end_date is None or entry[1] <= end_date)]
+
+    # 日期降序排列：在取反的日期列表上二分，得到 [end_date, start_date] 的连续区间
+    # （bisect 的 key 参数需要 Python 3.10，这里对预先计算的列表二分）
+    keys = _date_keys(index)
+    lo = bisect.bisect_left(keys, _descending_key(end_date)) if end_date else 0
+    hi = bisect.bisect_right(keys, _descending_key(start_date)) if start_date else len(entries)
+    return range(lo, hi)
+
+
+def _date_keys(index):
+    """
+    各条目取反后的日期（升序），首次使用时计算并保存在内存中的索引上（不写入索引文件）
+    """
+    keys = index.get('_date_keys')
+    if keys is None:
+        keys = index['_date_keys'] = [_descending_key(entry[1]) for entry in index['entries']]
+    return keys
+
+
+def select_entries(index, start_date=None, end_date=None):
+    """
+    选出日期在 [start_date, end_date] 内的索引条目 [版本号, 日期, 偏移, 长度]
+    """
+    entries = index['entries']
+    return [entries[position] for position in select_positions(index, start_date, end_date)]
+
+
+def filter_positions(index, positions, filters):
+    """
+    用倒排索引筛选条目序号：不同条件之间取交集，同一条件的多个值取并集
+    :param positions: 候选条目序号（select_positions 的结果）
+    :param filters: {'authors': [...], 'branches': [...], 'paths': [...], 'extensions': [...]}
+    :return: 升序的条目序号列表
+    """
+    result = None
+    for field in FILTER_FIELDS:
+        values = filters.get(field)
+        if not values:
+            continue
+        postings = index.get(field, {})
+        matched = set()
+        for value in values:
+            for key in _posting_keys(index, field, value):
+                matched.update(postings.get(key, ()))
+        result = matched if result is None else result & matched
+        if not result:
+            return []
+
+    if result is None:
+        return list(positions)
+    if isinstance(positions, range):
+        return sorted(position for position in result if positions.start <= position < positions.stop)
+    return sorted(result.intersection(positions))
+
+
+def _posting_keys(index, field, value):
+    """
+    筛选值对应的倒排索引键；路径前缀按目录边界匹配，超过索引层级时使用截断到索引层级的键
+    （结果需要调用方逐条校验）
+    """
+    if field == 'extensions':
+        value = value.lower()
+        return [value if not value or value.startswith('.') else '.' + value]
+    if field != 'paths':
+        return [value]
+    parts = value.strip('/').split('/')
+    if parts == ['']:
+        # 根目录：所有第一级目录
+        return [key for key in index.get('paths', {}) if key.count('/') == 1]
+    return ['/' + '/'.join(parts[:index.get('path_depth', PATH_INDEX_DEPTH)])]
+
+
+def _descending_key(date):
+    # 'YYYY-MM-DD' 的数字取反，使降序的日期变为升序
+    return -int(date.replace('-', '')) if date else 0
+
+
+def read_entries(log_file, entries, contiguous=False):
+    """
+    只读取选中条目的字节片段并解析
+    :param entries: select_entries 的返回值
+    :param contiguous: 选中条目在文件中是否相邻（按日期二分得到的区间），相邻时整段读取和解析
+    :return: logentry 元素列表（与 entries 顺序相同）
+    """
+    if not entries:
+        return []
+    with open(log_file, 'rb') as f:
+        if contiguous:
+            first = min(entry[2] for entry in entries)
+            f.seek(first)
+            payload = f.read(max(entry[2] + entry[3] for entry in entries) - first)
+        else:
+            # 按作者、路径等筛选的条目在文件中分散，逐段读取选中的条目（相邻的条目合并为一次读取），
+            # 只解析选中的条目，不读取和解析条目之间未命中的内容
+            slices = {}
+            for start, end, run in _adjacent_runs(entries):
+                f.seek(start)
+                span = f.read(end - start)
+                for entry in run:
+                    slices[entry[2]] = span[entry[2] - start:entry[2] - start + entry[3]]
+            payload = b''.join(slices[entry[2]] for entry in entries)
+    root = ET.fromstring(b'<log>' + payload + b'</log>')
+    return root.findall('logentry')
+
+
+# 合并为一次读取的相邻条目之间的最大间隔（字节）
+_MERGE_GAP = 64
+
+
+def _adjacent_runs(entries):
+    """
+    按文件偏移排序后，将相邻的条目（间隔不超过 _MERGE_GAP 字节，即条目之间的换行）合并为一段
+    :return: [(起始偏移, 结束偏移, 条目列表)]
+    """
+    runs = []
+    for entry in sorted(entries, key=lambda entry: entry[2]):
+        if runs and 0 <= entry[2] - runs[-1][1] <= _MERGE_GAP:
+            runs[-1][1] = entry[2] + entry[3]
+            runs[-1][2].append(entry)
+        else:
+            runs.append([entry[2], entry[2] + entry[3], [entry]])
+    return runs
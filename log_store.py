@@ -0,0 +1,271 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+年份日志的压缩 JSON Lines 存储格式
+
+log_format: jsonl.gz 时年份日志保存为 logs/svn_YYYY.jsonl.gz，每个版本一行JSON记录。
+追加新版本时在文件末尾写入一个新的gzip成员，不需要读取和重写整个文件；读取时顺序解压扫描，
+先用正则从行首取出日期和版本号，日期范围外的行不做JSON解析。同一版本出现多次时以最后一行为准
+（版本属性修改后重新获取的日志）。
+
+记录与 `svn log --xml --verbose` 的 logentry 一一对应，可以与XML格式互相转换：
+    {"date": "2024-01-02T03:04:05.000000Z", "revision": 123, "author": "...",
+     "paths": [{"path": "/trunk/a.java", "action": "M", "kind": "file", ...}], "msg": "..."}
+
+迁移现有的XML年份日志（或转换回XML）：
+    python log_store.py migrate --logs-dir logs --to jsonl.gz
+"""
+import argparse
+import gzip
+import json
+import os
+import re
+import zlib
+import xml.etree.ElementTree as ET
+from datetime import datetime
+
+FORMATS = ('xml', 'jsonl.gz')
+# 各格式年份日志的文件名后缀: svn_YYYY.log / svn_YYYY.jsonl.gz
+SUFFIXES = {'xml': '.log', 'jsonl.gz': '.jsonl.gz'}
+# 追加频繁且以读取速度为主，使用中等压缩级别
+COMPRESS_LEVEL = 6
+
+# 记录以 date、revision 开头写入，扫描时不解析JSON即可取出
+_RECORD_HEAD = re.compile(rb'\{"date":"([^"]*)","revision":(\d+)')
+
+
+def log_file_name(year, log_format):
+    """
+    年份日志文件名: (2024, 'jsonl.gz') -> 'svn_2024.jsonl.gz'
+    """
+    return f'svn_{year}{SUFFIXES[log_format]}'
+
+
+def parse_log_file_name(filename):
+    """
+    从年份日志文件名中解析年份和格式
+    :return: (年份, 格式)，不是年份日志时为None
+    """
+    if not filename.startswith('svn_'):
+        return None
+    for log_format, suffix in SUFFIXES.items():
+        if filename.endswith(suffix):
+            try:
+                return int(filename[4:-len(suffix)]), log_format
+            except ValueError:
+                return None
+    return None
+
+
+def is_record_log(log_file):
+    """
+    是否为压缩 JSON Lines 格式的年份日志
+    """
+    return log_file.endswith(SUFFIXES['jsonl.gz'])
+
+
+def element_to_record(logentry):
+    """
+    logentry 元素 -> 记录字典
+    """
+    record = {'date': logentry.findtext('date') or '', 'revision': int(logentry.get('revision'))}
+    author = logentry.find('author')
+    if author is not None:
+        record['author'] = author.text
+    paths = []
+    for path in logentry.iterfind('paths/path'):
+        item = dict(path.attrib)
+        item['path'] = path.text
+        paths.append(item)
+    record['paths'] = paths
+    msg = logentry.findtext('msg')
+    if msg is not None:
+        record['msg'] = msg
+    return record
+
+
+def record_to_element(record):
+    """
+    记录字典 -> logentry 元素
+    """
+    logentry = ET.Element('logentry', revision=str(record['revision']))
+    if 'author' in record:
+        ET.SubElement(logentry, 'author').text = record['author']
+    ET.SubElement(logentry, 'date').text = record['date']
+    paths = ET.SubElement(logentry, 'paths')
+    for item in record.get('paths', ()):
+        path = ET.SubElement(paths, 'path', {name: value for name, value in item.items() if name != 'path'})
+        path.text = item.get('path')
+    if 'msg' in record:
+        ET.SubElement(logentry, 'msg').text = record['msg']
+    return logentry
+
+
+def encode_records(records):
+    """
+    将记录编码为 JSON Lines 字节串（date、revision 在前）
+    """
+    return b''.join(json.dumps({'date': record['date'], 'revision': record['revision'], **record},
+                               ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+                    for record in records)
+
+
+def write_records(log_file, records):
+    """
+    重写整个年份日志（先写临时文件再替换）
+    :param records: 记录列表，按版本号升序
+    """
+    tmp_file = f'{log_file}.{os.getpid()}.tmp'
+    with open(tmp_file, 'wb') as f:
+        f.write(gzip.compress(encode_records(records), COMPRESS_LEVEL))
+    os.replace(tmp_file, log_file)
+
+
+def append_records(log_file, records):
+    """
+    将记录作为一个新的gzip成员追加到年份日志末尾
+    """
+    if not records:
+        return
+    data = gzip.compress(encode_records(records), COMPRESS_LEVEL)
+    with open(log_file, 'ab') as f:
+        f.write(data)
+
+
+def filter_patterns(filters):
+    """
+    由筛选条件生成行内容的预筛选字节串：作者和路径前缀在记录中的JSON片段
+    预筛选只排除一定不满足条件的行，结果仍需逐条校验
+    :param filters: {'authors': [...], 'paths': [...]}（其他条件不做预筛选）
+    :return: 字节串列表的列表，每组中至少一个出现在行中
+    """
+    patterns = []
+    if filters.get('authors'):
+        patterns.append([b'"author":' + json.dumps(author, ensure_ascii=False).encode('utf-8')
+                         for author in filters['authors']])
+    if filters.get('paths'):
+        patterns.append([b'"path":' + json.dumps('/' + path.strip('/'), ensure_ascii=False)[:-1].encode('utf-8')
+                         for path in filters['paths']])
+    return patterns
+
+
+def scan_records(log_file, start_date=None, end_date=None, patterns=None):
+    """
+    顺序扫描年份日志
+    :param start_date: 开始日期 'YYYY-MM-DD'，与结束日期同时指定时才按日期过滤
+    :param end_date: 结束日期 'YYYY-MM-DD'
+    :param patterns: filter_patterns 的返回值，不满足的行不做JSON解析
+    :return: 记录列表（同一版本以最后一行为准，按该版本首次出现的位置排列）
+    """
+    start_date = start_date[:10] if start_date and end_date else None
+    end_date = end_date[:10] if start_date else None
+    latest = {}
+    with gzip.open(log_file, 'rb') as f:
+        try:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    # 追加被中断留下的不完整行
+                    break
+                match = _RECORD_HEAD.match(line)
+                if match:
+                    date = match.group(1)[:10].decode('ascii')
+                    revision = int(match.group(2))
+                else:
+                    record = json.loads(line)
+                    date = record['date'][:10]
+                    revision = int(record['revision'])
+                matched = ((start_date is None or start_date <= date <= end_date)
+                           and all(any(pattern in line for pattern in group) for group in patterns or ()))
+                # 范围外的新版本同样覆盖之前的行（日期被修改过的版本）
+                latest[revision] = line if matched else None
+        except (EOFError, gzip.BadGzipFile, zlib.error) as e:
+            print(f"[{datetime.now()}] 日志存储 - {log_file} 末尾数据不完整，已忽略: {e}")
+    return [json.loads(line) for line in latest.values() if line is not None]
+
+
+def read_xml_records(log_file):
+    """
+    读取XML年份日志的全部记录
+    :raises ET.ParseError: XML无法解析
+    """
+    return [element_to_record(logentry) for logentry in ET.parse(log_file).getroot().iterfind('logentry')]
+
+
+def write_xml_log(log_file, records):
+    """
+    将记录写为XML年份日志（与 write_svn_log 相同，按版本号降序）
+    """
+    root = ET.Element('log')
+    for record in sorted(records, key=lambda item: item['revision'], reverse=True):
+        root.append(record_to_element(record))
+    tmp_file = f'{log_file}.{os.getpid()}.tmp'
+    ET.ElementTree(root).write(tmp_file, encoding='utf-8', xml_declaration=True)
+    os.replace(tmp_file, log_file)
+
+
+def migrate(logs_dir, target='jsonl.gz', remove_source=False):
+    """
+    将日志目录中其他格式的年份日志转换为目标格式，目标格式的文件已存在时跳过该年份
+    :param logs_dir: 日志目录
+    :param target: 目标格式 xml / jsonl.gz
+    :param remove_source: 转换成功后删除原文件（XML日志同时删除其索引文件）
+    :return: [(年份, 版本数, 原文件字节数, 新文件字节数)]
+    """
+    if target not in FORMATS:
+        raise ValueError(f'不支持的日志格式: {target}')
+    results = []
+    for filename in sorted(os.listdir(logs_dir)):
+        parsed = parse_log_file_name(filename)
+        if parsed is None or parsed[1] == target:
+            continue
+        year, source = parsed
+        source_file = os.path.join(logs_dir, filename)
+        target_file = os.path.join(logs_dir, log_file_name(year, target))
+        if os.path.exists(target_file):
+            print(f"[{datetime.now()}] 日志迁移 - {target_file} 已存在，跳过 {filename}")
+            continue
+
+        if source == 'xml':
+            records = read_xml_records(source_file)
+        else:
+            records = scan_records(source_file)
+        records.sort(key=lambda record: record['revision'])
+        if target == 'xml':
+            write_xml_log(target_file, records)
+        else:
+            write_records(target_file, records)
+
+        result = (year, len(records), os.path.getsize(source_file), os.path.getsize(target_file))
+        results.append(result)
+        print(f"[{datetime.now()}] 日志迁移 - {filename} -> {os.path.basename(target_file)}: "
+              f"{result[1]} 个版本，{result[2] / 1024:.1f} KB -> {result[3] / 1024:.1f} KB")
+        if remove_source:
+            os.remove(source_file)
+            index_file = os.path.splitext(source_file)[0] + '.idx.json'
+            if source == 'xml' and os.path.exists(index_file):
+                os.remove(index_file)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='年份日志存储格式迁移')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    migrate_parser = subparsers.add_parser('migrate', help='转换年份日志的存储格式')
+    migrate_parser.add_argument('--logs-dir', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs'),
+                                help='日志目录（默认为程序目录下的 logs）')
+    migrate_parser.add_argument('--to', dest='target', choices=FORMATS, default='jsonl.gz', help='目标格式')
+    migrate_parser.add_argument('--remove-source', action='store_true', help='转换成功后删除原文件')
+    args = parser.parse_args(argv)
+
+    try:
+        results = migrate(args.logs_dir, args.target, args.remove_source)
+    except (OSError, ET.ParseError) as e:
+        print(f"[{datetime.now()}] 日志迁移 - 失败: {e}")
+        return 1
+    print(f"[{datetime.now()}] 日志迁移 - 完成，共转换 {len(results)} 个年份日志；"
+          f"请在 config.yml 中设置 log_format: {args.target}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
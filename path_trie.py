@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+目录/模块汇总
+
+按路径逐级建立前缀树，每个目录节点累计提交数、新增/删除行数和文件修改次数。
+分析每个版本后增量加入，查询任意前缀下指定深度的汇总时只遍历该子树的前几层。
+"""
+
+# 节点统计字段下标
+COMMITS = 0
+LINES_ADDED = 1
+LINES_DELETED = 2
+FILES = 3
+# 最近一次计入提交数的版本号（同一版本修改同一目录下多个文件只算一次提交）
+LAST_REVISION = 4
+
+
+class PathTrie:
+    """
+    路径前缀树，节点为 [子节点字典, 统计列表]
+    """
+
+    def __init__(self):
+        self.root = [{}, [0, 0, 0, 0, None]]
+        self.revisions = 0
+
+    def add(self, path, revision, lines_added=0, lines_deleted=0, files=1):
+        """
+        将一个文件的修改计入路径上的每一级目录
+        :param path: 仓库内路径，如 /trunk/module/src/A.java
+        :param revision: 版本号
+        """
+        node = self.root
+        self._count(node[1], revision, lines_added, lines_deleted, files)
+        for part in path.strip('/').split('/'):
+            if not part:
+                continue
+            children = node[0]
+            child = children.get(part)
+            if child is None:
+                child = children[part] = [{}, [0, 0, 0, 0, None]]
+            node = child
+            self._count(node[1], revision, lines_added, lines_deleted, files)
+
+    @staticmethod
+    def _count(stats, revision, lines_added, lines_deleted, files):
+        if stats[LAST_REVISION] != revision:
+            stats[LAST_REVISION] = revision
+            stats[COMMITS] += 1
+        stats[LINES_ADDED] += lines_added
+        stats[LINES_DELETED] += lines_deleted
+        stats[FILES] += files
+
+    def add_commit(self, commit):
+        """
+        将一个已获取代码行数的提交记录计入前缀树
+        文件级行数来自 file_details（按路径后缀与 changed_files 对应）；没有文件级明细时
+        （如缓存已压缩），整个版本的行数计入所有修改路径的公共父目录
+        :param commit: 提交记录，包含 revision、changed_files、file_details、lines_added、lines_deleted
+        """
+        revision = commit['revision']
+        paths = [changed['path'] for changed in commit.get('changed_files', []) if changed.get('path')]
+        if not paths:
+            return
+        self.revisions += 1
+        file_lines = match_file_details(paths, commit.get('file_details') or {})
+        if not file_lines and (commit.get('lines_added') or commit.get('lines_deleted')):
+            for path in paths:
+                self.add(path, revision)
+            self.add(common_parent(paths), revision, commit.get('lines_added', 0), commit.get('lines_deleted', 0), 0)
+            return
+        for path in paths:
+            lines_added, lines_deleted = file_lines.get(path, (0, 0))
+            self.add(path, revision, lines_added, lines_deleted)
+
+    def query(self, prefix='/', depth=1, limit=0):
+        """
+        查询前缀下指定深度的目录汇总
+        :param prefix: 路径前缀，如 /trunk
+        :param depth: 相对前缀向下展开的层数（1表示只返回直接子目录）
+        :param limit: 每层最多返回的条数（按修改行数降序），0表示不限
+        :return: 前缀节点的汇总字典，子目录在 children 中递归给出；前缀不存在时返回None
+        """
+        node = self.root
+        parts = [part for part in prefix.strip('/').split('/') if part]
+        for part in parts:
+            node = node[0].get(part)
+            if node is None:
+                return None
+        return self._summarize(node, '/' + '/'.join(parts), depth, limit)
+
+    def _summarize(self, node, path, depth, limit):
+        stats = node[1]
+        result = {
+            'path': path,
+            'commits': stats[COMMITS],
+            'lines_added': stats[LINES_ADDED],
+            'lines_deleted': stats[LINES_DELETED],
+            'files': stats[FILES],
+            'children_count': len(node[0]),
+        }
+        if depth > 0 and node[0]:
+            children = sorted(node[0].items(), key=lambda item: item[1][1][LINES_ADDED] + item[1][1][LINES_DELETED],
+                              reverse=True)
+            if limit:
+                children = children[:limit]
+            base = path.rstrip('/')
+            result['children'] = [self._summarize(child, f'{base}/{name}', depth - 1, limit)
+                                  for name, child in children]
+        return result
+
+    @classmethod
+    def from_commits(cls, commits):
+        """
+        由提交记录列表构建前缀树
+        """
+        trie = cls()
+        for commit in commits:
+            trie.add_commit(commit)
+        return trie
+
+
+def match_file_details(paths, file_details):
+    """
+    将 file_details（键为相对分支的路径）与 changed_files 中的仓库路径按后缀对应
+    :return: {仓库路径: (新增行数, 删除行数)}
+    """
+    if not file_details:
+        return {}
+    by_name = {}
+    for path in paths:
+        by_name.setdefault(path.rsplit('/', 1)[-1], []).append(path)
+
+    matched = {}
+    for key, detail in file_details.items():
+        # 去掉diff头中附带的 "\t(revision N)" 等后缀
+        relative = key.split('\t', 1)[0].strip().strip('/')
+        candidates = by_name.get(relative.rsplit('/', 1)[-1], ())
+        for path in candidates:
+            if path == '/' + relative or path.endswith('/' + relative):
+                added, deleted = matched.get(path, (0, 0))
+                matched[path] = (added + detail.get('lines_added', 0), deleted + detail.get('lines_deleted', 0))
+                break
+    return matched
+
+
+def common_parent(paths):
+    """
+    多个路径的公共父目录
+    """
+    split = [path.strip('/').split('/')[:-1] for path in paths]
+    common = split[0]
+    for parts in split[1:]:
+        size = 0
+        for a, b in zip(common, parts):
+            if a != b:
+                break
+            size += 1
+        common = common[:size]
+    return '/' + '/'.join(common)
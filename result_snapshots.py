@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+分析结果快照
+
+每个查询（日期范围、筛选条件、图表选项）最近一次计算完成的分析结果保存在
+cache/snapshots/<签名>.json，先写临时文件再替换，进程退出或重启不会留下不完整的快照。
+快照在首次查询时从磁盘加载，进程内按最近使用顺序保留少量已加载的快照；
+其他worker更新了快照文件（修改时间变化）时重新加载。
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+SNAPSHOT_DIR_NAME = 'snapshots'
+SNAPSHOT_VERSION = 1
+# 进程内保留的已加载快照数
+MAX_LOADED = 8
+# 磁盘上保留的快照文件数，超过时删除最久未更新的
+DEFAULT_MAX_FILES = 50
+
+
+class SnapshotStore:
+    """
+    按查询签名保存的分析结果快照
+    """
+
+    def __init__(self, cache_dir, config=None):
+        """
+        :param cache_dir: 缓存目录
+        :param config: 配置字典（读取 result_snapshot_max_files）
+        """
+        self.snapshot_dir = os.path.join(cache_dir, SNAPSHOT_DIR_NAME)
+        self.config = config if config is not None else {}
+        # {签名: (文件修改时间, 快照)}
+        self._loaded = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def signature(query):
+        """
+        查询的签名：筛选条件的值排序后参与签名
+        :param query: {'start_date', 'end_date', 'filters', 'chart_options'}
+        """
+        normalized = dict(query)
+        normalized['filters'] = {field: sorted(values)
+                                 for field, values in (query.get('filters') or {}).items() if values}
+        return hashlib.md5(json.dumps(normalized, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def snapshot_path(self, signature):
+        return os.path.join(self.snapshot_dir, f'{signature}.json')
+
+    def get(self, query):
+        """
+        读取查询的快照
+        :return: {'query', 'saved_at', 'log_state', 'results'}，不存在或无法读取时为None（调用方不应修改返回值）
+        """
+        signature = self.signature(query)
+        path = self.snapshot_path(signature)
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        with self._lock:
+            loaded = self._loaded.pop(signature, None)
+            if loaded is None or loaded[0] != mtime_ns:
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        snapshot = json.load(f)
+                except (OSError, ValueError):
+                    return None
+                if snapshot.get('version') != SNAPSHOT_VERSION:
+                    return None
+                loaded = (mtime_ns, snapshot)
+            # 按最近使用顺序保留
+            self._loaded[signature] = loaded
+            while len(self._loaded) > MAX_LOADED:
+                self._loaded.pop(next(iter(self._loaded)))
+            return loaded[1]
+
+    def save(self, query, results, log_state=None):
+        """
+        原子写入查询的快照
+        :param results: 分析结果
+        :param log_state: 计算结果时年份日志的状态，用于判断日志是否已更新
+        :return: 写入的快照
+        """
+        snapshot = {
+            'version': SNAPSHOT_VERSION,
+            'query': query,
+            'saved_at': time.time(),
+            'log_state': log_state,
+            'results': results,
+        }
+        signature = self.signature(query)
+        path = self.snapshot_path(signature)
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False, separators=(',', ':'), default=str)
+        os.replace(tmp_path, path)
+        # 下次读取时从文件加载，与其他worker读到的内容一致
+        with self._lock:
+            self._loaded.pop(signature, None)
+        self._prune()
+        return snapshot
+
+    def _prune(self):
+        max_files = self.config.get('result_snapshot_max_files', DEFAULT_MAX_FILES)
+        if not max_files:
+            return
+        try:
+            names = [name for name in os.listdir(self.snapshot_dir) if name.endswith('.json')]
+            if len(names) <= max_files:
+                return
+            paths = sorted((os.path.join(self.snapshot_dir, name) for name in names), key=os.path.getmtime)
+            for path in paths[:len(paths) - max_files]:
+                os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+重复调用合并（singleflight）
+
+同一个键同时只执行一次：第一个调用方执行函数，执行期间到达的相同键的调用方等待并共用其结果
+（或异常）。执行结束后键即被移除，之后的调用重新执行，不做结果缓存。
+线程中的调用方（do）和事件循环中的协程（do_async）共用同一组键，可以互相等待对方的结果。
+协程版本中首个调用方被取消只取消它自己的等待，共用的执行继续完成并交给其他调用方。
+"""
+import asyncio
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """
+    按键合并并发调用
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # {键: concurrent.futures.Future}
+        self._calls = {}
+
+    def _join(self, key):
+        # 返回 (Future, 是否为首个调用方)
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                return call, False
+            call = self._calls[key] = Future()
+            # 标记为执行中：等待的协程被取消时不会连带取消共用的 Future
+            call.set_running_or_notify_cancel()
+            return call, True
+
+    def _finish(self, key, call, result=None, error=None):
+        with self._lock:
+            del self._calls[key]
+        if error is not None:
+            call.set_exception(error)
+        else:
+            call.set_result(result)
+
+    def do(self, key, fn):
+        """
+        执行 fn()，相同键正在执行时等待其结果
+        :param key: 可哈希的键
+        :param fn: 无参可调用对象
+        :return: (结果, 是否共用了其他调用方的结果)
+        """
+        call, leader = self._join(key)
+        if not leader:
+            return call.result(), True
+
+        try:
+            result = fn()
+        except BaseException as e:
+            self._finish(key, call, error=e)
+            raise
+        self._finish(key, call, result)
+        return result, False
+
+    async def do_async(self, key, coro_fn):
+        """
+        do 的协程版本：等待其他调用方时不阻塞事件循环
+        :param coro_fn: 无参函数，返回要执行的协程
+        :return: (结果, 是否共用了其他调用方的结果)
+        """
+        call, leader = self._join(key)
+        if not leader:
+            return await asyncio.wrap_future(call), True
+
+        # 共用的协程作为独立任务执行，首个调用方被取消时任务继续执行，等待的调用方仍能得到结果
+        task = asyncio.ensure_future(coro_fn())
+        task.add_done_callback(lambda done: self._finish_task(key, call, done))
+        return await asyncio.shield(task), False
+
+    def _finish_task(self, key, call, task):
+        if task.cancelled():
+            self._finish(key, call, error=asyncio.CancelledError())
+        elif task.exception() is not None:
+            self._finish(key, call, error=task.exception())
+        else:
+            self._finish(key, call, task.result())
+
+    def inflight(self):
+        """
+        正在执行的键数
+        """
+        with self._lock:
+            return len(self._calls)
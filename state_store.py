@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+多进程共享状态存储
+
+gunicorn 多个worker进程之间通过 SQLite（WAL模式）共享任务状态和分析结果，
+通过文件锁串行化对同一缓存分片文件的写入。
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    try:
+        import msvcrt
+    except ImportError:
+        msvcrt = None
+
+
+class FileLock:
+    """
+    跨进程文件锁（非阻塞轮询加锁，兼容gevent）
+
+    用法:
+        with FileLock(path + '.lock'):
+            ...
+    """
+
+    def __init__(self, path, timeout=60, poll_interval=0.05):
+        self.path = path
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._fd = None
+
+    def acquire(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        deadline = time.time() + self.timeout
+        while True:
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                elif msvcrt is not None:
+                    msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                self._fd = fd
+                return self
+            except OSError:
+                if time.time() >= deadline:
+                    os.close(fd)
+                    raise TimeoutError(f'获取文件锁超时: {self.path}')
+                time.sleep(self.poll_interval)
+
+    def release(self):
+        if self._fd is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
+
+
+class StateStore:
+    """
+    基于SQLite的键值存储，值以JSON保存，每次写入递增版本号
+
+    连接按线程创建；读取大对象时按版本号复用本进程内已解码的值，避免重复解析。
+    """
+
+    def __init__(self, path, busy_timeout=10):
+        """
+        :param path: 数据库文件路径（首次使用时创建）
+        :param busy_timeout: 等待其他进程释放写锁的超时时间（秒）
+        """
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._decoded = {}
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            return conn
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        with self._init_lock:
+            if not self._initialized:
+                conn.execute('CREATE TABLE IF NOT EXISTS kv ('
+                             'key TEXT PRIMARY KEY, value TEXT NOT NULL, '
+                             'version INTEGER NOT NULL, updated_at REAL NOT NULL)')
+                self._initialized = True
+        self._local.conn = conn
+        return conn
+
+    def version(self, key):
+        """
+        获取键的当前版本号，不存在时返回0
+        """
+        row = self._connect().execute('SELECT version FROM kv WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else 0
+
+    def get(self, key, default=None):
+        """
+        读取键值；版本号未变化时直接返回本进程已解码的对象（调用方不应修改返回值）
+        """
+        conn = self._connect()
+        row = conn.execute('SELECT version FROM kv WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return default
+        cached = self._decoded.get(key)
+        if cached is not None and cached[0] == row[0]:
+            return cached[1]
+        row = conn.execute('SELECT version, value FROM kv WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return default
+        value = json.loads(row[1])
+        self._decoded[key] = (row[0], value)
+        return value
+
+    def set(self, key, value):
+        """
+        写入键值，版本号加一
+        :return: 新版本号
+        """
+        payload = json.dumps(value, ensure_ascii=False, default=str)
+        conn = self._connect()
+        # 写入和读取新版本号在同一个写事务中，期间其他进程的写入不会被计入返回的版本号
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute('INSERT INTO kv (key, value, version, updated_at) VALUES (?, ?, 1, ?) '
+                         'ON CONFLICT(key) DO UPDATE SET value = excluded.value, '
+                         'version = kv.version + 1, updated_at = excluded.updated_at',
+                         (key, payload, time.time()))
+            version = conn.execute('SELECT version FROM kv WHERE key = ?', (key,)).fetchone()[0]
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return version
+
+    def compare_and_set(self, key, predicate, value):
+        """
+        原子地检查并写入：在写事务中读取当前值，predicate(当前值) 为True时写入新值
+        :param key: 键
+        :param predicate: 接收当前值（不存在时为None），返回是否允许写入
+        :param value: 新值
+        :return: 是否写入成功
+        """
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT value FROM kv WHERE key = ?', (key,)).fetchone()
+            current = json.loads(row[0]) if row else None
+            if not predicate(current):
+                conn.execute('ROLLBACK')
+                return False
+            conn.execute('INSERT INTO kv (key, value, version, updated_at) VALUES (?, ?, 1, ?) '
+                         'ON CONFLICT(key) DO UPDATE SET value = excluded.value, '
+                         'version = kv.version + 1, updated_at = excluded.updated_at',
+                         (key, json.dumps(value, ensure_ascii=False, default=str), time.time()))
+            conn.execute('COMMIT')
+            return True
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
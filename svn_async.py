@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+基于 asyncio 的svn子进程执行引擎
+
+所有子进程在同一个后台事件循环中通过 asyncio.create_subprocess_exec 启动，标准输出按块流式读取，
+超时和取消时终止子进程。同时进行的svn调用不再各自占用读取stderr的线程和超时计时器线程，
+调用方线程只等待结果。
+
+批量获取diff时（analyze_revisions），每个版本的获取协程通过 AsyncEngine.spawn() 提交到事件循环，
+在循环中等待并发名额、重试和对冲（svn_client.run_svn_command_async），同时进行的svn调用数只受并发限制约束，
+不需要为每个调用占用一个线程。
+同步接口 AsyncEngine.run() 供其他一次性的调用（日志、仓库信息等）直接使用，调用方线程等待结果，
+不能在事件循环线程中调用；gevent worker 中事件循环运行在原生线程上，不受 monkey patch 影响。
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import threading
+
+_READ_SIZE = 65536
+# 终止子进程后等待其退出的最长时间（秒）
+KILL_WAIT_SECONDS = 1.0
+
+
+async def run_command(cmd, timeout, text=False, max_bytes=0):
+    """
+    执行一次子进程调用
+    :param cmd: 命令参数列表
+    :param timeout: 超时时间（秒）
+    :param text: 是否以文本模式返回输出
+    :param max_bytes: 标准输出最多读取的字节数，超过时终止子进程并将 result.truncated 置为True（0表示不限）
+    :return: subprocess.CompletedProcess（附加 truncated 属性）
+    :raises subprocess.TimeoutExpired: 超时
+    """
+    process = await asyncio.create_subprocess_exec(*cmd, stdout=asyncio.subprocess.PIPE,
+                                                   stderr=asyncio.subprocess.PIPE)
+    chunks = []
+    state = {'size': 0, 'truncated': False}
+
+    async def read_stdout():
+        while True:
+            chunk = await process.stdout.read(_READ_SIZE)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            state['size'] += len(chunk)
+            if max_bytes and state['size'] > max_bytes:
+                state['truncated'] = True
+                process.kill()
+                break
+
+    async def communicate():
+        stderr_task = asyncio.ensure_future(process.stderr.read())
+        try:
+            await read_stdout()
+            if state['truncated']:
+                # 已终止的子进程不再等待其余的错误输出
+                return b''
+            await process.wait()
+            return await stderr_task
+        finally:
+            stderr_task.cancel()
+
+    try:
+        stderr = await asyncio.wait_for(communicate(), timeout)
+    except asyncio.TimeoutError:
+        raise subprocess.TimeoutExpired(cmd, timeout) from None
+    finally:
+        # 超时、取消或截断时终止子进程并回收（其子进程仍持有管道时最多等待 KILL_WAIT_SECONDS）
+        if process.returncode is None:
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+            try:
+                await asyncio.wait_for(process.wait(), KILL_WAIT_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    stdout = b''.join(chunks)
+    if state['truncated']:
+        stdout = stdout[:max_bytes]
+    if text:
+        stdout = stdout.decode('utf-8', errors='replace')
+        stderr = stderr.decode('utf-8', errors='replace')
+    result = subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
+    result.truncated = state['truncated']
+    return result
+
+
+def _native_thread_class():
+    # gevent monkey patch 后 threading.Thread 为协程，事件循环需要运行在原生线程上
+    try:
+        from gevent import monkey
+        if monkey.is_module_patched('threading'):
+            return monkey.get_original('threading', 'Thread')
+    except ImportError:
+        pass
+    return threading.Thread
+
+
+def _use_pidfd_watcher(loop):
+    """
+    Python 3.12 之前默认的 ThreadedChildWatcher 为每个子进程启动一个等待退出的线程；
+    系统支持 pidfd 时改为在事件循环中监听子进程退出（3.12 起默认如此）
+    """
+    if sys.version_info >= (3, 12) or not hasattr(os, 'pidfd_open'):
+        return
+    try:
+        os.close(os.pidfd_open(os.getpid()))
+    except OSError:
+        return
+    watcher = asyncio.PidfdChildWatcher()
+    watcher.attach_loop(loop)
+    asyncio.set_child_watcher(watcher)
+
+
+class AsyncEngine:
+    """
+    在后台线程中运行的事件循环，首次使用时启动
+    """
+
+    def __init__(self):
+        self._loop = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self):
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+
+                def run():
+                    asyncio.set_event_loop(loop)
+                    _use_pidfd_watcher(loop)
+                    loop.call_soon(ready.set)
+                    loop.run_forever()
+
+                _native_thread_class()(target=run, name='svn-async-engine', daemon=True).start()
+                ready.wait()
+                self._loop = loop
+            return self._loop
+
+    def submit(self, cmd, timeout, text=False, max_bytes=0):
+        """
+        提交一次调用，立即返回 concurrent.futures.Future；取消该 Future 时终止子进程
+        """
+        return self.spawn(run_command(cmd, timeout, text, max_bytes))
+
+    def spawn(self, coro):
+        """
+        在事件循环中运行协程，立即返回 concurrent.futures.Future；取消该 Future 时取消协程
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, cmd, timeout, text=False, max_bytes=0):
+        """
+        同步执行一次调用并等待结果（参数和返回值同 run_command）
+        """
+        future = self.submit(cmd, timeout, text, max_bytes)
+        try:
+            return future.result()
+        except BaseException:
+            future.cancel()
+            raise
+
+    def close(self):
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is not None:
+            loop.call_soon_threadsafe(loop.stop)
+
+
+# 进程内共用的执行引擎
+ENGINE = AsyncEngine()
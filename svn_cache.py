@@ -0,0 +1,579 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+按仓库分片的缓存存储、容量控制与压缩
+
+每个SVN仓库（按仓库UUID，取不到时按仓库根URL）对应 cache/shards/ 下的一个分片文件，
+分片在首次访问时加载，长时间未访问时写回并从内存卸载。同一进程服务多个仓库时，
+内存中只保留近期活跃的分片。多个进程共享同一分片文件时，写入在文件锁内进行，
+写入前先合并其他进程已写入磁盘的条目，避免相互覆盖。
+
+revision_file（文件级缓存）按版本整体淘汰：超过保留期或超过条目/字节上限时，
+删除该版本的所有文件级条目，并将对应的 revision_summary 压缩为只含汇总数据的形式
+（去掉 file_list，标记 compacted）。版本汇总始终保留，因此已压缩版本无需重新获取diff。
+
+离线压缩:
+    python svn_cache.py compact [--cache-file cache/shards/<uuid>.json] [--retention-days 180] [--max-entries 200000]
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime
+
+import svn_metrics
+from state_store import FileLock
+
+# 缓存格式版本
+CACHE_VERSION = '1.2'
+# 分片目录名（位于缓存目录下）
+SHARD_DIR_NAME = 'shards'
+
+# 文件级缓存默认保留天数（按条目写入时间计算，0表示不按时间淘汰）
+DEFAULT_RETENTION_DAYS = 180
+# 文件级缓存默认最大条目数（0表示不限制）
+DEFAULT_MAX_FILE_ENTRIES = 200000
+# 缓存文件默认最大字节数（0表示不限制）
+DEFAULT_MAX_BYTES = 100 * 1024 * 1024
+# 超出上限时收缩到上限的比例，避免每次保存都触发淘汰
+SHRINK_RATIO = 0.9
+# 分片默认空闲卸载时间（秒）
+DEFAULT_IDLE_SECONDS = 900
+# 分片默认最短保存间隔（秒），期间的修改只标记为脏数据，任务结束时统一写回
+DEFAULT_SAVE_INTERVAL = 30
+# 检查分片文件是否被其他进程更新的最短间隔（秒）
+DISK_CHECK_INTERVAL = 5
+
+# 已加载到内存的分片数
+SHARDS_LOADED = svn_metrics.REGISTRY.register(svn_metrics.Gauge(
+    'svn_stat_cache_shards_loaded', '已加载到内存的缓存分片数'))
+# 分片加载/卸载次数
+SHARD_EVENTS = svn_metrics.REGISTRY.register(svn_metrics.Counter(
+    'svn_stat_cache_shard_events_total', '缓存分片加载/卸载次数', ('event',)))
+
+
+def new_cache_data(repository=None):
+    """
+    创建空的缓存数据结构
+    :param repository: 仓库信息 {'uuid', 'root'}
+    """
+    return {
+        "version": CACHE_VERSION,
+        "repository": repository or {},
+        "cache": {
+            "revision_file": {},
+            "revision_summary": {}
+        }
+    }
+
+
+def shard_file_name(repository_id):
+    """
+    根据仓库标识生成分片文件名，UUID直接使用，URL等其他标识取哈希
+    """
+    if re.fullmatch(r'[0-9A-Za-z-]{8,64}', repository_id):
+        return f'{repository_id}.json'
+    return f'{hashlib.md5(repository_id.encode()).hexdigest()}.json'
+
+
+class DateTimeEncoder(json.JSONEncoder):
+    """
+    JSON序列化自定义编码器，处理datetime对象
+    """
+    def default(self, obj):
+        if isinstance(obj, datetime):
+            return obj.isoformat()
+        return super().default(obj)
+
+
+class CacheShard:
+    """
+    单个仓库的缓存分片
+    """
+
+    def __init__(self, repository_id, path, data):
+        self.repository_id = repository_id
+        self.path = path
+        self.data = data
+        self.dirty = False
+        self.last_access = time.time()
+        self.last_saved = 0
+        # 同一分片的写回串行进行
+        self.save_lock = threading.Lock()
+        self.last_retention_check = 0
+        # 最近一次读取/写入时分片文件的 (mtime_ns, size)，用于发现其他进程的写入
+        self.disk_state = None
+        self.last_disk_check = time.time()
+
+
+class ShardedCache:
+    """
+    按仓库分片、按需加载、空闲卸载的缓存存储
+    """
+
+    def __init__(self, cache_dir, config=None, legacy_file=None):
+        """
+        :param cache_dir: 缓存目录
+        :param config: 配置字典（读取容量、保存间隔、空闲卸载时间等配置项）
+        :param legacy_file: 旧版单文件缓存路径，新建分片时从中迁移属于该仓库的条目
+        """
+        self.cache_dir = cache_dir
+        self.shard_dir = os.path.join(cache_dir, SHARD_DIR_NAME)
+        self.config = config if config is not None else {}
+        self.legacy_file = legacy_file
+        self.shards = {}
+        self._lock = threading.RLock()
+        self._last_idle_check = time.time()
+
+    @property
+    def lock(self):
+        """
+        缓存数据锁：并发写入缓存条目时持有，避免与写回磁盘、淘汰、合并同时修改同一个字典
+        """
+        return self._lock
+
+    def shard_path(self, repository_id):
+        return os.path.join(self.shard_dir, shard_file_name(repository_id))
+
+    def get(self, repository_id, repository=None):
+        """
+        获取仓库分片，未加载时从磁盘加载
+        :param repository_id: 仓库标识（UUID或根URL）
+        :param repository: 仓库信息 {'uuid', 'root'}，新建分片时写入
+        :return: CacheShard
+        """
+        with self._lock:
+            shard = self.shards.get(repository_id)
+            if shard is None:
+                shard = self._load(repository_id, repository)
+                self.shards[repository_id] = shard
+                SHARDS_LOADED.set(len(self.shards))
+            shard.last_access = time.time()
+            if shard.last_access - shard.last_disk_check >= DISK_CHECK_INTERVAL:
+                shard.last_disk_check = shard.last_access
+                self._merge_from_disk(shard)
+        self.unload_idle()
+        return shard
+
+    def _merge_from_disk(self, shard):
+        """
+        分片文件被其他进程更新时，将磁盘上新增的条目合并到内存
+        :return: 合并的条目数
+        """
+        state = _disk_state(shard.path)
+        if state is None or state == shard.disk_state:
+            return 0
+        try:
+            with open(shard.path, 'r', encoding='utf-8') as f:
+                disk_data = json.load(f)
+        except Exception as e:
+            print(f"[{datetime.now()}] cache - 读取其他进程写入的缓存分片失败: {shard.path}, {e}")
+            return 0
+        shard.disk_state = state
+        merged = merge_cache_data(shard.data, disk_data)
+        if merged:
+            SHARD_EVENTS.inc(merged, event='merge')
+        return merged
+
+    def _load(self, repository_id, repository):
+        path = self.shard_path(repository_id)
+        data = None
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                print(f"[{datetime.now()}] cache - 已加载仓库 {repository_id} 的缓存分片: {path}")
+            except Exception as e:
+                print(f"[{datetime.now()}] cache - 加载缓存分片失败，将重置该分片: {path}, {e}")
+                try:
+                    os.remove(path)
+                except Exception as delete_error:
+                    print(f"[{datetime.now()}] cache - 删除缓存分片失败: {delete_error}")
+        shard = CacheShard(repository_id, path, data or new_cache_data(repository))
+        shard.disk_state = _disk_state(path) if data is not None else None
+        if data is None and self.legacy_file and os.path.exists(self.legacy_file):
+            migrated = self._migrate_legacy(shard.data, (repository or {}).get('root'))
+            if migrated:
+                shard.dirty = True
+                print(f"[{datetime.now()}] cache - 已从旧版缓存迁移 {migrated} 个版本到仓库 {repository_id} 的分片")
+        SHARD_EVENTS.inc(event='load')
+        return shard
+
+    def _migrate_legacy(self, data, root):
+        """
+        从旧版单文件缓存中迁移属于指定仓库根URL的条目
+        :return: 迁移的版本数
+        """
+        try:
+            with open(self.legacy_file, 'r', encoding='utf-8') as f:
+                legacy = json.load(f)
+        except Exception as e:
+            print(f"[{datetime.now()}] cache - 读取旧版缓存失败: {e}")
+            return 0
+
+        summaries = legacy.get('cache', {}).get('revision_summary', {})
+        revisions = set()
+        for key, summary in summaries.items():
+            if root and not str(summary.get('branch_url', '')).startswith(root):
+                continue
+            data['cache']['revision_summary'][key] = summary
+            revisions.add(str(summary.get('revision')))
+        for key, entry in legacy.get('cache', {}).get('revision_file', {}).items():
+            if str(entry.get('revision')) in revisions:
+                data['cache']['revision_file'][key] = entry
+        return len(revisions)
+
+    def mark_dirty(self, shard):
+        shard.dirty = True
+
+    def save(self, shard, force=False):
+        """
+        写回分片：未到保存间隔（或其他线程正在写回该分片）时只保留脏标记，force为True时立即写入
+        写入前按配置的保留期和容量上限淘汰文件级缓存
+        合并、淘汰在缓存数据锁内进行，序列化和写文件在锁外进行，不阻塞并发读写缓存的线程
+        :return: 是否执行了写入
+        """
+        interval = self.config.get('cache_save_interval_seconds', DEFAULT_SAVE_INTERVAL)
+        with self._lock:
+            if not force and (time.time() - shard.last_saved < interval or shard.save_lock.locked()):
+                shard.dirty = True
+                return False
+            # 领取本次写入：之后到达的调用方在保存间隔内不再重复写入
+            shard.last_saved = time.time()
+
+        with shard.save_lock, FileLock(shard.path + '.lock'):
+            with self._lock:
+                # 合并其他进程写入的条目，避免覆盖
+                self._merge_from_disk(shard)
+
+                # 按时间淘汰需要遍历全部条目，每小时最多检查一次；条目数上限每次都检查
+                retention_days = 0
+                if time.time() - shard.last_retention_check >= 3600:
+                    retention_days = self.config.get('cache_file_retention_days', DEFAULT_RETENTION_DAYS)
+                    shard.last_retention_check = time.time()
+                max_file_entries = self.config.get('cache_max_file_entries', DEFAULT_MAX_FILE_ENTRIES)
+                eviction = enforce_cache_limits(shard.data, retention_days, max_file_entries)
+                snapshot = snapshot_cache_data(shard.data)
+                # 此后写入的条目由写入方重新标记为脏数据
+                shard.dirty = False
+            if eviction['evicted_files']:
+                print(f"[{datetime.now()}] cache - 淘汰 {eviction['evicted_revisions']} 个版本的 {eviction['evicted_files']} 个文件级缓存，剩余 {eviction['remaining_files']} 个")
+
+            try:
+                size = write_cache_file(shard.path, snapshot)
+
+                # 超过字节上限时按比例收缩后重写
+                max_bytes = self.config.get('cache_max_bytes', DEFAULT_MAX_BYTES)
+                if max_bytes and size > max_bytes:
+                    with self._lock:
+                        eviction = enforce_cache_limits(shard.data, 0, max_file_entries, max_bytes, size)
+                        snapshot = snapshot_cache_data(shard.data)
+                    print(f"[{datetime.now()}] cache - 缓存文件超过上限 {max_bytes / 1024:.2f} kb，淘汰 {eviction['evicted_files']} 个文件级缓存")
+                    size = write_cache_file(shard.path, snapshot)
+            except Exception:
+                # 写入失败时保留脏标记，下次保存时重试
+                shard.dirty = True
+                raise
+
+            with self._lock:
+                shard.disk_state = _disk_state(shard.path)
+                shard.last_saved = time.time()
+        print(f"[{datetime.now()}] cache - 缓存已保存到: {shard.path}, 缓存文件大小：{size / 1024:.2f} kb")
+        return True
+
+    def flush(self):
+        """
+        写回所有有修改的分片
+        """
+        with self._lock:
+            shards = [shard for shard in self.shards.values() if shard.dirty]
+        for shard in shards:
+            self.save(shard, force=True)
+        return len(shards)
+
+    def unload_idle(self, now=None):
+        """
+        写回并卸载超过空闲时间未访问的分片（每分钟最多检查一次）
+        :return: 卸载的分片数
+        """
+        now = now if now is not None else time.time()
+        if now - self._last_idle_check < 60:
+            return 0
+        self._last_idle_check = now
+        idle_seconds = self.config.get('cache_shard_idle_seconds', DEFAULT_IDLE_SECONDS)
+
+        with self._lock:
+            idle = [(repository_id, shard) for repository_id, shard in self.shards.items()
+                    if now - shard.last_access >= idle_seconds]
+        # 写回在缓存数据锁外进行（save 内部按需加锁）
+        for _, shard in idle:
+            if shard.dirty:
+                self.save(shard, force=True)
+
+        unloaded = 0
+        with self._lock:
+            for repository_id, shard in idle:
+                # 写回期间又被访问或修改的分片继续保留
+                if self.shards.get(repository_id) is not shard or shard.dirty or now - shard.last_access < idle_seconds:
+                    continue
+                del self.shards[repository_id]
+                unloaded += 1
+                SHARD_EVENTS.inc(event='unload')
+                print(f"[{datetime.now()}] cache - 仓库 {repository_id} 的缓存分片空闲超过 {idle_seconds} 秒，已卸载")
+            SHARDS_LOADED.set(len(self.shards))
+        return unloaded
+
+
+def _disk_state(path):
+    """
+    获取文件的 (mtime_ns, size)，文件不存在时返回None
+    """
+    try:
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+
+
+def merge_cache_data(target, source):
+    """
+    将 source 中 target 尚不存在的条目合并到 target（内存中的条目优先）
+    已压缩版本的文件级条目不再合并；source 中已压缩的版本汇总作为淘汰标记：
+    target 中同一版本的汇总不晚于压缩时间（即压缩前写入的同一份数据）时，target 也压缩该版本，
+    避免其他进程已淘汰的文件级条目被写回
+    :return: 合并的条目数
+    """
+    merged = 0
+    target_summaries = target['cache']['revision_summary']
+    target_files = target['cache']['revision_file']
+    # 版本号 -> 压缩时间
+    evicted = {}
+    for key, summary in source.get('cache', {}).get('revision_summary', {}).items():
+        current = target_summaries.get(key)
+        compacted_at = summary.get('compacted_at', summary.get('timestamp', 0))
+        if current is None:
+            target_summaries[key] = summary
+            merged += 1
+            if summary.get('compacted'):
+                evicted[key] = compacted_at
+        elif summary.get('compacted') and not current.get('compacted') and \
+                current.get('timestamp', 0) <= compacted_at:
+            evicted[key] = compacted_at
+    if evicted:
+        evicted_keys = {}
+        for key, entry in target_files.items():
+            revision = str(entry.get('revision'))
+            # 压缩之后重新写入的文件级条目保留
+            if revision in evicted and entry.get('timestamp', 0) <= evicted[revision]:
+                evicted_keys.setdefault(revision, []).append(key)
+        for revision in evicted:
+            keys = evicted_keys.get(revision, [])
+            if keys or not target_summaries[revision].get('compacted'):
+                compact_revision(target, revision, keys)
+                merged += 1
+    for key, entry in source.get('cache', {}).get('revision_file', {}).items():
+        if key in target_files:
+            continue
+        summary = target_summaries.get(str(entry.get('revision')))
+        if summary is not None and summary.get('compacted'):
+            continue
+        target_files[key] = entry
+        merged += 1
+    return merged
+
+
+def snapshot_cache_data(cache_data):
+    """
+    复制缓存数据的字典结构（条目本身不复制，写入缓存时总是替换整个条目），用于在锁外序列化
+    """
+    snapshot = dict(cache_data)
+    snapshot['cache'] = {name: dict(entries) for name, entries in cache_data['cache'].items()}
+    return snapshot
+
+
+def write_cache_file(path, cache_data):
+    """
+    原子写入缓存文件（先写临时文件再替换，紧凑格式）
+    :return: 写入后的文件大小（字节）
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(cache_data, f, ensure_ascii=False, separators=(',', ':'), cls=DateTimeEncoder)
+    os.replace(tmp_path, path)
+    return os.path.getsize(path)
+
+
+def compact_revision(cache_data, revision, file_keys):
+    """
+    淘汰一个版本的文件级缓存，并压缩其版本汇总
+    :param cache_data: 缓存数据
+    :param revision: 版本号
+    :param file_keys: 该版本的文件级缓存键列表
+    :return: 删除的文件级条目数
+    """
+    revision_file = cache_data['cache']['revision_file']
+    removed = 0
+    for key in file_keys:
+        if revision_file.pop(key, None) is not None:
+            removed += 1
+
+    summaries = cache_data['cache']['revision_summary']
+    summary = summaries.get(str(revision))
+    if summary is not None and not summary.get('compacted'):
+        # 替换整个汇总条目而不是原地修改，写回时锁外序列化的快照不受影响
+        summary = {key: value for key, value in summary.items() if key != 'file_list'}
+        summary['compacted'] = True
+        # 压缩时间：合并其他进程的缓存时据此判断对方的文件级条目是否写于淘汰之前
+        summary['compacted_at'] = int(time.time())
+        summaries[str(revision)] = summary
+    return removed
+
+
+def enforce_cache_limits(cache_data, retention_days=DEFAULT_RETENTION_DAYS, max_file_entries=DEFAULT_MAX_FILE_ENTRIES,
+                         max_bytes=0, current_bytes=0, now=None):
+    """
+    按保留期和容量上限淘汰文件级缓存
+    :param cache_data: 缓存数据
+    :param retention_days: 保留天数，超过的版本其文件级条目被淘汰（0表示不限）
+    :param max_file_entries: 文件级条目上限（0表示不限）
+    :param max_bytes: 缓存文件字节上限（0表示不限）
+    :param current_bytes: 当前缓存文件大小，超过 max_bytes 时按比例收缩条目数
+    :param now: 当前时间戳，默认 time.time()
+    :return: {'evicted_revisions', 'evicted_files', 'remaining_files'}
+    """
+    revision_file = cache_data['cache']['revision_file']
+    revision_summary = cache_data['cache']['revision_summary']
+    now = now if now is not None else time.time()
+
+    limit = max_file_entries if max_file_entries and max_file_entries > 0 else None
+    if max_bytes and current_bytes > max_bytes and revision_file:
+        by_bytes = int(len(revision_file) * max_bytes / current_bytes * SHRINK_RATIO)
+        limit = by_bytes if limit is None else min(limit, by_bytes)
+    cutoff = now - retention_days * 86400 if retention_days and retention_days > 0 else None
+
+    if limit is not None and len(revision_file) <= limit and cutoff is None:
+        return {'evicted_revisions': 0, 'evicted_files': 0, 'remaining_files': len(revision_file)}
+
+    # 按版本分组，版本写入时间取汇总时间戳（没有汇总时取文件条目的最大时间戳）
+    by_revision = {}
+    for key, entry in revision_file.items():
+        revision = str(entry.get('revision'))
+        group = by_revision.get(revision)
+        if group is None:
+            summary = revision_summary.get(revision)
+            group = by_revision[revision] = [summary.get('timestamp', 0) if summary else 0, []]
+        group[1].append(key)
+        if not revision_summary.get(revision):
+            group[0] = max(group[0], entry.get('timestamp', 0))
+
+    def revision_order(item):
+        revision, (timestamp, _) = item
+        return (timestamp, int(revision) if revision.isdigit() else 0)
+
+    remaining = len(revision_file)
+    evicted_revisions = 0
+    evicted_files = 0
+    for revision, (timestamp, keys) in sorted(by_revision.items(), key=revision_order):
+        expired = cutoff is not None and timestamp < cutoff
+        over_limit = limit is not None and remaining > limit
+        if not expired and not over_limit:
+            # 按时间升序排列，后面的版本更新，无需继续
+            break
+        removed = compact_revision(cache_data, revision, keys)
+        remaining -= removed
+        evicted_files += removed
+        evicted_revisions += 1
+
+    return {'evicted_revisions': evicted_revisions, 'evicted_files': evicted_files, 'remaining_files': remaining}
+
+
+def compact_cache_file(cache_file, retention_days=DEFAULT_RETENTION_DAYS, max_file_entries=DEFAULT_MAX_FILE_ENTRIES,
+                       max_bytes=DEFAULT_MAX_BYTES):
+    """
+    离线压缩缓存文件：淘汰超期/超量的文件级条目，并以紧凑格式重写
+    :param cache_file: 缓存文件路径
+    :return: 压缩统计字典
+    """
+    size_before = os.path.getsize(cache_file)
+    with FileLock(cache_file + '.lock'):
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            cache_data = json.load(f)
+
+        stats = enforce_cache_limits(cache_data, retention_days, max_file_entries, max_bytes, size_before)
+
+        tmp_file = f'{cache_file}.{os.getpid()}.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(cache_data, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_file, cache_file)
+
+    stats['bytes_before'] = size_before
+    stats['bytes_after'] = os.path.getsize(cache_file)
+    stats['summaries'] = len(cache_data['cache']['revision_summary'])
+    return stats
+
+
+def _load_config_limits(config_file):
+    """
+    从config.yml读取缓存容量配置
+    """
+    limits = {
+        'cache_file_retention_days': DEFAULT_RETENTION_DAYS,
+        'cache_max_file_entries': DEFAULT_MAX_FILE_ENTRIES,
+        'cache_max_bytes': DEFAULT_MAX_BYTES,
+    }
+    if os.path.exists(config_file):
+        import yaml
+        with open(config_file, 'r', encoding='utf-8') as f:
+            loaded = yaml.safe_load(f) or {}
+        for key in limits:
+            if key in loaded:
+                limits[key] = loaded[key]
+    return limits
+
+
+def main():
+    import argparse
+
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description='SVN统计缓存维护工具')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    compact_parser = subparsers.add_parser('compact', help='淘汰超期/超量的文件级缓存并压缩缓存文件')
+    compact_parser.add_argument('--cache-file', action='append',
+                                help='要压缩的缓存文件，可重复指定（默认压缩 cache/shards 下的所有分片）')
+    compact_parser.add_argument('--config', default=os.path.join(base_dir, 'config.yml'))
+    compact_parser.add_argument('--retention-days', type=int, help='文件级缓存保留天数（默认读取配置）')
+    compact_parser.add_argument('--max-entries', type=int, help='文件级缓存最大条目数（默认读取配置）')
+    compact_parser.add_argument('--max-bytes', type=int, help='缓存文件最大字节数（默认读取配置）')
+    args = parser.parse_args()
+
+    limits = _load_config_limits(args.config)
+    retention_days = args.retention_days if args.retention_days is not None else limits['cache_file_retention_days']
+    max_entries = args.max_entries if args.max_entries is not None else limits['cache_max_file_entries']
+    max_bytes = args.max_bytes if args.max_bytes is not None else limits['cache_max_bytes']
+
+    cache_files = args.cache_file
+    if not cache_files:
+        shard_dir = os.path.join(base_dir, 'cache', SHARD_DIR_NAME)
+        cache_files = sorted(os.path.join(shard_dir, name) for name in os.listdir(shard_dir)
+                             if name.endswith('.json')) if os.path.isdir(shard_dir) else []
+    if not cache_files:
+        print(f"[{datetime.now()}] cache - 未找到需要压缩的缓存文件")
+        return 1
+
+    for cache_file in cache_files:
+        if not os.path.exists(cache_file):
+            print(f"[{datetime.now()}] cache - 缓存文件不存在: {cache_file}")
+            continue
+        stats = compact_cache_file(cache_file, retention_days, max_entries, max_bytes)
+        print(f"[{datetime.now()}] cache - {cache_file} 压缩完成: 淘汰 {stats['evicted_revisions']} 个版本的 "
+              f"{stats['evicted_files']} 个文件级条目，剩余 {stats['remaining_files']} 个，"
+              f"版本汇总 {stats['summaries']} 个，文件大小 {stats['bytes_before'] / 1024:.2f} kb -> "
+              f"{stats['bytes_after'] / 1024:.2f} kb")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
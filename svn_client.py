@@ -0,0 +1,485 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+svn子进程调用
+
+- 每种命令（log/diff/cat/info/propget）有各自的超时时间
+- 超时或临时错误（网络中断等）时有限次数重试，重试间隔指数退避；
+  版本/路径不存在、认证失败等错误不重试
+- 可选的对冲请求：调用耗时超过该命令历史耗时的 p95 后再发起一个相同的请求，
+  取先成功的结果并终止另一个，削减偶发慢请求造成的长尾
+- 输出超过字节上限时终止子进程，结果标记为截断
+- 所有调用经过自适应并发限制（AIMD）：调用正常时逐步提高并发上限，出现超时、临时错误
+  或耗时明显变长时将上限减半，上限不超过配置的硬上限
+- 子进程可以由每次调用各自的线程读取（默认），或交给 svn_async 的事件循环统一执行；
+  事件循环中的协程通过 run_svn_command_async 调用，等待并发名额时不占用线程
+
+每次尝试的耗时、结果状态和接收字节数记录到 svn_metrics。
+"""
+import asyncio
+import subprocess
+import threading
+import time
+
+import svn_async
+import svn_metrics
+
+# 各命令的默认超时时间（秒）
+DEFAULT_TIMEOUTS = {'log': 600, 'diff': 60, 'cat': 30, 'info': 60, 'propget': 300}
+# 默认重试次数（不含首次调用）
+DEFAULT_RETRIES = 2
+# 首次重试前的等待时间（秒），之后每次翻倍
+DEFAULT_BACKOFF = 1.0
+# 对冲请求的触发分位数，以及启用对冲所需的最少历史样本数
+HEDGE_QUANTILE = 0.95
+DEFAULT_HEDGE_MIN_SAMPLES = 20
+# 不重试的错误码：版本/路径不存在、认证失败、参数错误
+PERMANENT_ERRORS = ('E160006', 'E160013', 'E170000', 'E170001', 'E200009', 'E205000', 'E215004')
+
+_READ_SIZE = 65536
+
+# 默认并发硬上限、初始并发上限
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_INITIAL_CONCURRENCY = 2
+# 近期平均耗时超过长期平均耗时的该倍数时视为服务端过载
+LATENCY_TOLERANCE = 2.0
+# 近期/长期平均耗时的指数平滑系数
+SHORT_ALPHA = 0.2
+LONG_ALPHA = 0.01
+# 过载时并发上限的乘数
+DECREASE_RATIO = 0.5
+# 两次减小并发上限之间的最短间隔（秒），同一批过载的调用只减一次
+DECREASE_COOLDOWN = 1.0
+
+
+class AdaptiveLimiter:
+    """
+    AIMD 自适应并发限制
+    - 加性增：调用正常完成时上限增加 1/上限，即每完成约“上限”次正常调用，上限加1
+    - 乘性减：超时、临时错误，或该命令近期平均耗时超过长期平均耗时 LATENCY_TOLERANCE 倍时，
+      上限乘以 DECREASE_RATIO
+    平均耗时按命令类型分别计算（单次diff的耗时随版本大小差异很大，只比较平滑后的趋势）
+    """
+
+    def __init__(self, max_limit=DEFAULT_MAX_CONCURRENCY, initial=DEFAULT_INITIAL_CONCURRENCY, min_limit=1):
+        self._condition = threading.Condition()
+        # 等待名额的协程: [(事件循环, asyncio.Future)]
+        self._async_waiters = []
+        self.inflight = 0
+        # {命令类型: [近期平均耗时, 长期平均耗时]}
+        self.latencies = {}
+        self._last_decrease = 0.0
+        self.configure(max_limit, initial, min_limit)
+
+    def configure(self, max_limit=DEFAULT_MAX_CONCURRENCY, initial=DEFAULT_INITIAL_CONCURRENCY, min_limit=1):
+        """
+        设置并发硬上限和初始上限
+        """
+        with self._condition:
+            self.max_limit = max(1, int(max_limit))
+            self.min_limit = max(1, min(int(min_limit), self.max_limit))
+            self.limit = float(max(self.min_limit, min(int(initial), self.max_limit)))
+            svn_metrics.SVN_CONCURRENCY_LIMIT.set(int(self.limit))
+            self._notify()
+
+    def _notify(self):
+        # 唤醒等待名额的线程和协程，由它们重新检查是否有空闲名额
+        self._condition.notify_all()
+        waiters, self._async_waiters = self._async_waiters, []
+        for loop, waiter in waiters:
+            loop.call_soon_threadsafe(_wake, waiter)
+
+    def acquire(self, blocking=True):
+        """
+        获取一个并发名额，blocking为False且没有空闲名额时返回False
+        """
+        with self._condition:
+            while self.inflight >= int(self.limit):
+                if not blocking:
+                    return False
+                self._condition.wait()
+            self.inflight += 1
+            svn_metrics.SVN_INFLIGHT.set(self.inflight)
+            return True
+
+    async def acquire_async(self):
+        """
+        在事件循环中等待并获取一个并发名额（不阻塞事件循环线程）
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._condition:
+                if self.inflight < int(self.limit):
+                    self.inflight += 1
+                    svn_metrics.SVN_INFLIGHT.set(self.inflight)
+                    return
+                waiter = loop.create_future()
+                self._async_waiters.append((loop, waiter))
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                with self._condition:
+                    if (loop, waiter) in self._async_waiters:
+                        self._async_waiters.remove((loop, waiter))
+                raise
+
+    def release(self, command_type, elapsed, overloaded):
+        """
+        归还名额并根据本次调用的结果调整并发上限
+        :param command_type: 命令类型，按类型维护基准耗时
+        :param elapsed: 调用耗时（秒）
+        :param overloaded: 是否出现超时或临时错误
+        """
+        with self._condition:
+            self.inflight -= 1
+            svn_metrics.SVN_INFLIGHT.set(self.inflight)
+            if not overloaded and elapsed is not None:
+                latency = self.latencies.get(command_type)
+                if latency is None:
+                    latency = self.latencies[command_type] = [elapsed, elapsed]
+                latency[0] += (elapsed - latency[0]) * SHORT_ALPHA
+                latency[1] += (elapsed - latency[1]) * LONG_ALPHA
+                overloaded = latency[0] > latency[1] * LATENCY_TOLERANCE and latency[0] > 0.05
+
+            now = time.monotonic()
+            if overloaded:
+                if now - self._last_decrease >= DECREASE_COOLDOWN:
+                    self._last_decrease = now
+                    self.limit = max(float(self.min_limit), self.limit * DECREASE_RATIO)
+            else:
+                self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+            svn_metrics.SVN_CONCURRENCY_LIMIT.set(int(self.limit))
+            self._notify()
+
+    def discard(self):
+        """
+        归还被取消的调用（未胜出的对冲请求）的名额，不调整并发上限：
+        对冲只在耗时偏长时发起，其结果既不能视为正常完成，也不代表服务端出错
+        """
+        with self._condition:
+            self.inflight -= 1
+            svn_metrics.SVN_INFLIGHT.set(self.inflight)
+            self._notify()
+
+
+def _wake(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+# 进程内所有svn调用共用的并发限制
+LIMITER = AdaptiveLimiter()
+
+
+class _Attempt:
+    """
+    一次子进程调用，可在其他线程中取消
+    """
+
+    def __init__(self, cmd, timeout, text, max_bytes, engine=None):
+        self.cmd = cmd
+        self.timeout = timeout
+        self.text = text
+        self.max_bytes = max_bytes
+        self.engine = engine
+        self.process = None
+        self.future = None
+        self.result = None
+        self.error = None
+        self.cancelled = False
+        self.elapsed = 0.0
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+            if self.process is not None:
+                self.process.kill()
+            if self.future is not None:
+                self.future.cancel()
+
+    def run(self):
+        start = time.perf_counter()
+        try:
+            self.result = self._run()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.elapsed = time.perf_counter() - start
+
+    async def run_async(self):
+        """
+        在当前事件循环中执行，任务被取消时终止子进程并标记为已取消
+        """
+        start = time.perf_counter()
+        try:
+            self.result = await svn_async.run_command(self.cmd, self.timeout, self.text, self.max_bytes)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        except Exception as e:
+            self.error = e
+        finally:
+            self.elapsed = time.perf_counter() - start
+
+    def _run(self):
+        if self.engine is not None:
+            # 在事件循环中执行，取消时由事件循环终止子进程
+            future = self.engine.submit(self.cmd, self.timeout, self.text, self.max_bytes)
+            with self._lock:
+                self.future = future
+                if self.cancelled:
+                    future.cancel()
+            return future.result()
+
+        timed_out = threading.Event()
+        with subprocess.Popen(self.cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE) as process:
+            with self._lock:
+                self.process = process
+                if self.cancelled:
+                    process.kill()
+
+            def kill():
+                timed_out.set()
+                process.kill()
+
+            stderr_chunks = []
+            stderr_reader = threading.Thread(target=lambda: stderr_chunks.append(process.stderr.read()), daemon=True)
+            stderr_reader.start()
+            timer = threading.Timer(self.timeout, kill)
+            timer.start()
+            chunks = []
+            size = 0
+            truncated = False
+            try:
+                while True:
+                    chunk = process.stdout.read1(_READ_SIZE)
+                    if not chunk:
+                        break
+                    chunks.append(chunk)
+                    size += len(chunk)
+                    if self.max_bytes and size > self.max_bytes:
+                        truncated = True
+                        process.kill()
+                        break
+                process.wait()
+                stderr_reader.join()
+            finally:
+                timer.cancel()
+        if timed_out.is_set() and not truncated:
+            raise subprocess.TimeoutExpired(self.cmd, self.timeout)
+
+        stdout = b''.join(chunks)
+        if truncated:
+            stdout = stdout[:self.max_bytes]
+        stderr = b''.join(stderr_chunks)
+        if self.text:
+            stdout = stdout.decode('utf-8', errors='replace')
+            stderr = stderr.decode('utf-8', errors='replace')
+        result = subprocess.CompletedProcess(self.cmd, process.returncode, stdout, stderr)
+        result.truncated = truncated
+        return result
+
+
+def _status(attempt):
+    if attempt.error is not None:
+        return 'timeout' if isinstance(attempt.error, subprocess.TimeoutExpired) else 'error'
+    if attempt.result.truncated:
+        return 'truncated'
+    return 'ok' if attempt.result.returncode == 0 else 'failed'
+
+
+def _record(attempt, command_type):
+    status = _status(attempt)
+    svn_metrics.SVN_COMMAND_SECONDS.observe(attempt.elapsed, command=command_type, status=status)
+    if attempt.result is not None:
+        stdout = attempt.result.stdout or b''
+        svn_metrics.SVN_BYTES_RECEIVED.inc(len(stdout.encode('utf-8') if isinstance(stdout, str) else stdout),
+                                          command=command_type)
+    return status
+
+
+def hedge_delay(command_type, min_samples=DEFAULT_HEDGE_MIN_SAMPLES):
+    """
+    对冲请求的等待时间：该命令成功调用耗时的 p95，样本不足时返回None（不对冲）
+    """
+    series = svn_metrics.SVN_COMMAND_SECONDS.snapshot().get((command_type, 'ok'))
+    if not series or series[-2] < min_samples:
+        return None
+    return svn_metrics.SVN_COMMAND_SECONDS.quantile(HEDGE_QUANTILE, series=series)
+
+
+def _run_limited(attempt, command_type, limiter):
+    """
+    在已获取的并发名额内执行调用，结束后归还名额并反馈耗时和是否过载
+    （被取消的对冲请求只归还名额，不计入耗时，也不调整并发上限）
+    """
+    try:
+        attempt.run()
+    finally:
+        if attempt.cancelled:
+            limiter.discard()
+        else:
+            limiter.release(command_type, attempt.elapsed, _retryable(attempt))
+
+
+async def _run_limited_async(attempt, command_type, limiter):
+    """
+    _run_limited 的协程版本
+    """
+    try:
+        await attempt.run_async()
+    finally:
+        if attempt.cancelled:
+            limiter.discard()
+        else:
+            limiter.release(command_type, attempt.elapsed, _retryable(attempt))
+
+
+def _run_hedged(cmd, command_type, timeout, text, max_bytes, delay, limiter, engine=None):
+    """
+    执行一次调用；超过 delay 秒仍未完成、且并发限制有空闲名额时发起对冲请求，返回先成功的尝试
+    调用前已为首个请求获取并发名额
+    """
+    finished = threading.Condition()
+    attempts = []
+
+    def start(attempt):
+        def target():
+            _run_limited(attempt, command_type, limiter)
+            with finished:
+                finished.notify_all()
+        attempts.append(attempt)
+        threading.Thread(target=target, daemon=True).start()
+
+    def done(attempt):
+        return attempt.result is not None or attempt.error is not None
+
+    primary = _Attempt(cmd, timeout, text, max_bytes, engine)
+    start(primary)
+    with finished:
+        finished.wait_for(lambda: done(primary), timeout=delay)
+        if not done(primary) and limiter.acquire(blocking=False):
+            start(_Attempt(cmd, timeout, text, max_bytes, engine))
+        while True:
+            completed = [attempt for attempt in attempts if done(attempt)]
+            winner = next((attempt for attempt in completed if _status(attempt) in ('ok', 'truncated')), None)
+            if winner is not None or len(completed) == len(attempts):
+                break
+            finished.wait()
+
+    winner = winner or primary
+    for attempt in attempts:
+        if attempt is not winner:
+            attempt.cancel()
+    if len(attempts) > 1:
+        svn_metrics.SVN_HEDGED.inc(command=command_type, winner='primary' if winner is primary else 'hedge')
+    return winner
+
+
+async def _run_hedged_async(cmd, command_type, timeout, text, max_bytes, delay, limiter):
+    """
+    _run_hedged 的协程版本：两个尝试都是当前事件循环中的任务，未胜出的任务被取消
+    """
+    primary = _Attempt(cmd, timeout, text, max_bytes)
+    tasks = {asyncio.ensure_future(_run_limited_async(primary, command_type, limiter)): primary}
+    try:
+        done, pending = await asyncio.wait(tasks, timeout=delay)
+        if not done and limiter.acquire(blocking=False):
+            hedge = _Attempt(cmd, timeout, text, max_bytes)
+            tasks[asyncio.ensure_future(_run_limited_async(hedge, command_type, limiter))] = hedge
+        winner = None
+        pending = set(tasks)
+        while pending and winner is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            winner = next((tasks[task] for task in done if _status(tasks[task]) in ('ok', 'truncated')), None)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    winner = winner or primary
+    if len(tasks) > 1:
+        svn_metrics.SVN_HEDGED.inc(command=command_type, winner='primary' if winner is primary else 'hedge')
+    return winner
+
+
+def _retryable(attempt):
+    status = _status(attempt)
+    if status == 'timeout':
+        return True
+    if status != 'failed':
+        return False
+    stderr = attempt.result.stderr or b''
+    if isinstance(stderr, bytes):
+        stderr = stderr.decode('utf-8', errors='replace')
+    return not any(code in stderr for code in PERMANENT_ERRORS)
+
+
+def run_svn_command(cmd, command_type, timeout=None, text=False, max_bytes=0,
+                    retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF, hedge=False,
+                    hedge_min_samples=DEFAULT_HEDGE_MIN_SAMPLES, limiter=None, engine=None):
+    """
+    执行svn子进程命令，超时或临时错误时重试，可选对冲请求；每次调用前等待并发名额
+    :param cmd: 命令参数列表
+    :param command_type: 命令类型（log/diff/cat/info/propget），用于超时时间和指标分类
+    :param timeout: 单次调用超时时间（秒），为None时使用 DEFAULT_TIMEOUTS
+    :param text: 是否以文本模式返回输出
+    :param max_bytes: 标准输出最多读取的字节数，超过时终止子进程并将 result.truncated 置为True（0表示不限）
+    :param retries: 最多重试次数
+    :param backoff: 首次重试前的等待时间（秒），之后每次翻倍
+    :param hedge: 是否在耗时超过历史 p95 时发起对冲请求
+    :param hedge_min_samples: 启用对冲所需的最少历史样本数
+    :param limiter: 并发限制，为None时使用进程内共用的 LIMITER
+    :param engine: svn_async.AsyncEngine，为None时每次调用由当前线程读取子进程输出
+    :return: subprocess.CompletedProcess（附加 truncated 属性）
+    :raises subprocess.TimeoutExpired: 重试后仍然超时
+    """
+    if timeout is None:
+        timeout = DEFAULT_TIMEOUTS.get(command_type, 60)
+    limiter = limiter or LIMITER
+    for attempt_index in range(retries + 1):
+        delay = hedge_delay(command_type, hedge_min_samples) if hedge else None
+        limiter.acquire()
+        if delay is not None and delay < timeout:
+            attempt = _run_hedged(cmd, command_type, timeout, text, max_bytes, delay, limiter, engine)
+        else:
+            attempt = _Attempt(cmd, timeout, text, max_bytes, engine)
+            _run_limited(attempt, command_type, limiter)
+        _record(attempt, command_type)
+
+        if attempt_index < retries and _retryable(attempt):
+            svn_metrics.SVN_RETRIES.inc(command=command_type)
+            time.sleep(backoff * (2 ** attempt_index))
+            continue
+        if attempt.error is not None:
+            raise attempt.error
+        return attempt.result
+
+
+async def run_svn_command_async(cmd, command_type, timeout=None, text=False, max_bytes=0,
+                                retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF, hedge=False,
+                                hedge_min_samples=DEFAULT_HEDGE_MIN_SAMPLES, limiter=None):
+    """
+    run_svn_command 的协程版本，在调用方的事件循环中执行子进程（参数和返回值同 run_svn_command）
+    等待并发名额和重试间隔时不占用线程，同时进行的调用数只受并发限制约束
+    """
+    if timeout is None:
+        timeout = DEFAULT_TIMEOUTS.get(command_type, 60)
+    limiter = limiter or LIMITER
+    for attempt_index in range(retries + 1):
+        delay = hedge_delay(command_type, hedge_min_samples) if hedge else None
+        await limiter.acquire_async()
+        if delay is not None and delay < timeout:
+            attempt = await _run_hedged_async(cmd, command_type, timeout, text, max_bytes, delay, limiter)
+        else:
+            attempt = _Attempt(cmd, timeout, text, max_bytes)
+            await _run_limited_async(attempt, command_type, limiter)
+        _record(attempt, command_type)
+
+        if attempt_index < retries and _retryable(attempt):
+            svn_metrics.SVN_RETRIES.inc(command=command_type)
+            await asyncio.sleep(backoff * (2 ** attempt_index))
+            continue
+        if attempt.error is not None:
+            raise attempt.error
+        return attempt.result
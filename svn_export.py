@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+流式导出
+
+把提交记录、文件级统计和按天汇总编码为 CSV / JSON Lines / Parquet 数据块的生成器，
+配合 Flask 的流式响应逐块输出。输入是逐条产生提交记录的迭代器，导出过程中只保留
+一个批次（Parquet为一个行组）的数据，内存占用与导出的时间跨度无关。
+
+Parquet 需要安装 pyarrow，未安装时只支持 CSV 和 JSON Lines。
+"""
+import csv
+import io
+import json
+
+from aggregates import branch_lines
+from path_trie import match_file_details
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # 可选依赖
+    pyarrow = None
+
+# 每批编码的行数（Parquet 的行组大小）
+BATCH_ROWS = 1000
+
+# 各数据集的列: (列名, 类型)，类型用于生成 Parquet schema
+COLUMNS = {
+    'commits': [
+        ('revision', 'int'), ('date', 'str'), ('author', 'str'), ('branches', 'str'),
+        ('files_changed', 'int'), ('lines_added', 'int'), ('lines_deleted', 'int'), ('diff_status', 'str'),
+    ],
+    'files': [
+        ('revision', 'int'), ('date', 'str'), ('author', 'str'), ('branch', 'str'), ('path', 'str'),
+        ('action', 'str'), ('lines_added', 'int'), ('lines_deleted', 'int'),
+    ],
+    'daily': [
+        ('date', 'str'), ('branch', 'str'), ('author', 'str'), ('commits', 'int'),
+        ('files_changed', 'int'), ('lines_added', 'int'), ('lines_deleted', 'int'),
+    ],
+}
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+
+def available_formats():
+    """
+    当前环境支持的导出格式
+    """
+    return [fmt for fmt in FORMATS if fmt != 'parquet' or pyarrow is not None]
+
+
+def commit_rows(commits):
+    """
+    提交记录 -> commits 数据集的行
+    """
+    for commit in commits:
+        yield {
+            'revision': int(commit['revision']),
+            'date': commit['date'][:10],
+            'author': commit['author'],
+            'branches': ','.join(sorted(commit['branches'])),
+            'files_changed': commit['files_changed'],
+            'lines_added': commit['lines_added'],
+            'lines_deleted': commit['lines_deleted'],
+            'diff_status': commit.get('diff_status') or '',
+        }
+
+
+def file_rows(commits):
+    """
+    提交记录 -> files 数据集的行：每个修改的文件一行，行数来自 file_details
+    （按路径后缀与 changed_files 对应，没有文件级明细时为0）
+    """
+    for commit in commits:
+        changed_files = [changed for changed in commit.get('changed_files', [])
+                         if changed.get('path') and changed.get('kind') != 'dir']
+        matched = match_file_details([changed['path'] for changed in changed_files],
+                                     commit.get('file_details') or {})
+        for changed in changed_files:
+            added, deleted = matched.get(changed['path'], (0, 0))
+            yield {
+                'revision': int(commit['revision']),
+                'date': commit['date'][:10],
+                'author': commit['author'],
+                'branch': changed.get('branch') or '',
+                'path': changed['path'],
+                'action': changed.get('action') or '',
+                'lines_added': added,
+                'lines_deleted': deleted,
+            }
+
+
+def daily_rows(commits):
+    """
+    提交记录 -> daily 数据集的行：按 日期/分支/作者 汇总
+    提交按版本号顺序输入时日期也是递增的，只保留当天的汇总，日期变化时输出；
+    版本日期不单调（如修改过svn:date）时同一天可能输出多组行，使用方按键求和即可
+    """
+    day = None
+    buckets = {}
+    for commit in commits:
+        commit_day = commit['date'][:10]
+        if commit_day != day:
+            yield from _daily_bucket_rows(day, buckets)
+            day = commit_day
+            buckets = {}
+        for branch, (files, added, deleted) in branch_lines(commit).items():
+            values = buckets.setdefault((branch, commit['author']), [0, 0, 0, 0])
+            values[0] += 1
+            values[1] += files
+            values[2] += added
+            values[3] += deleted
+    yield from _daily_bucket_rows(day, buckets)
+
+
+def _daily_bucket_rows(day, buckets):
+    for (branch, author), (commits, files, added, deleted) in sorted(buckets.items()):
+        yield {'date': day, 'branch': branch, 'author': author, 'commits': commits,
+               'files_changed': files, 'lines_added': added, 'lines_deleted': deleted}
+
+
+ROWS = {
+    'commits': commit_rows,
+    'files': file_rows,
+    'daily': daily_rows,
+}
+
+
+def export(dataset, commits, fmt='csv'):
+    """
+    将提交记录流式编码为指定数据集和格式
+    :param dataset: commits / files / daily
+    :param commits: 按版本号顺序逐条产生提交记录的迭代器
+    :param fmt: csv / jsonl / parquet
+    :return: bytes 数据块的生成器
+    """
+    if dataset not in ROWS:
+        raise ValueError(f'不支持的数据集: {dataset}')
+    if fmt not in available_formats():
+        raise ValueError(f'不支持的导出格式: {fmt}')
+    rows = ROWS[dataset](commits)
+    columns = COLUMNS[dataset]
+    if fmt == 'csv':
+        return _encode_csv(rows, columns)
+    if fmt == 'jsonl':
+        return _encode_jsonl(rows)
+    return _encode_parquet(rows, columns)
+
+
+def _batches(rows, size=BATCH_ROWS):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _encode_csv(rows, columns):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=[name for name, _ in columns])
+    writer.writeheader()
+    for batch in _batches(rows):
+        writer.writerows(batch)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def _encode_jsonl(rows):
+    for batch in _batches(rows):
+        yield ''.join(json.dumps(row, ensure_ascii=False) + '\n' for row in batch).encode('utf-8')
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Parquet 写入目标：收集写入的字节，由生成器逐块取出
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _encode_parquet(rows, columns):
+    types = {'int': pyarrow.int64(), 'str': pyarrow.string()}
+    schema = pyarrow.schema([(name, types[kind]) for name, kind in columns])
+    sink = _ChunkSink()
+    writer = pyarrow.parquet.ParquetWriter(sink, schema)
+    try:
+        for batch in _batches(rows):
+            writer.write_table(pyarrow.Table.from_pylist(batch, schema=schema))
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    data = sink.drain()
+    if data:
+        yield data
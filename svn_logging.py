@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+分级结构化日志
+
+热点循环（逐版本、逐文件）中的日志使用标准库 logging 的惰性格式化：
+级别未开启时只做一次级别判断，不拼接字符串、不取当前时间。
+逐条进度按时间间隔限流输出，循环结束时输出一行阶段汇总。
+"""
+import logging
+import os
+import sys
+import time
+
+# 根日志名称，各模块使用 svn_stat.<模块> 作为子日志
+ROOT_LOGGER = 'svn_stat'
+# 与原有 print 输出一致的格式: [时间] 模块 - 消息
+LOG_FORMAT = '[%(asctime)s] %(name)s - %(message)s'
+# 日志级别环境变量，优先于配置文件
+LEVEL_ENV = 'SVN_STAT_LOG_LEVEL'
+# 默认进度输出间隔（秒）
+DEFAULT_PROGRESS_INTERVAL = 5.0
+
+_handler = None
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """
+    始终写入当前的 sys.stdout（与 print 行为一致，支持 contextlib.redirect_stdout）
+    """
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+def configure(level=None):
+    """
+    配置日志输出到标准输出（可重复调用，只更新级别）
+    :param level: 日志级别名称（debug/info/warning/error），环境变量 SVN_STAT_LOG_LEVEL 优先
+    """
+    global _handler
+    root = logging.getLogger(ROOT_LOGGER)
+    if _handler is None:
+        _handler = _StdoutHandler()
+        _handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        root.addHandler(_handler)
+        root.propagate = False
+    name = os.environ.get(LEVEL_ENV) or level or 'info'
+    root.setLevel(getattr(logging, str(name).upper(), logging.INFO))
+    return root
+
+
+def get_logger(name):
+    """
+    获取模块日志，首次使用时按默认级别配置
+    :param name: 模块名称，输出为 svn_stat.<name>
+    """
+    if _handler is None:
+        configure()
+    return logging.getLogger(f'{ROOT_LOGGER}.{name}')
+
+
+def format_fields(fields):
+    """
+    将字段字典格式化为 key=value 形式，浮点数保留两位小数
+    """
+    return ' '.join(f'{key}={value:.2f}' if isinstance(value, float) else f'{key}={value}'
+                    for key, value in fields.items())
+
+
+class StageProgress:
+    """
+    逐条处理循环的进度日志：累计各字段的合计值，按时间间隔输出一次进度，
+    结束时输出阶段汇总
+
+    用法:
+        progress = StageProgress(logger, '获取代码行数', len(commits))
+        for commit in commits:
+            ...
+            progress.step(lines_added=added, lines_deleted=deleted)
+        summary = progress.finish()
+    """
+
+    def __init__(self, logger, stage, total, interval=DEFAULT_PROGRESS_INTERVAL):
+        """
+        :param logger: 日志对象
+        :param stage: 阶段名称
+        :param total: 总条数
+        :param interval: 进度输出最短间隔（秒）
+        """
+        self.logger = logger
+        self.stage = stage
+        self.total = total
+        self.interval = interval
+        self.done = 0
+        self.totals = {}
+        self.started = time.perf_counter()
+        self._next_report = self.started + interval
+
+    def step(self, **fields):
+        """
+        记录一条处理完成，累加字段值；到达输出间隔时输出进度
+        """
+        self.done += 1
+        for key, value in fields.items():
+            self.totals[key] = self.totals.get(key, 0) + value
+        now = time.perf_counter()
+        if now >= self._next_report:
+            self._next_report = now + self.interval
+            if self.logger.isEnabledFor(logging.INFO):
+                elapsed = now - self.started
+                self.logger.info('%s 进度 %d/%d rate=%.1f/s %s', self.stage, self.done, self.total,
+                                 self.done / elapsed if elapsed > 0 else 0.0, format_fields(self.totals))
+
+    def finish(self):
+        """
+        输出阶段汇总
+        :return: 汇总字典 {'stage', 'done', 'total', 'seconds', 字段合计...}
+        """
+        seconds = time.perf_counter() - self.started
+        summary = {'stage': self.stage, 'done': self.done, 'total': self.total, 'seconds': round(seconds, 3)}
+        summary.update(self.totals)
+        self.logger.info('%s 完成 %d/%d seconds=%.2f %s', self.stage, self.done, self.total, seconds,
+                         format_fields(self.totals))
+        return summary
@@ -0,0 +1,313 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+运行指标采集
+
+提供线程安全的计数器和直方图，以Prometheus文本格式导出（/api/metrics），
+并支持对两次快照求差，用于在每次分析任务结束时生成阶段耗时汇总。
+"""
+import bisect
+import inspect
+import threading
+import time
+from functools import wraps
+
+# 默认耗时分桶（秒），覆盖从本地解析到慢速svn调用的范围
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+
+def _label_key(label_names, labels):
+    return tuple(str(labels.get(name, '')) for name in label_names)
+
+
+def _format_labels(label_names, key, extra=None):
+    pairs = [(name, value) for name, value in zip(label_names, key)]
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = [f'{name}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+               for name, value in pairs]
+    return '{' + ','.join(escaped) + '}'
+
+
+class Counter:
+    """
+    单调递增计数器，按标签区分序列
+    """
+    type_name = 'counter'
+
+    def __init__(self, name, documentation, label_names=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(self.label_names, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels):
+        return self._values.get(_label_key(self.label_names, labels), 0)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._values)
+
+    def render(self):
+        lines = []
+        for key, value in sorted(self.snapshot().items()):
+            lines.append(f'{self.name}{_format_labels(self.label_names, key)} {value}')
+        return lines
+
+
+class Gauge(Counter):
+    """
+    可增可减的瞬时值
+    """
+    type_name = 'gauge'
+
+    def set(self, value, **labels):
+        key = _label_key(self.label_names, labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram:
+    """
+    累积分桶直方图，记录次数、总和以及各分桶计数
+    """
+    type_name = 'histogram'
+
+    def __init__(self, name, documentation, label_names=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        # {标签键: [各分桶计数..., count, sum]}
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(self.label_names, labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def time(self, **labels):
+        """
+        计时上下文管理器
+        """
+        return _Timer(self, labels)
+
+    def snapshot(self):
+        with self._lock:
+            return {key: list(series) for key, series in self._values.items()}
+
+    def quantile(self, q, series=None, **labels):
+        """
+        根据分桶估算分位数（桶内线性插值）
+        :param q: 分位数，0~1
+        :param series: 可选，直接传入快照中的序列（用于计算两次快照之差的分位数）
+        :return: 估算值（秒），无数据时返回None
+        """
+        if series is None:
+            series = self._values.get(_label_key(self.label_names, labels))
+        if not series or series[-2] <= 0:
+            return None
+        target = q * series[-2]
+        cumulative = 0
+        lower = 0.0
+        for i, upper in enumerate(self.buckets):
+            count = series[i]
+            if count and cumulative + count >= target:
+                return lower + (upper - lower) * (target - cumulative) / count
+            cumulative += count
+            lower = upper
+        return self.buckets[-1]
+
+    def render(self):
+        lines = []
+        for key, series in sorted(self.snapshot().items()):
+            cumulative = 0
+            for i, upper in enumerate(self.buckets):
+                cumulative += series[i]
+                lines.append(f'{self.name}_bucket{_format_labels(self.label_names, key, ("le", upper))} {cumulative}')
+            lines.append(f'{self.name}_bucket{_format_labels(self.label_names, key, ("le", "+Inf"))} {series[-2]}')
+            lines.append(f'{self.name}_count{_format_labels(self.label_names, key)} {series[-2]}')
+            lines.append(f'{self.name}_sum{_format_labels(self.label_names, key)} {series[-1]:.6f}')
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.elapsed = time.perf_counter() - self.start
+        self.histogram.observe(self.elapsed, **self.labels)
+        return False
+
+
+class Registry:
+    """
+    指标注册表
+    """
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """
+        以Prometheus文本格式导出所有指标
+        """
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type_name}')
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self):
+        return {metric.name: metric.snapshot() for metric in self._metrics}
+
+
+REGISTRY = Registry()
+
+# svn子进程耗时，按命令类型区分（log/diff/cat/propget）
+SVN_COMMAND_SECONDS = REGISTRY.register(Histogram(
+    'svn_stat_svn_command_seconds', 'svn子进程耗时（秒）', ('command', 'status')))
+# svn子进程输出字节数
+SVN_BYTES_RECEIVED = REGISTRY.register(Counter(
+    'svn_stat_svn_bytes_received_total', 'svn子进程标准输出接收的字节数', ('command',)))
+# svn调用重试次数
+SVN_RETRIES = REGISTRY.register(Counter(
+    'svn_stat_svn_retries_total', 'svn子进程因超时或临时错误重试的次数', ('command',)))
+# 对冲请求次数，winner 为先成功的一方（primary/hedge）
+SVN_HEDGED = REGISTRY.register(Counter(
+    'svn_stat_svn_hedged_total', '耗时超过p95后发起对冲请求的次数', ('command', 'winner')))
+# 自适应并发上限与当前并发的svn子进程数
+SVN_CONCURRENCY_LIMIT = REGISTRY.register(Gauge(
+    'svn_stat_svn_concurrency_limit', 'svn子进程当前的自适应并发上限'))
+SVN_INFLIGHT = REGISTRY.register(Gauge(
+    'svn_stat_svn_inflight', '正在执行的svn子进程数'))
+# 处理阶段耗时（解析、写入、统计汇总等）
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    'svn_stat_stage_seconds', '处理阶段耗时（秒）', ('stage',)))
+# 缓存命中/未命中次数
+CACHE_REQUESTS = REGISTRY.register(Counter(
+    'svn_stat_cache_requests_total', '缓存查询次数', ('cache', 'result')))
+# 逐版本获取代码行数的结果（ok/cached/ignored/truncated/failed）
+DIFF_RESULTS = REGISTRY.register(Counter(
+    'svn_stat_diff_results_total', '逐版本获取代码行数的结果次数', ('status',)))
+# 与正在进行的相同版本获取合并、未单独调用svn的次数
+DIFF_COALESCED = REGISTRY.register(Counter(
+    'svn_stat_diff_coalesced_total', '并发获取同一版本diff时合并为一次svn调用的次数'))
+
+
+def timed_stage(stage):
+    """
+    装饰器：记录函数执行耗时到 STAGE_SECONDS
+    装饰协程函数时记录协程从开始到完成的耗时
+    :param stage: 阶段名称
+    """
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with STAGE_SECONDS.time(stage=stage):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with STAGE_SECONDS.time(stage=stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def snapshot():
+    """
+    获取当前所有指标的快照，用于与之后的快照求差
+    """
+    return REGISTRY.snapshot()
+
+
+def summarize_since(before):
+    """
+    计算自某次快照以来的指标增量
+    :param before: snapshot() 的返回值
+    :return: {
+        'commands': {命令: {'count', 'errors', 'seconds', 'p95', 'bytes'}},
+        'stages': {阶段: {'count', 'seconds'}},
+        'cache': {缓存名: {'hit', 'miss'}},
+        'diffs': {结果状态: 次数},
+        'coalesced': 合并的diff获取次数
+    }
+    """
+    after = REGISTRY.snapshot()
+
+    def delta_series(name):
+        old = before.get(name, {})
+        result = {}
+        for key, series in after.get(name, {}).items():
+            if isinstance(series, list):
+                prev = old.get(key, [0] * len(series))
+                diff = [a - b for a, b in zip(series, prev)]
+                if diff[-2]:
+                    result[key] = diff
+            else:
+                diff = series - old.get(key, 0)
+                if diff:
+                    result[key] = diff
+        return result
+
+    commands = {}
+    for (command, status), series in delta_series(SVN_COMMAND_SECONDS.name).items():
+        entry = commands.setdefault(command, {'count': 0, 'errors': 0, 'seconds': 0.0, 'series': None, 'bytes': 0})
+        entry['count'] += series[-2]
+        entry['seconds'] += series[-1]
+        if status != 'ok':
+            entry['errors'] += series[-2]
+        entry['series'] = series if entry['series'] is None else [a + b for a, b in zip(entry['series'], series)]
+    for (command,), received in delta_series(SVN_BYTES_RECEIVED.name).items():
+        commands.setdefault(command, {'count': 0, 'errors': 0, 'seconds': 0.0, 'series': None, 'bytes': 0})
+        commands[command]['bytes'] += received
+    for entry in commands.values():
+        series = entry.pop('series')
+        entry['p95'] = SVN_COMMAND_SECONDS.quantile(0.95, series=series) if series else None
+
+    stages = {}
+    for (stage,), series in delta_series(STAGE_SECONDS.name).items():
+        stages[stage] = {'count': series[-2], 'seconds': series[-1]}
+
+    cache = {}
+    for (cache_name, result), count in delta_series(CACHE_REQUESTS.name).items():
+        cache.setdefault(cache_name, {'hit': 0, 'miss': 0})[result] = count
+
+    diffs = {status: count for (status,), count in delta_series(DIFF_RESULTS.name).items()}
+
+    coalesced = sum(delta_series(DIFF_COALESCED.name).values())
+
+    return {'commands': commands, 'stages': stages, 'cache': cache, 'diffs': diffs, 'coalesced': coalesced}
@@ -0,0 +1,2998 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+SVN统计核心功能
+
+同步SVN日志、获取代码行数变化、生成统计汇总的完整流程，不依赖Flask：
+app.py 在此之上提供Web界面和接口，也可以直接在命令行中执行分析（用于定时任务和CI）:
+    python svn_stats.py --branch-url http://svn.example.com/repo/trunk --start-date 2024-01-01 --output results.json
+"""
+import time
+
+# 模块导入开始时间，用于统计启动耗时
+_import_started = time.perf_counter()
+
+import xml.etree.ElementTree as ET
+import json
+import yaml
+import os
+from datetime import datetime, timedelta
+import subprocess
+import threading
+import hashlib
+import socket
+import fnmatch
+import heapq
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+
+import svn_cache
+import svn_metrics
+import svn_client
+import svn_async
+import svn_logging
+import svn_export
+import log_index
+import log_store
+import result_snapshots
+from path_trie import PathTrie, common_parent
+from downsample import downsample_daily
+from aggregates import AggregateStore, branch_lines
+from execution_log import ExecutionLog
+from singleflight import SingleFlight
+from state_store import StateStore
+
+# 应用根目录，年份日志保存在其下的 logs/ 目录
+ROOT_PATH = os.path.dirname(os.path.abspath(__file__))
+
+# 配置文件路径（优先使用yml格式）
+CONFIG_FILE = os.path.join(os.path.dirname(__file__), 'config.yml')
+
+# 每日图表序列的默认最大点数
+DEFAULT_CHART_MAX_POINTS = 1000
+# 图表默认保留的序列数（其余合并为“其他”）和排名指标
+DEFAULT_CHART_TOP_K = 20
+DEFAULT_CHART_RANK_BY = 'commits'
+CHART_OTHERS_LABEL = '其他'
+# 图表序列的排名指标
+CHART_RANK_METRICS = {
+    'commits': lambda stats: stats['commits'],
+    'files_changed': lambda stats: stats['files_changed'],
+    'lines_added': lambda stats: stats['lines_added'],
+    'lines_deleted': lambda stats: stats['lines_deleted'],
+    'lines_changed': lambda stats: stats['lines_added'] + stats['lines_deleted'],
+}
+# 分析结果快照超过该时间（秒）后在后台刷新
+DEFAULT_SNAPSHOT_MAX_AGE = 3600
+# 后台刷新后仍未更新快照（失败）时，同一查询再次刷新的最短间隔（秒）
+SNAPSHOT_REFRESH_RETRY_SECONDS = 60
+
+# 读取配置
+config = {
+    "svn_base_url": "http://svn.my.com/project/iorder-saas",
+    "default_branch": "trunk",
+    "debug": False,
+    "svn_username": "svnuser",
+    "svn_password": "svnpassword",
+    "log_range_days": 180,
+    "cache_file_retention_days": svn_cache.DEFAULT_RETENTION_DAYS,
+    "cache_max_file_entries": svn_cache.DEFAULT_MAX_FILE_ENTRIES,
+    "cache_max_bytes": svn_cache.DEFAULT_MAX_BYTES,
+    "cache_shard_idle_seconds": svn_cache.DEFAULT_IDLE_SECONDS,
+    "cache_save_interval_seconds": svn_cache.DEFAULT_SAVE_INTERVAL,
+    "log_level": None,
+    "log_progress_interval_seconds": svn_logging.DEFAULT_PROGRESS_INTERVAL,
+    "diff_ignore_patterns": [],
+    "diff_max_bytes": 20 * 1024 * 1024,
+    "repositories": {},
+    "svn_timeouts": {},
+    "svn_retries": svn_client.DEFAULT_RETRIES,
+    "svn_retry_backoff_seconds": svn_client.DEFAULT_BACKOFF,
+    "svn_hedge": False,
+    "svn_hedge_min_samples": svn_client.DEFAULT_HEDGE_MIN_SAMPLES,
+    "svn_max_concurrency": svn_client.DEFAULT_MAX_CONCURRENCY,
+    "svn_initial_concurrency": svn_client.DEFAULT_INITIAL_CONCURRENCY,
+    "svn_engine": "thread",
+    "log_format": "xml",
+    "chart_max_points": DEFAULT_CHART_MAX_POINTS,
+    "chart_top_k": DEFAULT_CHART_TOP_K,
+    "chart_rank_by": DEFAULT_CHART_RANK_BY,
+    "result_snapshots": True,
+    "result_snapshot_max_age_seconds": DEFAULT_SNAPSHOT_MAX_AGE,
+    "result_snapshot_max_files": result_snapshots.DEFAULT_MAX_FILES
+}
+
+# 热点路径日志（逐版本、逐文件），级别未开启时不产生格式化开销
+task_logger = svn_logging.get_logger('task')
+diff_logger = svn_logging.get_logger('diff')
+
+# 加载配置文件
+def load_config():
+    global config
+    
+    # 优先尝试加载yml配置文件
+    if os.path.exists(CONFIG_FILE):
+        try:
+            with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
+                loaded_config = yaml.safe_load(f)
+                if loaded_config:
+                    config.update(loaded_config)
+            print(f"[{datetime.now()}] LOAD - 从yml配置文件加载配置成功: {CONFIG_FILE}")
+            print(f"[{datetime.now()}] LOAD - 当前配置: {config}")
+            return
+        except Exception as e:
+            print(f"[{datetime.now()}] LOAD - 加载yml配置文件失败: {e}")
+    
+    # 如果都不存在，使用默认配置
+    print(f"[{datetime.now()}] LOAD - 未找到配置文件，使用默认配置")
+
+# 启动状态：配置和缓存不在导入时加载，首次请求时加载配置并在后台预热缓存
+startup_status = {
+    'config_loaded': False,
+    'cache_ready': False,
+    'import_seconds': None,
+    'config_seconds': None,
+    'cache_seconds': None,
+    'ready_at': None
+}
+_init_lock = threading.Lock()
+
+# 启动各阶段耗时
+STARTUP_SECONDS = svn_metrics.REGISTRY.register(svn_metrics.Gauge(
+    'svn_stat_startup_seconds', '启动各阶段耗时（秒）', ('phase',)))
+
+# 延迟初始化
+def ensure_initialized():
+    """
+    首次调用时加载配置，并启动后台线程预热默认仓库的缓存分片；之后的调用立即返回
+    """
+    if startup_status['config_loaded']:
+        return
+    with _init_lock:
+        if startup_status['config_loaded']:
+            return
+        start = time.perf_counter()
+        load_config()
+        # 未配置日志级别时，debug模式输出逐版本明细
+        svn_logging.configure(config.get('log_level') or ('debug' if config.get('debug') else 'info'))
+        configure_svn_concurrency()
+        startup_status['config_seconds'] = time.perf_counter() - start
+        startup_status['config_loaded'] = True
+        STARTUP_SECONDS.set(startup_status['config_seconds'], phase='config')
+        
+        threading.Thread(target=_warm_up_cache, name='cache-warm-up', daemon=True).start()
+
+# 按配置设置svn调用的自适应并发限制
+def configure_svn_concurrency():
+    """
+    设置svn子进程的并发硬上限（svn_max_concurrency）和初始并发上限（svn_initial_concurrency）
+    """
+    svn_client.LIMITER.configure(
+        max_limit=config.get('svn_max_concurrency', svn_client.DEFAULT_MAX_CONCURRENCY),
+        initial=config.get('svn_initial_concurrency', svn_client.DEFAULT_INITIAL_CONCURRENCY))
+
+# 后台预热缓存
+def _warm_up_cache():
+    """
+    加载配置的默认仓库的缓存分片，完成后标记服务就绪；其他仓库的分片仍按需加载
+    只使用已保存的仓库信息，不调用 svn info：SVN服务器不可用时不延迟就绪（仓库信息未知时分片在首次使用时加载）
+    """
+    start = time.perf_counter()
+    try:
+        info = get_known_repository_info(config.get('svn_base_url')) if config.get('svn_base_url') else None
+        if info is not None:
+            cache_store.get(info['id'], {'uuid': info['uuid'], 'root': info['root']})
+    except Exception as e:
+        print(f"[{datetime.now()}] LOAD - 预热缓存失败，缓存将在首次使用时加载: {e}")
+    finally:
+        startup_status['cache_seconds'] = time.perf_counter() - start
+        startup_status['cache_ready'] = True
+        startup_status['ready_at'] = datetime.now().isoformat()
+        STARTUP_SECONDS.set(startup_status['cache_seconds'], phase='cache')
+        print(f"[{datetime.now()}] LOAD - 启动完成: 模块导入 {startup_status['import_seconds'] or 0:.3f}s，"
+              f"加载配置 {startup_status['config_seconds'] or 0:.3f}s，预热缓存 {startup_status['cache_seconds']:.3f}s")
+
+
+# 缓存目录
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache')
+# 旧版单文件缓存路径（仅用于迁移到按仓库分片的缓存）
+CACHE_FILE = os.path.join(CACHE_DIR, 'svn_cache.json')
+
+# 缓存结构设计（每个仓库一个分片文件: cache/shards/<仓库UUID>.json）:
+# {
+#     "version": "1.2",
+#     "repository": {"uuid": "...", "root": "http://svn.example.com/repo"},
+#     "cache": {
+#         "revision_file": {
+#             "file_cache_key": {
+#                 "revision": "600100",
+#                 "file_path": "/path/to/file.java",
+#                 "hash": "md5_hash_of_file_content",
+#                 "author": "user123",
+#                 "lines_added": 10,
+#                 "lines_deleted": 5,
+#                 "timestamp": 1620000000
+#             }
+#         },
+#         "revision_summary": {
+#             "revision_cache_key": {
+#                 "revision": "600100",
+#                 "branch_url": "http://svn.example.com/repo",
+#                 "total_lines_added": 100,
+#                 "total_lines_deleted": 50,
+#                 "file_count": 10,
+#                 "file_list": ["/path/to/file.java"],   # 文件级缓存被淘汰后移除
+#                 "compacted": false,                      # 文件级缓存被淘汰后为true
+#                 "compacted_at": 1620000000,              # 淘汰时间（仅压缩后存在）
+#                 "timestamp": 1620000000
+#             }
+#         }
+#     }
+# }
+
+# 全局缓存存储：按仓库分片，首次访问时加载，空闲时卸载
+cache_store = svn_cache.ShardedCache(CACHE_DIR, config=config, legacy_file=CACHE_FILE)
+
+# 正在获取的diff：(仓库ID, 版本号, 忽略规则, diff上限) 相同的并发获取共用一次svn调用
+diff_flights = SingleFlight()
+
+# 仓库信息缓存：{分支URL: 仓库信息}、{仓库根URL: 仓库信息}
+_repository_info_by_url = {}
+_repository_info_by_root = {}
+# svn info 失败时的临时仓库信息：{基础URL或分支URL: (过期时间, 仓库信息)}，过期后重新获取
+_repository_info_fallbacks = {}
+# 临时仓库信息的有效时间（秒）
+REPOSITORY_INFO_RETRY_SECONDS = 60
+# 共享状态中保存已获取的仓库信息的键前缀（后接URL），进程重启和其他worker无需重新 svn info
+REPOSITORY_INFO_KEY_PREFIX = 'repository_info:'
+
+# 查询已获取过的仓库信息
+def get_known_repository_info(branch_url):
+    """
+    只查询已获取过的仓库信息（进程内缓存和共享状态中保存的），不调用svn
+    :param branch_url: SVN分支URL；不是完整URL时按配置的SVN基础URL查询
+    :return: {'id', 'uuid', 'root'}，未获取过时为None
+    """
+    branch_url = (branch_url or '').rstrip('/')
+    if '://' not in branch_url:
+        branch_url = config.get('svn_base_url', '').rstrip('/')
+    if branch_url in _repository_info_by_url:
+        return _repository_info_by_url[branch_url]
+    for root, info in _repository_info_by_root.items():
+        if branch_url == root or branch_url.startswith(root + '/'):
+            _repository_info_by_url[branch_url] = info
+            return info
+    try:
+        info = state_store.get(REPOSITORY_INFO_KEY_PREFIX + branch_url)
+    except Exception as e:
+        print(f"[{datetime.now()}] cache - 读取已保存的仓库信息失败 ({branch_url}): {e}")
+        return None
+    if not info or not info.get('root'):
+        return None
+    _repository_info_by_root[info['root']] = info
+    _repository_info_by_url[branch_url] = info
+    return info
+
+# 获取分支所属的仓库信息
+def get_repository_info(branch_url, username=None, password=None):
+    """
+    获取分支URL所属仓库的UUID和根URL（通过 svn info，结果按URL和仓库根缓存）
+    svn info 失败时返回以URL为标识的临时仓库信息，只保留 REPOSITORY_INFO_RETRY_SECONDS 秒，
+    之后重新获取，避免一次临时错误使该仓库的缓存在整个进程生命周期内写入以URL为标识的分片
+    :param branch_url: SVN分支URL
+    :param username: SVN用户名
+    :param password: SVN密码
+    :return: {'id': 仓库标识, 'uuid': 仓库UUID, 'root': 仓库根URL}
+    """
+    branch_url = (branch_url or '').rstrip('/')
+    info = get_known_repository_info(branch_url)
+    if info is not None:
+        _repository_info_by_url[branch_url] = info
+        return info
+    
+    # 不是完整URL（如仓库内路径）时，按配置的SVN基础URL确定仓库
+    target_url = branch_url
+    if '://' not in target_url:
+        target_url = config.get('svn_base_url', '').rstrip('/')
+    
+    # 获取失败时以配置的基础URL作为仓库标识（分支不在基础URL下时使用分支URL本身），只临时保留
+    base_url = config.get('svn_base_url', '').rstrip('/')
+    fallback_url = base_url if base_url and target_url.startswith(base_url) else target_url
+    fallback = _repository_info_fallbacks.get(fallback_url)
+    if fallback is not None and fallback[0] > time.monotonic():
+        return fallback[1]
+    
+    info = None
+    cmd = ['svn', 'info', '--xml', '--no-auth-cache']
+    if username:
+        cmd.extend(['--username', username])
+    if password:
+        cmd.extend(['--password', password])
+    cmd.append(target_url)
+    try:
+        result = run_svn_command(cmd, 'info', timeout=60)
+        if result.returncode == 0:
+            root_element = ET.fromstring(result.stdout.decode('utf-8', errors='replace'))
+            repos_root = root_element.findtext('entry/repository/root')
+            repos_uuid = root_element.findtext('entry/repository/uuid')
+            if repos_root:
+                repos_root = repos_root.rstrip('/')
+                info = {'id': repos_uuid or repos_root, 'uuid': repos_uuid, 'root': repos_root}
+                _repository_info_by_root[repos_root] = info
+                print(f"[{datetime.now()}] cache - 分支 {target_url} 所属仓库: {repos_root} ({repos_uuid})")
+    except Exception as e:
+        print(f"[{datetime.now()}] cache - 获取仓库信息失败 ({target_url}): {e}")
+    
+    if info is None:
+        info = {'id': fallback_url, 'uuid': None, 'root': fallback_url}
+        _repository_info_fallbacks[fallback_url] = (time.monotonic() + REPOSITORY_INFO_RETRY_SECONDS, info)
+        return info
+    
+    _repository_info_fallbacks.pop(fallback_url, None)
+    _repository_info_by_url[branch_url] = info
+    _repository_info_by_url[target_url] = info
+    try:
+        state_store.set(REPOSITORY_INFO_KEY_PREFIX + target_url, info)
+    except Exception as e:
+        print(f"[{datetime.now()}] cache - 保存仓库信息失败 ({target_url}): {e}")
+    return info
+
+# 获取日志路径所在的仓库根URL
+def get_log_repository_root():
+    """
+    日志中的路径相对于仓库根。解析日志时只使用已获取过的仓库信息（不调用svn，查询接口和导出不依赖SVN服务器），
+    分析任务在获取日志时已解析并保存；从未获取过时使用配置的SVN基础URL
+    """
+    info = get_known_repository_info(config.get('svn_base_url', ''))
+    if info is not None:
+        return info['root']
+    return config.get('svn_base_url', '').rstrip('/')
+
+# 获取分支在仓库内的路径
+def get_branch_path(branch_url, username=None, password=None):
+    """
+    获取分支URL相对于仓库根的路径，如 http://svn/repo/trunk/module -> /trunk/module
+    :return: 仓库内路径（仓库根为空字符串），无法确定时返回None
+    """
+    branch_url = (branch_url or '').rstrip('/')
+    root = get_repository_info(branch_url, username, password)['root']
+    if branch_url == root or branch_url.startswith(root + '/'):
+        return branch_url[len(root):]
+    return None
+
+# 获取仓库级配置
+def get_repository_setting(branch_url, key, username=None, password=None):
+    """
+    获取配置项：repositories 中为分支所属仓库（按仓库根URL或UUID）单独配置的值优先，否则使用全局配置
+    :param branch_url: SVN分支URL
+    :param key: 配置项名称
+    :return: 配置值
+    """
+    overrides = config.get('repositories') or {}
+    if overrides:
+        info = get_repository_info(branch_url, username, password)
+        for name, repo_config in overrides.items():
+            if str(name).rstrip('/') in (info['root'], info['uuid']) and key in (repo_config or {}):
+                return repo_config[key]
+    return config.get(key)
+
+# 判断版本是否只包含复制或目录变更
+def classify_revision(changed_files):
+    """
+    根据日志中的修改路径判断版本是否需要获取diff
+    - copy: 包含目录复制（创建分支/标签），其余路径也都是复制或目录
+    - directory: 只有目录的新增/删除/属性修改
+    :param changed_files: 修改路径列表（parse_svn_log 中的 changed_files）
+    :return: 'copy'、'directory'，需要获取diff时返回None
+    """
+    if not changed_files:
+        return None
+    dir_copy = False
+    for changed in changed_files:
+        is_dir = changed.get('kind') == 'dir'
+        is_copy = bool(changed.get('copyfrom_path'))
+        if not is_dir and not is_copy:
+            return None
+        dir_copy = dir_copy or (is_dir and is_copy)
+    if dir_copy:
+        return 'copy'
+    if all(changed.get('kind') == 'dir' for changed in changed_files):
+        return 'directory'
+    return None
+
+# 判断路径是否匹配忽略规则
+def is_ignored_path(path, patterns):
+    """
+    判断文件路径是否匹配任一忽略规则（glob），规则同时与完整路径和文件名匹配，
+    如 '*.jar'、'*.min.js'、'*/generated/*'
+    :param path: 仓库内路径或相对分支的路径
+    :param patterns: glob规则列表
+    """
+    if not patterns:
+        return False
+    path = path.strip('/')
+    name = path.rsplit('/', 1)[-1]
+    return any(fnmatch.fnmatchcase(path, pattern.strip('/')) or fnmatch.fnmatchcase(name, pattern)
+               for pattern in patterns)
+
+# 获取分支所属仓库的缓存分片
+def get_repository_cache(branch_url, username=None, password=None):
+    """
+    获取分支所属仓库的缓存分片（首次访问时从磁盘加载）
+    :return: svn_cache.CacheShard，缓存数据位于 shard.data
+    """
+    info = get_repository_info(branch_url, username, password)
+    return cache_store.get(info['id'], {'uuid': info['uuid'], 'root': info['root']})
+
+# 保存缓存
+def save_cache(shard=None, force=False):
+    """
+    保存缓存数据
+    :param shard: 要保存的缓存分片；为None时写回所有有修改的分片
+    :param force: 是否忽略保存间隔立即写入
+    """
+    try:
+        if shard is None:
+            cache_store.flush()
+        else:
+            cache_store.save(shard, force)
+        return True
+    except Exception as e:
+        print(f"[{datetime.now()}] cache - 保存缓存失败: {e}")
+        return False
+
+# 生成文件级缓存键
+def generate_file_cache_key(revision, file_path):
+    """
+    生成文件级缓存键
+    :param revision: 版本号
+    :param file_path: 文件路径
+    :return: 缓存键字符串
+    """
+    key_str = f"{revision}|{file_path}"
+    return hashlib.md5(key_str.encode()).hexdigest()
+
+# 生成版本级缓存键
+def generate_revision_cache_key(revision, branch_url):
+    """
+    生成版本级缓存键（缓存按仓库分片，版本号在仓库内唯一）
+    :param revision: 版本号
+    :param branch_url: 分支URL
+    :return: 缓存键字符串
+    """
+    return str(revision)
+
+
+# 按文件获取diff时的最大目标数，超过时获取整个分支的diff
+DIFF_MAX_TARGETS = 100
+# 流式导出时每批读取的日志条目数
+EXPORT_BATCH_ENTRIES = 500
+
+# 执行svn命令并记录指标
+def run_svn_command(cmd, command_type, timeout=None, text=False, max_bytes=0):
+    """
+    执行svn子进程命令（超时/临时错误时按配置重试，可选对冲请求），记录耗时、结果状态和接收的字节数
+    :param cmd: 命令参数列表
+    :param command_type: 命令类型（log/diff/cat/info/propget），用于超时时间和指标分类
+    :param timeout: 超时时间（秒），配置 svn_timeouts 中的同名命令优先
+    :param text: 是否以文本模式获取输出
+    :param max_bytes: 标准输出最多读取的字节数，超过时终止子进程并将 result.truncated 置为True（0表示不限）
+    :return: subprocess.CompletedProcess（附加 truncated 属性）
+    配置 svn_engine 为 async 时子进程由 svn_async 的事件循环执行，当前线程等待结果
+    """
+    return svn_client.run_svn_command(cmd, command_type, text=text, max_bytes=max_bytes,
+                                      engine=svn_async.ENGINE if use_async_engine() else None,
+                                      **svn_command_options(command_type, timeout))
+
+# 在事件循环中执行svn命令
+async def run_svn_command_async(cmd, command_type, timeout=None, text=False, max_bytes=0):
+    """
+    run_svn_command 的协程版本，只能在 svn_async 的事件循环中调用（参数和返回值同 run_svn_command）
+    """
+    return await svn_client.run_svn_command_async(cmd, command_type, text=text, max_bytes=max_bytes,
+                                                  **svn_command_options(command_type, timeout))
+
+# svn调用的超时、重试和对冲配置
+def svn_command_options(command_type, timeout=None):
+    timeouts = config.get('svn_timeouts') or {}
+    return {
+        'timeout': timeouts.get(command_type, timeout),
+        'retries': config.get('svn_retries', svn_client.DEFAULT_RETRIES),
+        'backoff': config.get('svn_retry_backoff_seconds', svn_client.DEFAULT_BACKOFF),
+        'hedge': config.get('svn_hedge', False),
+        'hedge_min_samples': config.get('svn_hedge_min_samples', svn_client.DEFAULT_HEDGE_MIN_SAMPLES),
+    }
+
+# 是否使用 asyncio 执行引擎
+def use_async_engine():
+    return config.get('svn_engine') == 'async'
+
+# 将本次任务的指标汇总写入执行明细
+def append_metrics_summary(before):
+    """
+    汇总自任务开始以来的svn调用、阶段耗时和缓存命中情况，并追加到执行明细
+    :param before: 任务开始时的指标快照（svn_metrics.snapshot()）
+    :return: 指标增量汇总字典
+    """
+    summary = svn_metrics.summarize_since(before)
+    messages = []
+    for command, entry in sorted(summary['commands'].items()):
+        p95 = f"{entry['p95']:.2f}s" if entry['p95'] is not None else '-'
+        messages.append(f"svn {command}: {entry['count']} 次，失败 {entry['errors']} 次，"
+                        f"总耗时 {entry['seconds']:.2f}s，p95 {p95}，接收 {entry['bytes'] / 1024:.1f} KB")
+    for stage, entry in sorted(summary['stages'].items()):
+        messages.append(f"阶段 {stage}: {entry['count']} 次，总耗时 {entry['seconds']:.2f}s")
+    for cache_name, entry in sorted(summary['cache'].items()):
+        total = entry['hit'] + entry['miss']
+        rate = entry['hit'] * 100.0 / total if total else 0.0
+        messages.append(f"缓存 {cache_name}: 命中 {entry['hit']} 次，未命中 {entry['miss']} 次，命中率 {rate:.1f}%")
+    if summary['diffs']:
+        messages.append('代码行数获取结果: ' + '，'.join(f'{status} {count} 个版本'
+                                                   for status, count in sorted(summary['diffs'].items())))
+    if summary['coalesced']:
+        messages.append(f"合并的重复diff获取: {summary['coalesced']} 次")
+    
+    for message in messages:
+        print(f"[{datetime.now()}] SVN任务 - 指标汇总 - {message}")
+        task_status['execution_details'].append({
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'message': f'指标汇总 - {message}',
+            'level': 'info'
+        })
+    return summary
+
+# 全局任务状态
+task_status = {
+    'running': False,
+    'progress': 0,
+    'message': '',
+    'completed': False,
+    'error': None,
+    'execution_details': ExecutionLog()  # 执行明细（定长环形缓冲区）
+}
+
+# 初始化分析结果，不从缓存加载
+analysis_results = {}
+# 分析结果对应的目录前缀树，以及其对应的共享分析结果版本号
+analysis_trie = PathTrie()
+_analysis_trie_version = None
+# 按筛选条件保存的增量统计汇总，重新分析时只应用变化的版本
+aggregate_store = AggregateStore(CACHE_DIR)
+# 按查询保存的分析结果快照，重启后首次查询时从磁盘加载
+snapshot_store = result_snapshots.SnapshotStore(CACHE_DIR, config=config)
+# 正在后台刷新的快照签名，以及各签名最近一次开始刷新的时间
+_snapshot_refreshing = set()
+_snapshot_refresh_started = {}
+_snapshot_lock = threading.Lock()
+
+# ==================== 多进程共享状态 ====================
+# gunicorn 多worker时，任务状态和分析结果保存在共享的SQLite中，
+# 轮询请求无论落在哪个worker上都能读到同一份状态
+STATE_DB_FILE = os.path.join(CACHE_DIR, 'state.db')
+state_store = StateStore(STATE_DB_FILE)
+# 当前进程标识，记录任务由哪个worker执行
+_task_owner = f"{socket.gethostname()}:{os.getpid()}"
+# 运行中的任务超过该时间（秒）未更新心跳，视为所在worker已退出
+TASK_HEARTBEAT_TIMEOUT = 30
+# 后台任务发布状态的间隔（秒）
+TASK_PUBLISH_INTERVAL = 0.5
+
+
+def _task_slot_free(current):
+    """
+    判断共享状态中是否没有正在运行的任务（心跳超时的任务视为已终止）
+    """
+    if not current or not current.get('running'):
+        return True
+    return time.time() - current.get('heartbeat', 0) > TASK_HEARTBEAT_TIMEOUT
+
+
+def task_status_snapshot(status):
+    """
+    生成可写入共享存储的任务状态（执行明细序列化为字典），并附带进程标识和心跳
+    """
+    snapshot = dict(status)
+    snapshot['execution_details'] = status['execution_details'].to_dict()
+    snapshot['owner'] = _task_owner
+    snapshot['heartbeat'] = time.time()
+    return snapshot
+
+
+def publish_task_status():
+    """
+    将本进程的任务状态写入共享存储
+    """
+    state_store.set('task_status', task_status_snapshot(task_status))
+
+
+def run_task(target, *args):
+    """
+    在后台线程中执行分析任务，并定期将任务状态发布到共享存储
+    任务完成后先发布分析结果，再发布最终状态，保证读到完成状态时结果已可用
+    """
+    global _analysis_trie_version
+    stop = threading.Event()
+
+    def publisher():
+        while not stop.wait(TASK_PUBLISH_INTERVAL):
+            try:
+                publish_task_status()
+            except Exception as e:
+                print(f"[{datetime.now()}] SVN任务 - 发布任务状态失败: {e}")
+
+    threading.Thread(target=publisher, name='task-status-publisher', daemon=True).start()
+    try:
+        target(*args)
+    finally:
+        stop.set()
+        task_status['running'] = False
+        try:
+            if task_status['completed']:
+                _analysis_trie_version = state_store.set('analysis_results', analysis_results)
+            publish_task_status()
+        except Exception as e:
+            print(f"[{datetime.now()}] SVN任务 - 保存共享任务状态失败: {e}")
+
+# 获取SVN externals配置
+def get_svn_externals(branch_url, username=None, password=None):
+    """
+    从SVN服务器获取指定分支的externals配置，包括特定子目录的externals
+    :param branch_url: SVN分支URL
+    :param username: SVN用户名
+    :param password: SVN密码
+    :return: 包含externals信息的字典列表
+    """
+    global task_status
+    externals = []
+    
+    # 记录开始获取externals
+    task_status['execution_details'].append({
+        'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'message': '开始获取SVN externals配置',
+        'level': 'info'
+    })
+    
+    # 需要检查externals的目录列表
+    check_dirs = [
+        "src/main/java/com/fh/iasp/app",  # 用户指定的Java目录
+        "src/main/resources/com/fh/iasp/app"  # 用户指定的资源目录
+    ]
+    
+    for check_dir in check_dirs:
+        # 构建完整的URL
+        if check_dir:
+            target_url = f"{branch_url.rstrip('/')}/{check_dir}"
+        else:
+            target_url = branch_url
+        
+        # 记录正在检查的目录
+        task_status['execution_details'].append({
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'message': f'正在检查目录: {target_url}',
+            'level': 'info'
+        })
+        
+        cmd = ['svn', 'propget', 'svn:externals', '--no-auth-cache']
+        
+        if username:
+            cmd.extend(['--username', username])
+        if password:
+            cmd.extend(['--password', password])
+        
+        cmd.append(target_url)
+        
+        print(f"[{datetime.now()}] SVN任务 - 正在获取externals配置: {' '.join(cmd)}")
+        
+        try:
+            result = run_svn_command(cmd, 'propget', timeout=300, text=True)
+            
+            if result.returncode != 0:
+                error_msg = f'获取 {target_url} externals失败: {result.stderr}'
+                print(f"[{datetime.now()}] SVN任务 - {error_msg}")
+                task_status['execution_details'].append({
+                    'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+                    'message': error_msg,
+                    'level': 'warning'
+                })
+                continue
+            
+            # 解析结果
+            for line in result.stdout.strip().split('\n'):
+                print(f"[{datetime.now()}] SVN任务 - 解析external: {line}")
+                if line.strip():
+                    # 解析externals行（格式：relative_path external_url）
+                    parts = line.strip().split()
+                    if len(parts) >= 2:
+                        relative_path = parts[0]
+                        app = parts[1]
+                        
+                        # 替换所有以"^/trunk/"开头的SVN路径引用为完整URL
+                        if relative_path.startswith("^/trunk/"):
+                            relative_path = "{}{}".format(config.get("svn_base_url", ""), relative_path)
+                    
+                        
+                        externals.append({
+                            'path': app,
+                            'url': relative_path
+                        })
+                        external_msg = f'发现external: {app} -> {relative_path}'
+                        print(f"[{datetime.now()}] SVN任务 - {external_msg}")
+                        task_status['execution_details'].append({
+                            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+                            'message': external_msg,
+                            'level': 'info'
+                        })
+        except Exception as e:
+            error_msg = f'获取 {target_url} externals发生错误: {e}'
+            print(f"[{datetime.now()}] SVN任务 - {error_msg}")
+            task_status['execution_details'].append({
+                'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'message': error_msg,
+                'level': 'error'
+            })
+            continue
+    
+    # 记录完成获取externals
+    task_status['execution_details'].append({
+        'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'message': f'完成获取externals，共发现 {len(externals)} 个配置',
+        'level': 'info'
+    })
+    
+    print(f"[{datetime.now()}] SVN任务 - 共发现 {len(externals)} 个externals配置")
+    return externals
+
+# 获取文件内容哈希值
+def get_svn_file_content_hash(branch_url, revision, file_path, username=None, password=None):
+    """
+    获取指定版本文件的内容哈希值
+    :param branch_url: SVN分支URL
+    :param revision: 版本号
+    :param file_path: 文件路径
+    :param username: SVN用户名
+    :param password: SVN密码
+    :return: 文件内容的MD5哈希值
+    """
+    try:
+        # 执行命令获取文件内容（不使用encoding参数）
+        result = run_svn_command(_cat_command(branch_url, revision, file_path, username, password), 'cat', timeout=30)
+        return _content_hash(result)
+    except Exception as e:
+        diff_logger.warning('获取文件内容哈希失败 (%s:%s): %s', revision, file_path, e)
+        return None
+
+# 在事件循环中获取文件内容哈希
+async def get_svn_file_content_hash_async(branch_url, revision, file_path, username=None, password=None):
+    """
+    get_svn_file_content_hash 的协程版本
+    """
+    try:
+        result = await run_svn_command_async(_cat_command(branch_url, revision, file_path, username, password),
+                                             'cat', timeout=30)
+        return _content_hash(result)
+    except Exception as e:
+        diff_logger.warning('获取文件内容哈希失败 (%s:%s): %s', revision, file_path, e)
+        return None
+
+# 构建获取文件内容的命令
+def _cat_command(branch_url, revision, file_path, username=None, password=None):
+    # 指定peg版本：目录在之后的版本中被删除或移动时，仍按该版本时的路径获取
+    cmd = ['svn', 'cat', f'-r{revision}', f'{branch_url}/{file_path}@{revision}']
+    
+    if username:
+        cmd.extend(['--username', username])
+    if password:
+        cmd.extend(['--password', password])
+    return cmd
+
+# 由 svn cat 的结果计算内容哈希
+def _content_hash(result):
+    """
+    :return: 文件内容的MD5哈希值，svn返回错误时为None
+    """
+    if result.returncode != 0:
+        return None
+    
+    # 手动解码输出
+    content = ""
+    try:
+        content = result.stdout.decode('utf-8')
+    except UnicodeDecodeError:
+        try:
+            content = result.stdout.decode('gbk')
+        except UnicodeDecodeError:
+            content = result.stdout.decode('latin-1')
+    
+    # 计算MD5哈希值
+    return hashlib.md5(content.encode()).hexdigest()
+    
+# 从SVN服务器获取日志
+@svn_metrics.timed_stage('svn_log')
+def get_svn_log(branch_url, username=None, password=None, revision_range=None):
+    """
+    从SVN服务器获取指定分支的提交记录
+    :param branch_url: SVN分支URL
+    :param username: SVN用户名
+    :param password: SVN密码
+    :param revision_range: 版本范围，格式如"1234:5678"或"HEAD"
+    :return: SVN log的XML字符串
+    """
+ 
+    # 获取该分支的最新版本号
+    latest_revision = get_latest_revision_for_branch(branch_url, username, password)
+    print(f"[{datetime.now()}] SVN-log - 最新版本号: {latest_revision}")
+    
+    # 确定版本范围
+    branch_revision_range = revision_range
+    if latest_revision:
+        # 如果找到最新版本号，使用从最新版本开始的版本范围
+        if revision_range:
+            if ":" in revision_range:
+                start_rev, end_rev = revision_range.split(":")
+                branch_revision_range = f"{latest_revision}:{end_rev}"
+            else:
+                branch_revision_range = f"{latest_revision}:{revision_range}"
+        else:
+            branch_revision_range = f"{latest_revision}:HEAD"
+        
+        task_status['execution_details'].append({
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'message': f'分支 {branch_url} 最新版本号: {latest_revision}，使用版本范围: {branch_revision_range}',
+            'level': 'info'
+        })
+    print(f"[{datetime.now()}] SVN-log - 分支 {branch_url} 版本范围: {branch_revision_range}")
+
+    # 从SVN服务器获取指定分支的提交记录
+    cmd = ['svn', 'log', '--xml', '--verbose', '--no-auth-cache']  # 添加--no-auth-cache参数
+    
+    if username:
+        cmd.extend(['--username', username])
+    if password:
+        cmd.extend(['--password', password])
+    if branch_revision_range:
+        cmd.extend(['-r', branch_revision_range])
+
+    cmd.append(branch_url)
+    
+    print(f"[{datetime.now()}] SVN-log - 正在执行SVN命令: {' '.join(cmd)}")
+    try:
+        # 不使用encoding参数，获取原始字节输出
+        result = run_svn_command(cmd, 'log', timeout=600)  # 增加超时时间到600秒
+        
+        # 手动解码输出
+        stdout = stderr = ""
+        try:
+            stdout = result.stdout.decode('utf-8')
+            stderr = result.stderr.decode('utf-8')
+        except UnicodeDecodeError:
+            print(f"[{datetime.now()}] SVN-log - UTF-8编码解码失败，尝试使用GBK编码")
+            try:
+                stdout = result.stdout.decode('gbk')
+                stderr = result.stderr.decode('gbk')
+            except UnicodeDecodeError:
+                # 如果GBK也失败，尝试使用latin-1（不会失败）
+                stdout = result.stdout.decode('latin-1')
+                stderr = result.stderr.decode('latin-1')
+                print(f"[{datetime.now()}] SVN-log - GBK编码解码失败，使用latin-1编码")
+        
+        if result.returncode != 0:
+            error_msg = f'SVN命令执行失败: {stderr}'
+            print(f"[{datetime.now()}] SVN-log - 错误: {error_msg}")
+            task_status['error'] = error_msg
+            task_status['running'] = False
+            return
+        
+        print(f"[{datetime.now()}] SVN-log - SVN命令执行成功，返回码: {result.returncode}")
+        
+        # 构造并返回结果对象
+        class Result:
+            def __init__(self, stdout, stderr, returncode):
+                self.stdout = stdout
+                self.stderr = stderr
+                self.returncode = returncode
+        
+        return Result(stdout, stderr, result.returncode)
+    except subprocess.TimeoutExpired:
+        error_msg = f'SVN命令超时，请减小版本范围或检查网络连接\n命令: {" ".join(cmd)}'
+        print(f"[{datetime.now()}] SVN-log - 错误: {error_msg}")
+        task_status['error'] = error_msg
+        task_status['running'] = False
+        return
+    except Exception as e:
+        error_msg = f'获取SVN日志失败: {e}'
+        print(f"[{datetime.now()}] SVN-log - 错误: {error_msg}")
+        task_status['error'] = error_msg
+        task_status['running'] = False
+        return
+
+# 从SVN服务器获取特定版本的diff
+@svn_metrics.timed_stage('diff_revision')
+def get_svn_diff(branch_url, revision, username=None, password=None, use_cache=False, changed_files=None,
+                 cache_only=False):
+    """
+    获取特定版本的代码变化，支持细粒度文件缓存和增量分析
+    匹配忽略规则（diff_ignore_patterns）的文件不获取diff；diff输出超过 diff_max_bytes 时停止读取并标记为截断
+    :param branch_url: SVN分支URL
+    :param revision: 版本号
+    :param username: SVN用户名
+    :param password: SVN密码
+    :param use_cache: 是否直接从缓存中获取数据
+    :param changed_files: 日志中该版本修改的文件列表（[{'path', 'kind', 'copyfrom_path'...}]），
+                          用于在获取diff前跳过复制/目录版本、排除忽略的文件
+    :param cache_only: 只读取缓存，缓存中没有时不调用svn（导出时使用）
+    :return: (新增行数, 删除行数, 文件详情字典, 状态)，状态为 ok/cached/copy/directory/ignored/truncated/failed，
+             cache_only 时缓存中没有的版本为 uncached
+    """
+    result, flight_key, fetch_args = _prepare_svn_diff(branch_url, revision, username, password, use_cache,
+                                                       changed_files, cache_only)
+    if result is not None:
+        return result
+    result, shared = diff_flights.do(flight_key, lambda: _fetch_svn_diff(*fetch_args))
+    return _shared_diff_result(result, shared)
+
+# 在事件循环中获取特定版本的diff
+def submit_svn_diff(branch_url, revision, username=None, password=None, use_cache=False, changed_files=None):
+    """
+    get_svn_diff 的事件循环版本（svn_engine 为 async 时 analyze_revisions 使用）：
+    缓存查找在当前线程完成，需要调用svn时把获取协程提交到 svn_async 的事件循环，不占用线程
+    :return: concurrent.futures.Future，结果同 get_svn_diff
+    """
+    result, flight_key, fetch_args = _prepare_svn_diff(branch_url, revision, username, password, use_cache,
+                                                       changed_files)
+    if result is not None:
+        future = Future()
+        future.set_result(result)
+        return future
+
+    @svn_metrics.timed_stage('diff_revision')
+    async def fetch():
+        result, shared = await diff_flights.do_async(flight_key, lambda: _fetch_svn_diff_async(*fetch_args))
+        return _shared_diff_result(result, shared)
+
+    return svn_async.ENGINE.spawn(fetch())
+
+# 获取diff前的跳过判断和缓存查找
+def _prepare_svn_diff(branch_url, revision, username=None, password=None, use_cache=False, changed_files=None,
+                      cache_only=False):
+    """
+    参数同 get_svn_diff；可能调用 svn info 获取仓库信息（按仓库缓存），不能在事件循环中调用
+    :return: (结果, None, None)，需要调用svn获取时为 (None, 合并键, _fetch_svn_diff 的参数)
+    """
+    # 创建分支/标签等只有复制或目录变更的版本，diff是整棵目录树且没有统计意义，不获取diff
+    skip_status = classify_revision(changed_files)
+    if skip_status:
+        diff_logger.debug('版本 %s 只包含%s，跳过diff', revision, '复制' if skip_status == 'copy' else '目录变更')
+        svn_metrics.DIFF_RESULTS.inc(status=skip_status)
+        return (0, 0, {}, skip_status), None, None
+    
+    ignore_patterns = get_repository_setting(branch_url, 'diff_ignore_patterns', username, password) or []
+    max_bytes = get_repository_setting(branch_url, 'diff_max_bytes', username, password) or 0
+    ignore_key = hashlib.md5(json.dumps(sorted(ignore_patterns)).encode('utf-8')).hexdigest() if ignore_patterns else None
+    
+    # 按日志中的修改路径排除忽略的文件：全部被忽略时不获取diff
+    branch_path = get_branch_path(branch_url, username, password)
+    diff_targets = None
+    if ignore_patterns and changed_files:
+        paths = [changed['path'] for changed in changed_files if changed.get('path')]
+        kept = [path for path in paths if not is_ignored_path(path, ignore_patterns)]
+        if paths and not kept:
+            diff_logger.debug('版本 %s 修改的文件均匹配忽略规则，跳过diff', revision)
+            svn_metrics.DIFF_RESULTS.inc(status='ignored')
+            return (0, 0, {}, 'ignored'), None, None
+        if branch_path is not None and len(kept) < len(paths):
+            prefix = branch_path + '/'
+            diff_targets = [path[len(prefix):] for path in kept if path.startswith(prefix)]
+            if not diff_targets or len(diff_targets) > DIFF_MAX_TARGETS:
+                # 目标过多时获取整个分支的diff，解析时再跳过忽略的文件
+                diff_targets = None
+    
+    # 生成版本级缓存键，获取所属仓库的缓存分片
+    revision_cache_key = generate_revision_cache_key(revision, branch_url)
+    shard = get_repository_cache(branch_url, username, password)
+    repo_cache = shard.data['cache']
+    
+    # 如果使用缓存，先检查版本级缓存
+    if use_cache:
+        cached_summary = repo_cache['revision_summary'].get(revision_cache_key)
+        # 忽略规则变化、或截断时的上限小于当前上限时重新获取
+        if cached_summary is not None and (
+                cached_summary.get('ignore_key') != ignore_key
+                or (cached_summary.get('truncated') and (not max_bytes or max_bytes > cached_summary.get('max_bytes', 0)))):
+            cached_summary = None
+        if cached_summary is not None:
+            svn_metrics.CACHE_REQUESTS.inc(cache='revision_summary', result='hit')
+            # 版本级缓存存在，获取缓存的摘要信息
+            total_lines_added = cached_summary['total_lines_added']
+            total_lines_deleted = cached_summary['total_lines_deleted']
+            status = 'truncated' if cached_summary.get('truncated') else 'cached'
+            
+            # 文件级缓存已被淘汰，只保留版本汇总，直接返回汇总数据
+            if cached_summary.get('compacted'):
+                diff_logger.debug('缓存版本 %s 已压缩,使用版本汇总数据', revision)
+                svn_metrics.DIFF_RESULTS.inc(status=status)
+                return (total_lines_added, total_lines_deleted, {}, status), None, None
+            
+            # 其他线程可能正在淘汰该版本的文件级缓存，读取时不假定条目存在
+            file_list = cached_summary.get('file_list', [])
+            
+            need_refresh = False
+            
+            # 构建文件详情字典
+            file_details = {}
+            for file_path in file_list:
+                file_cache_key = generate_file_cache_key(revision, file_path)
+                cached_file = repo_cache['revision_file'].get(file_cache_key)
+                if cached_file is not None:
+                    svn_metrics.CACHE_REQUESTS.inc(cache='revision_file', result='hit')
+                    file_details[file_path] = {
+                        'lines_added': cached_file['lines_added'],
+                        'lines_deleted': cached_file['lines_deleted'],
+                        'cached': True,
+                        'author': cached_file['author']
+                    }
+                else:
+                    svn_metrics.CACHE_REQUESTS.inc(cache='revision_file', result='miss')
+                    # 如果文件缓存不存在，标记为需要重新获取
+                    need_refresh = True
+            if not need_refresh or cache_only:
+                diff_logger.debug('缓存版本 %s 数据存在,使用缓存数据', revision)
+                svn_metrics.DIFF_RESULTS.inc(status=status)
+                return (total_lines_added, total_lines_deleted, file_details, status), None, None
+        else:
+            svn_metrics.CACHE_REQUESTS.inc(cache='revision_summary', result='miss')
+    
+    if cache_only:
+        return (0, 0, {}, 'uncached'), None, None
+    
+    # 同一仓库同一版本的并发获取（定时同步与手动分析重叠、版本出现在多个分支日志中时）合并为一次svn调用
+    flight_key = (shard.repository_id, revision_cache_key, ignore_key, max_bytes)
+    return None, flight_key, (branch_url, revision, username, password, shard, diff_targets, branch_path,
+                              ignore_patterns, ignore_key, max_bytes)
+
+# 合并获取的结果
+def _shared_diff_result(result, shared):
+    if not shared:
+        return result
+    svn_metrics.DIFF_COALESCED.inc()
+    svn_metrics.DIFF_RESULTS.inc(status=result[3])
+    total_lines_added, total_lines_deleted, file_details, status = result
+    # 文件详情由各调用方分别写入自己的提交记录，不共用同一个字典
+    return (total_lines_added, total_lines_deleted,
+            {file_path: dict(details) for file_path, details in file_details.items()}, status)
+
+# 缓存未命中时调用svn获取diff
+def _fetch_svn_diff(branch_url, revision, username, password, shard, diff_targets, branch_path, ignore_patterns,
+                    ignore_key, max_bytes):
+    """
+    调用svn获取并解析一个版本的diff，写入缓存（get_svn_diff 缓存未命中时调用，参数含义同 get_svn_diff）
+    :return: (新增行数, 删除行数, 文件详情字典, 状态)
+    """
+    diff_logger.debug('重新获取svn diff, revision: %s', revision)
+    try:
+        # 使用text=False获取原始字节输出，超过上限时停止读取
+        result = run_svn_command(_diff_command(branch_url, revision, username, password, diff_targets), 'diff',
+                                 timeout=60, max_bytes=max_bytes)
+        parsed = _parse_svn_diff(revision, result, branch_path, ignore_patterns, max_bytes)
+        if parsed is None:
+            return (0, 0, {}, 'failed')
+        # 获取各文件当前版本的哈希值
+        hashes = [get_svn_file_content_hash(branch_url, revision, file_path, username, password)
+                  for file_path, _, _ in parsed[1]]
+        return _store_svn_diff(branch_url, revision, shard, parsed, hashes, ignore_key, max_bytes)
+    except Exception as e:
+        return _diff_failure(revision, e)
+
+# 在事件循环中调用svn获取diff
+async def _fetch_svn_diff_async(branch_url, revision, username, password, shard, diff_targets, branch_path,
+                                ignore_patterns, ignore_key, max_bytes):
+    """
+    _fetch_svn_diff 的协程版本，各文件的内容哈希并发获取（受并发限制约束）
+    """
+    diff_logger.debug('重新获取svn diff, revision: %s', revision)
+    try:
+        result = await run_svn_command_async(_diff_command(branch_url, revision, username, password, diff_targets),
+                                             'diff', timeout=60, max_bytes=max_bytes)
+        parsed = _parse_svn_diff(revision, result, branch_path, ignore_patterns, max_bytes)
+        if parsed is None:
+            return (0, 0, {}, 'failed')
+        hashes = await asyncio.gather(*(get_svn_file_content_hash_async(branch_url, revision, file_path,
+                                                                        username, password)
+                                        for file_path, _, _ in parsed[1]))
+        # 缓存分片按保存间隔写回磁盘，多数调用不写文件
+        return _store_svn_diff(branch_url, revision, shard, parsed, hashes, ignore_key, max_bytes)
+    except Exception as e:
+        return _diff_failure(revision, e)
+
+# 构建获取diff的命令
+def _diff_command(branch_url, revision, username, password, diff_targets):
+    cmd = ['svn', 'diff', '-c', str(revision), '--no-auth-cache']
+    
+    if username:
+        cmd.extend(['--username', username])
+    if password:
+        cmd.extend(['--password', password])
+    
+    # diff目标为修改路径的公共父目录，指定peg版本为该版本：目录在之后的版本中被删除或移动时
+    # 仍按该版本时的路径定位（不带peg时按HEAD定位，会因路径不存在而失败）
+    if diff_targets:
+        # 只获取未被忽略的文件，输出路径仍相对于分支URL
+        cmd.append(f'--old={branch_url}@{revision}')
+        cmd.extend(diff_targets)
+    else:
+        cmd.append(f'{branch_url}@{revision}')
+    return cmd
+
+# 解析diff输出
+def _parse_svn_diff(revision, result, branch_path, ignore_patterns, max_bytes):
+    """
+    按文件统计diff的新增/删除行数，跳过匹配忽略规则的文件
+    :return: (是否截断, [(文件路径, 新增行数, 删除行数)])，svn返回错误时为None
+    """
+    truncated = result.truncated
+    stdout = result.stdout
+    if truncated:
+        # 丢弃截断处不完整的最后一行
+        stdout = stdout[:stdout.rfind(b'\n') + 1]
+    
+    # 手动解码输出
+    diff_output = ""
+    try:
+        diff_output = stdout.decode('utf-8')
+    except UnicodeDecodeError:
+        try:
+            diff_output = stdout.decode('gbk')
+        except UnicodeDecodeError:
+            diff_output = stdout.decode('latin-1')
+    
+    if result.returncode != 0 and not truncated:
+        diff_logger.warning('获取diff失败 (rev %s): %s', revision,
+                            result.stderr.decode('utf-8', errors='replace').strip())
+        svn_metrics.DIFF_RESULTS.inc(status='failed')
+        return None
+    if truncated:
+        diff_logger.warning('版本 %s 的diff超过 %d 字节，已截断', revision, max_bytes)
+    
+    # 解析diff结果
+    
+    files = []
+    
+    # 按 "Index: 路径" 拆分文件块，路径相对于分支URL
+    import re
+    file_blocks = re.split(r'^Index: ', diff_output, flags=re.MULTILINE)[1:]
+    
+    # 遍历所有文件块
+    for block in file_blocks:
+        file_path, _, file_content = block.partition('\n')
+        file_path = file_path.strip()
+        if not file_path:
+            continue
+        repo_path = f'{branch_path}/{file_path}' if branch_path is not None else file_path
+        if is_ignored_path(repo_path, ignore_patterns):
+            continue
+        
+        # 计算该文件的新增和删除行数
+        lines_added = 0
+        lines_deleted = 0
+        
+        for line in file_content.split('\n'):
+            if line.startswith('+') and not line.startswith('+++'):
+                lines_added += 1
+            elif line.startswith('-') and not line.startswith('---'):
+                lines_deleted += 1
+        files.append((file_path, lines_added, lines_deleted))
+    return truncated, files
+
+# 将解析后的diff与文件级缓存比较并写入缓存
+def _store_svn_diff(branch_url, revision, shard, parsed, hashes, ignore_key, max_bytes):
+    """
+    :param parsed: _parse_svn_diff 的返回值
+    :param hashes: 各文件当前版本的内容哈希，与 parsed 中的文件一一对应
+    :return: (新增行数, 删除行数, 文件详情字典, 状态)
+    """
+    revision_cache_key = generate_revision_cache_key(revision, branch_url)
+    repo_cache = shard.data['cache']
+    truncated, files = parsed
+    total_lines_added = 0
+    total_lines_deleted = 0
+    file_details = {}
+    for (file_path, lines_added, lines_deleted), current_file_hash in zip(files, hashes):
+        author = ''
+        # 生成文件级缓存键
+        file_cache_key = generate_file_cache_key(revision, file_path)
+        
+        # 检查文件缓存
+        use_cached = False
+        cached_file = repo_cache['revision_file'].get(file_cache_key)
+        if cached_file is not None:
+            if cached_file['hash'] == current_file_hash:
+                # 文件内容未变化，使用缓存数据
+                lines_added = cached_file['lines_added']
+                lines_deleted = cached_file['lines_deleted']
+                author = cached_file['author']
+                use_cached = True
+                diff_logger.debug('使用缓存文件数据: %s', file_path)
+        svn_metrics.CACHE_REQUESTS.inc(cache='revision_file', result='hit' if use_cached else 'miss')
+        
+        # 如果没有缓存或文件内容变化，更新缓存
+        if not use_cached:
+            # 保存文件级缓存（并发获取diff时与写回磁盘、淘汰互斥）
+            with cache_store.lock:
+                repo_cache['revision_file'][file_cache_key] = {
+                    'revision': revision,
+                    'file_path': file_path,
+                    'hash': current_file_hash,
+                    'author': author,
+                    'lines_added': lines_added,
+                    'lines_deleted': lines_deleted,
+                    'timestamp': int(time.time())
+                }
+        
+        # 累加到总统计
+        total_lines_added += lines_added
+        total_lines_deleted += lines_deleted
+        
+        # 保存文件详情
+        file_details[file_path] = {
+            'lines_added': lines_added,
+            'lines_deleted': lines_deleted,
+            'cached': use_cached,
+            'author': author
+        }
+    
+    # 保存版本级缓存摘要
+    revision_summary = {
+        'revision': revision,
+        'branch_url': branch_url,
+        'total_lines_added': total_lines_added,
+        'total_lines_deleted': total_lines_deleted,
+        'file_count': len(file_details),
+        'file_list': list(file_details.keys()),
+        'timestamp': int(time.time())
+    }
+    if ignore_key:
+        revision_summary['ignore_key'] = ignore_key
+    if truncated:
+        revision_summary['truncated'] = True
+        revision_summary['max_bytes'] = max_bytes
+    with cache_store.lock:
+        repo_cache['revision_summary'][revision_cache_key] = revision_summary
+    
+    # 保存缓存分片（按保存间隔写回磁盘）
+    save_cache(shard)
+    
+    status = 'truncated' if truncated else 'ok'
+    svn_metrics.DIFF_RESULTS.inc(status=status)
+    return (total_lines_added, total_lines_deleted, file_details, status)
+
+# 获取diff出错时记为失败
+def _diff_failure(revision, error):
+    """
+    重试后仍然超时或出现其他错误：记为失败且不写入缓存，下次分析时重新获取（在except块中调用）
+    """
+    if isinstance(error, subprocess.TimeoutExpired):
+        diff_logger.warning('获取diff超时 (rev %s): %ss', revision, error.timeout)
+    else:
+        diff_logger.exception('获取diff失败 (rev %s): %s', revision, error)
+    svn_metrics.DIFF_RESULTS.inc(status='failed')
+    return (0, 0, {}, 'failed')
+
+# 从文件路径中提取分支信息
+def extract_branch(path):
+    if '/src/main/' in path:
+        branch_part = path.split('/src/main/')[0]
+        return branch_part
+    return 'trunk'
+
+
+
+# 获取指定分支的最新版本号
+def get_latest_revision_for_branch(branch_url, username=None, password=None):
+    """
+    从分支所属仓库的缓存分片中获取指定分支的最新版本号
+    :param branch_url: SVN分支URL
+    :param username: SVN用户名
+    :param password: SVN密码
+    :return: 最新版本号，如果没有找到则返回None
+    """
+    try:
+        repo_cache = get_repository_cache(branch_url, username, password).data['cache']
+        
+        # 检查缓存中是否有该分支的版本记录（按版本号数值从新到旧）
+        cache_keys = sorted(repo_cache['revision_summary'].keys(), key=lambda k: int(k) if str(k).isdigit() else 0, reverse=True)
+        for key in cache_keys:
+            cached_summary = repo_cache['revision_summary'][key]
+            if branch_url == cached_summary['branch_url']:
+                latest_revision = cached_summary['revision']
+                print(f"[{datetime.now()}] 从缓存中找到分支 {branch_url} 的最新版本号: {latest_revision}")
+                return latest_revision
+        else:
+            print(f"[{datetime.now()}] 缓存中未找到分支 {branch_url} 的版本记录")
+            return None
+    except Exception as e:
+        print(f"[{datetime.now()}] 获取分支 {branch_url} 最新版本号时出错: {e}")
+        return None
+
+# 获取年份对应的日志文件路径
+def get_year_log_file(year, root_path=None, log_format=None):
+    """
+    获取指定年份的日志文件路径
+    :param year: 年份
+    :param root_path: 根目录路径，默认使用ROOT_PATH
+    :param log_format: 存储格式 xml/jsonl.gz，默认使用配置 log_format
+    :return: 日志文件的绝对路径
+    """
+    if root_path is None:
+        root_path = ROOT_PATH
+    logs_dir = os.path.join(root_path, 'logs')
+    return os.path.join(logs_dir, log_store.log_file_name(year, log_format or get_log_format()))
+
+# 年份日志的存储格式
+def get_log_format():
+    log_format = config.get('log_format') or 'xml'
+    return log_format if log_format in log_store.FORMATS else 'xml'
+
+# 获取所有年份日志文件
+def get_all_year_log_files(start_date=None, end_date=None, root_path=None):
+    """
+    获取所有年份日志文件的列表
+    :param start_date: 开始日期
+    :param end_date: 结束日期   
+    :param root_path: 根目录路径，默认使用ROOT_PATH
+    :return: 日志文件路径列表，按年份从早到晚排序；同一年份两种格式的文件都存在时使用配置的格式
+    """
+    
+    if root_path is None:
+        root_path = ROOT_PATH
+    logs_dir = os.path.join(root_path, 'logs')
+    log_files = []
+    
+    # 解析开始日期和结束日期，提取年份
+    start_year = None
+    end_year = None
+    
+    if start_date:
+        start_year = int(start_date.split('-')[0])
+    
+    if end_date:
+        end_year = int(end_date.split('-')[0])
+    
+    # 查找所有svn_YYYY.log / svn_YYYY.jsonl.gz格式的文件
+    log_format = get_log_format()
+    files_by_year = {}
+    for filename in os.listdir(logs_dir):
+        parsed = log_store.parse_log_file_name(filename)
+        if parsed is None:
+            continue  # 跳过文件名格式不正确的文件
+        year, file_format = parsed
+        
+        # 检查年份是否在指定范围内
+        if ((start_year is None or year >= start_year) and 
+            (end_year is None or year <= end_year)):
+            if year not in files_by_year or file_format == log_format:
+                files_by_year[year] = os.path.join(logs_dir, filename)
+    
+    # 按年份排序
+    log_files = [files_by_year[year] for year in sorted(files_by_year)]
+    return log_files
+
+# 写入SVN日志文件
+@svn_metrics.timed_stage('write_log')
+def write_svn_log(all_log_results):
+    if get_log_format() == 'jsonl.gz':
+        return write_svn_log_records(all_log_results)
+    
+    # 创建字典存储每个版本的最新日志条目（使用revision作为键）
+    logentries_dict = {}
+    old_revisions = 0
+    new_revisions = 0
+    
+    # 读取所有年份日志文件中的现有日志
+    all_log_files = get_all_year_log_files()
+    print(f"[{datetime.now()}] SVN任务 - 找到 {len(all_log_files)} 个年份日志文件")
+    
+    for log_file in all_log_files:
+        if log_store.is_record_log(log_file):
+            # 该年份只有压缩JSON Lines格式的日志（log_format 改回xml后），转换为logentry
+            for record in log_store.scan_records(log_file):
+                logentries_dict[str(record['revision'])] = log_store.record_to_element(record)
+            continue
+        try:
+            # 解析现有日志文件
+            existing_tree = ET.parse(log_file)
+            existing_root = existing_tree.getroot()
+            
+            # 添加现有日志条目
+            for logentry in existing_root.findall('logentry'):
+                revision = logentry.get('revision')
+                logentries_dict[revision] = logentry
+            
+            print(f"[{datetime.now()}] SVN任务 - 从 {log_file} 加载了 {len([entry for entry in existing_root.findall('logentry')])} 个版本")
+        except ET.ParseError as e:
+            print(f"[{datetime.now()}] SVN任务 - 解析 {log_file} 时XML解析错误: {e}")
+            # 尝试修复XML文件
+            with open(log_file, 'r', encoding='utf-8') as f:
+                content = f.read()
+            
+            # 简单的XML修复：移除或替换无效字符
+            import re
+            # 移除所有控制字符，只保留空格、制表符、换行符
+            content = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f]', '', content)
+            # 替换特殊字符为HTML实体
+            content = content.replace('&', '&amp;')
+            
+            # 重新写入修复后的内容
+            with open(log_file, 'w', encoding='utf-8') as f:
+                f.write(content)
+            
+            print(f"[{datetime.now()}] SVN任务 - {log_file} XML文件已修复，重新尝试解析")
+            try:
+                # 重新尝试解析
+                existing_tree = ET.parse(log_file)
+                existing_root = existing_tree.getroot()
+                
+                # 添加现有日志条目
+                for logentry in existing_root.findall('logentry'):
+                    revision = logentry.get('revision')
+                    logentries_dict[revision] = logentry
+                
+                print(f"[{datetime.now()}] SVN任务 - 从修复后的 {log_file} 加载了 {len([entry for entry in existing_root.findall('logentry')])} 个版本")
+            except ET.ParseError as e2:
+                print(f"[{datetime.now()}] SVN任务 - {log_file} 修复后仍无法解析: {e2}")
+                continue
+    
+    old_revisions = len(logentries_dict)
+
+    # 处理所有获取的日志结果（主分支+externals），相同版本会覆盖现有条目，保留最新
+    logentries_dict.update(parse_log_results(all_log_results))
+    
+    new_revisions = len(logentries_dict) - old_revisions
+    
+    print(f"[{datetime.now()}] SVN任务 - 合并完成，共 {len(logentries_dict)} 个唯一版本，新增 {new_revisions} 个版本")
+    
+    # 按年份分组日志条目
+    logentries_by_year = {}
+    for rev in logentries_dict:
+        logentry = logentries_dict[rev]
+        date_str = logentry.find('date').text
+        date = datetime.fromisoformat(date_str[:-1])
+        year = str(date.year)
+        
+        if year not in logentries_by_year:
+            logentries_by_year[year] = []
+        logentries_by_year[year].append(logentry)
+    
+    # 写入每年的日志到对应的文件
+    for year in logentries_by_year:
+        # 按版本号降序排序（最新版本在前）
+        year_logentries = logentries_by_year[year]
+        year_logentries.sort(key=lambda x: int(x.get('revision')), reverse=True)
+        
+        # 构建XML根元素
+        year_root = ET.Element('log')
+        for logentry in year_logentries:
+            year_root.append(logentry)
+        
+        # 获取年份日志文件路径
+        year_log_file = get_year_log_file(year)
+        
+        # 写入日志到文件
+        year_tree = ET.ElementTree(year_root)
+        year_tree.write(year_log_file, encoding='utf-8', xml_declaration=True)
+        print(f"[{datetime.now()}] SVN任务 - 已保存 {year} 年日志到 {year_log_file}，共 {len(year_logentries)} 条记录")
+
+        # 生成日期索引，按日期范围查询时只解析范围内的条目
+        try:
+            log_index.build_log_index(year_log_file, extract_branch)
+        except Exception as e:
+            print(f"[{datetime.now()}] SVN任务 - 生成 {year} 年日志索引失败，查询时将重新生成: {e}")
+
+# 解析从SVN获取的日志结果
+def parse_log_results(all_log_results):
+    """
+    解析 get_svn_log 的结果，XML解析错误时移除无效字符后重试
+    :param all_log_results: 日志结果列表（主分支+externals）
+    :return: {版本号字符串: logentry 元素}，相同版本以后面的结果为准
+    """
+    logentries_dict = {}
+    for log_result in all_log_results:
+        try:
+            # 解析新获取的日志数据
+            new_tree = ET.ElementTree(ET.fromstring(log_result.stdout))
+            new_root = new_tree.getroot()
+            
+            # 添加新日志条目（相同版本会覆盖现有条目，保留最新）
+            for logentry in new_root.findall('logentry'):
+                revision = logentry.get('revision')
+                logentries_dict[revision] = logentry
+        except ET.ParseError as e:
+            print(f"[{datetime.now()}] SVN任务 - 解析新日志结果时XML解析错误: {e}")
+            # 尝试修复XML内容
+            content = log_result.stdout
+            import re
+            # 移除所有控制字符，只保留空格、制表符、换行符
+            content = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f]', '', content)
+            # 替换特殊字符为HTML实体
+            content = content.replace('&', '&amp;')
+            
+            try:
+                # 重新尝试解析修复后的XML
+                new_tree = ET.ElementTree(ET.fromstring(content))
+                new_root = new_tree.getroot()
+                
+                # 添加新日志条目
+                for logentry in new_root.findall('logentry'):
+                    revision = logentry.get('revision')
+                    logentries_dict[revision] = logentry
+                
+                print(f"[{datetime.now()}] SVN任务 - 新日志XML已修复并成功解析")
+            except ET.ParseError as e2:
+                print(f"[{datetime.now()}] SVN任务 - 修复后仍无法解析XML: {e2}")
+                continue
+    return logentries_dict
+
+# 以压缩JSON Lines格式写入SVN日志
+def write_svn_log_records(all_log_results):
+    """
+    按年份写入 svn_YYYY.jsonl.gz：只读取新日志涉及的年份，新版本和内容有变化的版本追加到文件末尾；
+    该年份首次写入时合并已有的XML年份日志（原文件保留，可用 log_store.py migrate 批量迁移）
+    :param all_log_results: 日志结果列表（主分支+externals）
+    """
+    records_by_year = {}
+    for logentry in parse_log_results(all_log_results).values():
+        record = log_store.element_to_record(logentry)
+        records_by_year.setdefault(record['date'][:4], []).append(record)
+    
+    for year, records in sorted(records_by_year.items()):
+        records.sort(key=lambda record: record['revision'])
+        year_log_file = get_year_log_file(year, log_format='jsonl.gz')
+        if os.path.exists(year_log_file):
+            existing = {record['revision']: record for record in log_store.scan_records(year_log_file)}
+            changed = [record for record in records if existing.get(record['revision']) != record]
+            log_store.append_records(year_log_file, changed)
+            print(f"[{datetime.now()}] SVN任务 - {year} 年日志追加 {len(changed)} 条记录到 {year_log_file}，"
+                  f"{len(records) - len(changed)} 条已存在")
+            continue
+        
+        merged = {}
+        xml_log_file = get_year_log_file(year, log_format='xml')
+        if os.path.exists(xml_log_file):
+            root = parse_log_file(xml_log_file)
+            if root is not None:
+                for logentry in root.findall('logentry'):
+                    record = log_store.element_to_record(logentry)
+                    merged[record['revision']] = record
+            print(f"[{datetime.now()}] SVN任务 - 从 {xml_log_file} 合并了 {len(merged)} 个版本")
+        for record in records:
+            merged[record['revision']] = record
+        log_store.write_records(year_log_file, [merged[revision] for revision in sorted(merged)])
+        print(f"[{datetime.now()}] SVN任务 - 已保存 {year} 年日志到 {year_log_file}，共 {len(merged)} 条记录")
+
+# 解析svn.log文件
+@svn_metrics.timed_stage('parse_log')
+def parse_svn_log(startDate=None, endDate=None, filters=None, repository_root=None):
+    """
+    解析一个或多个svn.log文件
+    :param log_files: 单个文件路径字符串或文件路径列表
+    :param startDate: 开始日期
+    :param endDate: 结束日期
+    :param filters: 筛选条件 {'authors', 'branches', 'paths', 'extensions'}，每项为值列表
+    :param repository_root: 仓库根URL（用于生成diff目标），为None时使用已获取过的仓库信息（不调用svn）
+    :return: 提交记录列表
+    """
+
+    # 获取所有年份日志文件
+    log_files = get_all_year_log_files(startDate, endDate)
+    
+    # 如果是单个文件路径，转换为列表
+    if isinstance(log_files, str):
+        log_files = [log_files]
+    
+    print(f"[{datetime.now()}] SVN任务 - 要处理的日志文件: {(log_files)}")
+    all_commits = []
+    
+    # 过滤日期范围
+    parsed_startDate = None
+    parsed_endDate = None
+    if startDate and endDate:
+        parsed_startDate = datetime.fromisoformat(startDate[:])
+        parsed_endDate = datetime.fromisoformat(endDate[:])
+        print(f"[{datetime.now()}] SVN任务 - 要处理的日期范围: {startDate} 到 {endDate}")
+    
+    filters = {field: values for field, values in (filters or {}).items() if values}
+    repository_root = repository_root or get_log_repository_root()
+    
+    for log_file in log_files:
+        # 压缩JSON Lines格式：顺序扫描，只解析日期范围内且可能满足筛选条件的记录
+        if log_store.is_record_log(log_file):
+            records = log_store.scan_records(log_file, startDate, endDate, log_store.filter_patterns(filters))
+            all_commits.extend(commit for commit in parse_log_records(records, parsed_startDate, parsed_endDate,
+                                                                      repository_root)
+                               if commit_matches_filters(commit, filters))
+            continue
+        
+        # 有日期范围或筛选条件时通过索引只解析命中的条目，索引不可用时解析整个文件
+        logentries = None
+        if (parsed_startDate and parsed_endDate) or filters:
+            try:
+                index = log_index.load_log_index(log_file, extract_branch)
+                if parsed_startDate and parsed_endDate:
+                    positions = log_index.select_positions(index, startDate, endDate)
+                else:
+                    positions = range(len(index['entries']))
+                contiguous = index['monotonic'] and not filters
+                if filters:
+                    positions = log_index.filter_positions(index, positions, filters)
+                selected = [index['entries'][position] for position in positions]
+                logentries = log_index.read_entries(log_file, selected, contiguous=contiguous)
+            except Exception as e:
+                print(f"[{datetime.now()}] SVN任务 - 使用索引读取 {log_file} 失败，解析整个文件: {e}")
+        if logentries is not None:
+            all_commits.extend(commit for commit in parse_logentries(logentries, parsed_startDate, parsed_endDate,
+                                                                     repository_root)
+                               if commit_matches_filters(commit, filters))
+            continue
+
+        root = parse_log_file(log_file)
+        if root is None:
+            continue
+        
+        # 解析当前文件的提交记录
+        all_commits.extend(commit for commit in parse_logentries(root.findall('logentry'), parsed_startDate,
+                                                                 parsed_endDate, repository_root)
+                           if commit_matches_filters(commit, filters))
+    
+    # 按revision排序，确保正确顺序
+    all_commits.sort(key=lambda x: int(x['revision']))
+
+    return all_commits
+
+# 解析整个年份日志文件
+def parse_log_file(log_file):
+    """
+    解析整个年份日志文件，XML解析错误时移除无效字符后重试
+    :param log_file: 日志文件路径
+    :return: 根元素，修复后仍无法解析时为None
+    """
+    try:
+        tree = ET.parse(log_file)
+        return tree.getroot()
+    except ET.ParseError as e:
+        print(f"[{datetime.now()}] SVN任务 - 解析 {log_file} 时XML解析错误: {e}")
+        # 尝试修复XML文件
+        with open(log_file, 'r', encoding='utf-8') as f:
+            content = f.read()
+        
+        # 简单的XML修复：移除或替换无效字符
+        import re
+        # 移除所有控制字符，只保留空格、制表符、换行符
+        content = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f]', '', content)
+        # 替换特殊字符为HTML实体
+        content = content.replace('&', '&amp;')
+        
+        # 重新写入修复后的内容
+        with open(log_file, 'w', encoding='utf-8') as f:
+            f.write(content)
+        
+        print(f"[{datetime.now()}] SVN任务 - {log_file} XML文件已修复，重新尝试解析")
+        try:
+            # 重新尝试解析
+            tree = ET.parse(log_file)
+            return tree.getroot()
+        except ET.ParseError as e2:
+            print(f"[{datetime.now()}] SVN任务 - {log_file} 修复后仍无法解析: {e2}")
+            return None
+
+# 按版本号顺序逐批解析日志
+def iter_svn_log(startDate=None, endDate=None, filters=None, batch_size=EXPORT_BATCH_ENTRIES, repository_root=None):
+    """
+    与 parse_svn_log 结果相同的提交记录，按年份日志和索引逐批读取、按版本号顺序逐条产生，
+    内存中只保留一个批次的 logentry（流式导出使用）；索引不可用时解析整个年份日志，
+    压缩JSON Lines格式的年份日志按年份读取
+    :param startDate: 开始日期
+    :param endDate: 结束日期
+    :param filters: 筛选条件 {'authors', 'branches', 'paths', 'extensions'}
+    :param batch_size: 每批读取的日志条目数
+    :param repository_root: 仓库根URL，为None时使用已获取过的仓库信息（不调用svn）
+    :return: 提交记录的生成器
+    """
+    parsed_startDate = None
+    parsed_endDate = None
+    if startDate and endDate:
+        parsed_startDate = datetime.fromisoformat(startDate[:])
+        parsed_endDate = datetime.fromisoformat(endDate[:])
+    filters = {field: values for field, values in (filters or {}).items() if values}
+    repository_root = repository_root or get_log_repository_root()
+    
+    for log_file in get_all_year_log_files(startDate, endDate):
+        if log_store.is_record_log(log_file):
+            # 压缩JSON Lines格式没有字节索引，按年份读取日期范围内的记录后排序输出
+            records = log_store.scan_records(log_file, startDate, endDate, log_store.filter_patterns(filters))
+            records.sort(key=lambda record: record['revision'])
+            for commit in parse_log_records(records, parsed_startDate, parsed_endDate, repository_root):
+                if commit_matches_filters(commit, filters):
+                    yield commit
+            continue
+        
+        selected = None
+        try:
+            index = log_index.load_log_index(log_file, extract_branch)
+            if parsed_startDate and parsed_endDate:
+                positions = log_index.select_positions(index, startDate, endDate)
+            else:
+                positions = range(len(index['entries']))
+            if filters:
+                positions = log_index.filter_positions(index, positions, filters)
+            # 年份日志按版本号降序写入，导出按升序输出
+            selected = sorted((index['entries'][position] for position in positions), key=lambda entry: entry[0])
+        except Exception as e:
+            print(f"[{datetime.now()}] SVN任务 - 使用索引读取 {log_file} 失败，解析整个文件: {e}")
+        
+        if selected is None:
+            root = parse_log_file(log_file)
+            if root is None:
+                continue
+            commits = [commit for commit in parse_logentries(root.findall('logentry'), parsed_startDate,
+                                                             parsed_endDate, repository_root)
+                       if commit_matches_filters(commit, filters)]
+            commits.sort(key=lambda x: int(x['revision']))
+            yield from commits
+            continue
+        
+        for start in range(0, len(selected), batch_size):
+            logentries = log_index.read_entries(log_file, selected[start:start + batch_size])
+            for commit in parse_logentries(logentries, parsed_startDate, parsed_endDate, repository_root):
+                if commit_matches_filters(commit, filters):
+                    yield commit
+
+# 判断提交记录是否满足筛选条件
+def commit_matches_filters(commit, filters):
+    """
+    逐条校验筛选条件（倒排索引按目录层级筛选后的精确校验，以及无索引时的过滤）
+    不同条件之间为“且”，同一条件的多个值之间为“或”
+    :param commit: 提交记录
+    :param filters: 筛选条件 {'authors', 'branches', 'paths', 'extensions'}
+    :return: 是否满足
+    """
+    if not filters:
+        return True
+    if filters.get('authors') and commit['author'] not in filters['authors']:
+        return False
+    if filters.get('branches') and not set(commit['branches']) & set(filters['branches']):
+        return False
+    if filters.get('paths'):
+        prefixes = ['/' + prefix.strip('/') for prefix in filters['paths']]
+        if not any(log_index.path_matches(changed['path'], prefix)
+                   for changed in commit['changed_files'] for prefix in prefixes):
+            return False
+    if filters.get('extensions'):
+        extensions = {ext.lower() if not ext or ext.startswith('.') else '.' + ext.lower()
+                      for ext in filters['extensions']}
+        if not any(log_index.path_extension(changed['path']) in extensions for changed in commit['changed_files']):
+            return False
+    return True
+
+# 将logentry元素转换为提交记录
+def parse_logentries(logentries, parsed_startDate=None, parsed_endDate=None, repository_root=None):
+    """
+    将logentry元素转换为提交记录，并按日期范围过滤
+    :param logentries: logentry 元素列表
+    :param parsed_startDate: 开始日期（datetime），与结束日期同时指定时才过滤
+    :param parsed_endDate: 结束日期（datetime）
+    :param repository_root: 仓库根URL（日志中的路径相对于仓库根），为None时见 get_log_repository_root
+    :return: 提交记录列表
+    """
+    commits = []
+    if repository_root is None and logentries:
+        repository_root = get_log_repository_root()
+    for logentry in logentries:
+        author = logentry.find('author').text if logentry.find('author') is not None else 'unknown'
+        paths = ((path.text, path.attrib) for path in logentry.find('paths').findall('path'))
+        commit = build_commit(logentry.get('revision'), author, logentry.find('date').text, paths,
+                              repository_root, parsed_startDate, parsed_endDate)
+        if commit is not None:
+            commits.append(commit)
+    return commits
+
+# 将压缩JSON Lines日志记录转换为提交记录
+def parse_log_records(records, parsed_startDate=None, parsed_endDate=None, repository_root=None):
+    """
+    与 parse_logentries 相同，输入为 log_store 的记录字典
+    :param records: 记录列表
+    :return: 提交记录列表
+    """
+    commits = []
+    if repository_root is None and records:
+        repository_root = get_log_repository_root()
+    for record in records:
+        paths = ((path.get('path'), path) for path in record.get('paths', ()))
+        commit = build_commit(str(record['revision']), record.get('author', 'unknown'), record['date'], paths,
+                              repository_root, parsed_startDate, parsed_endDate)
+        if commit is not None:
+            commits.append(commit)
+    return commits
+
+# 由一个版本的日志字段生成提交记录
+def build_commit(revision, author, date_str, paths, repository_root, parsed_startDate=None, parsed_endDate=None):
+    """
+    :param revision: 版本号字符串
+    :param author: 作者
+    :param date_str: svn日志中的日期字符串
+    :param paths: 修改路径的 (路径, 属性字典) 序列，属性为 action/kind/copyfrom-path/copyfrom-rev
+    :param repository_root: 仓库根URL
+    :return: 提交记录，日期不在范围内时为None
+    """
+    # 只取日期部分（UTC），不需要解析完整时间
+    date = datetime.fromisoformat(date_str[:10])
+    
+    # 过滤日期范围
+    if parsed_startDate and parsed_endDate:
+        if date < parsed_startDate or date > parsed_endDate:
+            return None
+    
+    # 计算修改的文件数和提取分支信息
+    paths = list(paths)
+    files_changed = len(paths)
+    
+    # 提取所有相关分支和修改的文件信息
+    branches = set()
+    changed_files = []
+    for file_path, attrs in paths:
+        if file_path:
+            action = attrs.get('action') or 'M'  # 默认修改
+            
+            # 提取分支信息
+            branch = extract_branch(file_path)
+            branches.add(branch)
+            
+            # 记录详细的文件修改信息
+            changed_file = {
+                'path': file_path,
+                'action': action,
+                'branch': branch,
+                'kind': attrs.get('kind') or ''  # file/dir，旧版本svn可能没有
+            }
+            # 复制（创建分支/标签、svn copy）的来源
+            if attrs.get('copyfrom-path'):
+                changed_file['copyfrom_path'] = attrs.get('copyfrom-path')
+                changed_file['copyfrom_rev'] = attrs.get('copyfrom-rev')
+            changed_files.append(changed_file)
+
+    # diff目标：所有修改路径在仓库根下的公共父目录，跨分支的提交也只获取一次diff，
+    # 再按文件所属分支拆分行数（见 aggregates.branch_lines）
+    diff_paths = [changed['path'] for changed in changed_files]
+    branch_url = (repository_root + common_parent(diff_paths)).rstrip('/') if diff_paths else repository_root
+    
+    # 代码行数统计（初始化为0，后续通过svn diff获取）
+    lines_added = 0
+    lines_deleted = 0
+    
+    return {
+        'revision': revision,
+        'author': author,
+        'date': date.isoformat(),
+        'date_str': date_str,
+        'branch_url': branch_url,
+        'files_changed': files_changed,
+        'changed_files': changed_files,
+        'branches': list(branches),
+        'lines_added': lines_added,
+        'lines_deleted': lines_deleted
+    }
+
+# 多分支SVN日志获取任务
+def multi_branch_svn_log_task(branches, revision_range, start_date=None, end_date=None):
+    global task_status
+
+    print(f"[{datetime.now()}] SVN任务 - 开始执行多分支SVN代码统计任务")
+    print(f"[{datetime.now()}] SVN任务 - 参数: 分支数量: {len(branches)}, 版本范围: {revision_range}, 开始日期: {start_date}, 结束日期: {end_date}")
+    
+    metrics_before = svn_metrics.snapshot()
+    try:
+        # 重置执行明细
+        task_status['execution_details'] = ExecutionLog()
+        
+        task_status['running'] = True
+        task_status['progress'] = 5
+        task_status['message'] = '正在准备分析多个分支...'
+        
+        # 添加执行明细
+        task_status['execution_details'].append({
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'message': f'开始执行多分支SVN代码统计任务，共 {len(branches)} 个分支',
+            'level': 'info'
+        })
+        
+        # 收集所有分支的日志结果
+        all_branch_results = []
+        
+        # 遍历每个分支
+        for i, branch_config in enumerate(branches, 1):
+            branch_url = branch_config.get('branch_url')
+            username = branch_config.get('username')
+            password = branch_config.get('password')
+            
+            task_status['progress'] = 5 + (i - 1) * 15
+            task_status['message'] = f'正在分析分支 {i}/{len(branches)}...'
+            
+            task_status['execution_details'].append({
+                'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'message': f'开始分析分支 {i}/{len(branches)}: {branch_url}',
+                'level': 'info'
+            })
+            
+            try:
+                
+                # 获取SVN日志（主分支）
+                main_result = get_svn_log(branch_url, username, password, revision_range)
+                
+                # 检查结果是否为None（表示获取失败）
+                if main_result is None:
+                    error_msg = f'获取分支 {branch_url} 日志失败，请检查网络连接或SVN配置'
+                    print(f"[{datetime.now()}] SVN任务 - 错误: {error_msg}")
+                    task_status['execution_details'].append({
+                        'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+                        'message': error_msg,
+                        'level': 'warning'
+                    })
+                    continue
+                
+                # 检查命令执行结果
+                if main_result.returncode != 0:
+                    error_msg = f'分支 {branch_url} SVN命令执行失败: {main_result.stderr}'
+                    print(f"[{datetime.now()}] SVN任务 - 错误: {error_msg}")
+                    task_status['execution_details'].append({
+                        'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+                        'message': error_msg,
+                        'level': 'warning'
+                    })
+                    continue
+                
+                print(f"[{datetime.now()}] SVN任务 - 分支 {branch_url} SVN命令执行成功")
+                all_branch_results.append(main_result)
+                
+                success_msg = f'分支 {branch_url} 日志获取成功， 版本范围: {revision_range}，分支日志数: {len(main_result.stdout)}'
+                print(f"[{datetime.now()}] SVN任务 - {success_msg}")
+                task_status['execution_details'].append({
+                    'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+                    'message': success_msg,
+                    'level': 'success'
+                })
+                
+            except Exception as e:
+                error_msg = f'分支 {branch_url} 处理失败: {e}'
+                print(f"[{datetime.now()}] SVN任务 - 错误: {error_msg}")
+                task_status['execution_details'].append({
+                    'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+                    'message': error_msg,
+                    'level': 'error'
+                })
+                continue
+        
+        if not all_branch_results:
+            task_status['error'] = '所有分支日志获取失败，请检查网络连接或SVN配置'
+            task_status['running'] = False
+            return
+        
+        task_status['progress'] = 50
+        task_status['message'] = '正在保存日志...'
+        
+        print(f"[{datetime.now()}] SVN任务 - 正在保存日志到文件")
+        
+        # 增量写入日志文件：合并现有日志和所有新获取的日志（主分支+externals）  
+        write_svn_log(all_branch_results)
+
+        task_status['execution_details'].append({
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'message': f'日志获取完成，已按年份保存到 logs 目录下',
+            'level': 'info'
+        })
+        
+        task_status['progress'] = 60
+        task_status['message'] = '正在解析日志并获取代码行数...'
+        task_status['execution_details'].append({
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'message': '开始解析日志文件',
+            'level': 'info'
+        })
+        
+        print(f"[{datetime.now()}] SVN任务 - 开始解析日志文件")
+        
+        # 解析日志获取版本列表（仓库根在任务中解析一次，解析日志时不再调用svn）
+        repository_root = get_repository_info(config.get('svn_base_url', ''), config.get('svn_username', ''),
+                                              config.get('svn_password', ''))['root']
+        commits = parse_svn_log(start_date, end_date, repository_root=repository_root)
+        print(f"[{datetime.now()}] SVN任务 - 日志解析完成，共找到 {len(commits)} 条提交记录")
+        task_status['execution_details'].append({
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'message': f'日志解析完成，共找到 {len(commits)} 条提交记录',
+            'level': 'info'
+        })
+        
+        total_commits = len(commits)
+        if total_commits == 0:
+            task_status['error'] = f'在指定日期范围内没有找到提交记录\n开始日期: {start_date or "无"}\n结束日期: {end_date or "无"}'
+            task_status['running'] = False
+            return
+        
+        task_status['execution_details'].append({
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'message': f'开始获取代码行数，共 {total_commits} 个版本需要分析',
+            'level': 'info'
+        })
+        
+        # 获取每个版本的代码行数变化
+        # 对于多分支分析，我们需要根据提交记录中的分支信息来获取对应的分支URL
+        # 这里简化处理，使用第一个分支的配置
+        username = branches[0].get('username') if branches else ""
+        password = branches[0].get('password') if branches else ""
+        trie = PathTrie()
+        analyze_revisions(commits, username, password, progress_range=(60, 80), trie=trie)
+        
+        task_status['progress'] = 80
+        task_status['message'] = '正在分析日志...'
+        print(f"[{datetime.now()}] SVN任务 - 开始生成统计数据")
+        
+        # 生成统计
+        print(f"[{datetime.now()}] SVN任务 - 生成新的统计数据")
+        task_status['execution_details'].append({
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'message': '生成新的统计数据',
+            'level': 'info'
+        })
+        # 生成新的统计，不使用现有结果
+        gen_analysis_results(commits, start_date, end_date, revision_range, trie=trie, publish=True)
+
+        # 更新缓存文件，只保存缓存数据
+        print(f"[{datetime.now()}] SVN任务 - 正在更新缓存文件")
+        task_status['execution_details'].append({
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'message': '正在更新缓存文件',
+            'level': 'info'
+        })
+        
+        try:
+            # 只保存缓存数据，不保存分析结果
+            save_cache()
+            print(f"[{datetime.now()}] SVN任务 - 缓存文件更新完成")
+            task_status['execution_details'].append({
+                'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'message': '缓存文件更新完成',
+                'level': 'info'
+            })
+        except Exception as e:
+            print(f"[{datetime.now()}] SVN任务 - 更新缓存文件失败: {e}")
+            task_status['execution_details'].append({
+                'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'message': f'更新缓存文件失败: {e}',
+                'level': 'error'
+            })
+        
+        # 汇总本次任务的阶段耗时和缓存命中情况
+        append_metrics_summary(metrics_before)
+        
+        task_status['progress'] = 100
+        task_status['message'] = f'分析完成! 共{len(commits)}条提交记录'
+        task_status['completed'] = True
+        task_status['running'] = False
+        
+        task_status['execution_details'].append({
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'message': f'任务执行完成，共处理 {len(commits)} 条提交记录',
+            'level': 'success'
+        })
+        
+        print(f"[{datetime.now()}] SVN任务 - 任务执行完成，状态: 成功")
+    except Exception as e:
+        error_msg = str(e)
+        print(f"[{datetime.now()}] SVN任务 - 任务执行失败: {error_msg}")
+        task_status['error'] = error_msg
+        task_status['running'] = False
+        task_status['execution_details'].append({
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'message': f'任务执行失败: {error_msg}',
+            'level': 'error'
+        })
+        import traceback
+        traceback.print_exc()
+
+# SVN日志获取任务
+def svn_log_task(branch_url, username, password, revision_range, start_date=None, end_date=None, withExternals=False):
+    global task_status
+
+    print(f"[{datetime.now()}] SVN任务 - 开始执行SVN代码统计任务")
+    print(f"[{datetime.now()}] SVN任务 - 参数: 分支URL: {branch_url}, 版本范围: {revision_range}, 开始日期: {start_date}, 结束日期: {end_date}")
+    
+    metrics_before = svn_metrics.snapshot()
+    try:
+        # 重置执行明细
+        task_status['execution_details'] = ExecutionLog()
+        
+        task_status['running'] = True
+        task_status['progress'] = 10
+        task_status['message'] = '正在连接SVN服务器...'
+        
+        # 添加执行明细
+        task_status['execution_details'].append({
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'message': '开始执行SVN代码统计任务',
+            'level': 'info'
+        })
+        print(f"[{datetime.now()}] SVN任务 - 执行明细已重置，状态已更新")
+        
+
+        task_status['execution_details'].append({
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'message': f'使用用户名: {username}',
+            'level': 'info'
+        })
+    
+        # 密码脱敏
+        task_status['execution_details'].append({
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'message': '使用密码: ******',
+            'level': 'info'
+        })
+
+        task_status['execution_details'].append({
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'message': f'使用版本范围: {revision_range}',
+            'level': 'info'
+        })
+
+        task_status['execution_details'].append({
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'message': f'分析SVN分支: {branch_url}',
+            'level': 'info'
+        })
+        
+        task_status['progress'] = 30
+        task_status['message'] = '正在获取SVN日志...'
+        
+        # 获取SVN日志（主分支）
+        main_result = get_svn_log(branch_url, username, password, revision_range)
+        
+        # 检查结果是否为None（表示获取失败）
+        if main_result is None:
+            error_msg = '获取SVN日志失败，请检查网络连接或SVN配置'
+            print(f"[{datetime.now()}] SVN任务 - 错误: {error_msg}")
+            task_status['error'] = error_msg
+            task_status['running'] = False
+            return
+        
+        # 检查命令执行结果
+        if main_result.returncode != 0:
+            error_msg = f'SVN命令执行失败: {main_result.stderr}'
+            print(f"[{datetime.now()}] SVN任务 - 错误: {error_msg}")
+            task_status['error'] = error_msg
+            task_status['running'] = False
+            return
+        
+        print(f"[{datetime.now()}] SVN任务 - 主分支SVN命令执行成功，返回码: {main_result.returncode}")
+        
+        
+        # 收集所有日志结果（主分支+externals）
+        all_log_results = [main_result]
+    
+        # 获取并处理SVN externals
+        if withExternals:
+            task_status['execution_details'].append({
+                'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'message': '开始处理SVN externals',
+                'level': 'info'
+            })
+
+            externals = get_svn_externals(branch_url, username, password)
+        
+            task_status['execution_details'].append({
+                'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'message': f'开始获取 {len(externals)} 个external分支的日志',
+                'level': 'info'
+            })
+            
+            # 获取每个external的日志
+            for i, external in enumerate(externals, 1):
+                external_msg = f'正在获取external分支日志 ({i}/{len(externals)}): {external["url"]}'
+                print(f"[{datetime.now()}] SVN任务 - {external_msg}")
+                task_status['execution_details'].append({
+                    'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+                    'message': external_msg,
+                    'level': 'info'
+                })
+                
+                external_result = get_svn_log(external['url'], username, password, revision_range)
+                
+                if external_result and external_result.returncode == 0:
+                    all_log_results.append(external_result)
+                    success_msg = f'external分支日志获取成功: {external["url"]}'
+                    print(f"[{datetime.now()}] SVN任务 - {success_msg}")
+                    task_status['execution_details'].append({
+                        'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+                        'message': success_msg,
+                        'level': 'success'
+                    })
+                else:
+                    error_msg = f'external分支日志获取失败: {external["url"]}'
+                    print(f"[{datetime.now()}] SVN任务 - {error_msg}")
+                    task_status['execution_details'].append({
+                        'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+                        'message': error_msg,
+                        'level': 'warning'
+                    })
+        else:
+            task_status['execution_details'].append({
+                'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'message': '未发现任何external配置',
+                'level': 'info'
+            })
+        
+        task_status['progress'] = 40
+        task_status['message'] = '正在保存日志...'
+        
+        print(f"[{datetime.now()}] SVN任务 - 正在保存日志")
+        
+        # 增量写入日志文件：合并现有日志和所有新获取的日志（主分支+externals）  
+        write_svn_log(all_log_results)
+        
+        task_status['execution_details'].append({
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'message': f'日志获取完成，已按年份保存到 logs 目录下',
+            'level': 'info'
+        })
+        
+        task_status['progress'] = 50
+        task_status['message'] = '正在解析日志并获取代码行数...'
+        task_status['execution_details'].append({
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'message': '开始解析日志文件',
+            'level': 'info'
+        })
+        
+        print(f"[{datetime.now()}] SVN任务 - 开始解析日志文件")
+
+        # 解析日志获取版本列表（仓库根在任务中解析一次，解析日志时不再调用svn）
+        repository_root = get_repository_info(config.get('svn_base_url', ''), username, password)['root']
+        commits = parse_svn_log(start_date, end_date, repository_root=repository_root)
+        print(f"[{datetime.now()}] SVN任务 - 日志解析完成，共找到 {len(commits)} 条提交记录")
+        task_status['execution_details'].append({
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'message': f'日志解析完成，共找到 {len(commits)} 条提交记录',
+            'level': 'info'
+        })
+        
+        total_commits = len(commits)
+        if total_commits == 0:
+            task_status['error'] = f'在指定日期范围内没有找到提交记录\n开始日期: {start_date or "无"}\n结束日期: {end_date or "无"}'
+            task_status['running'] = False
+            return
+        
+        task_status['execution_details'].append({
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'message': f'开始获取代码行数，共 {total_commits} 个版本需要分析',
+            'level': 'info'
+        })
+        
+        # 获取每个版本的代码行数变化
+        trie = PathTrie()
+        analyze_revisions(commits, username, password, progress_range=(50, 80), trie=trie)
+        
+        task_status['progress'] = 80
+        task_status['message'] = '正在分析日志...'
+        print(f"[{datetime.now()}] SVN任务 - 开始生成统计数据")
+        
+        # 生成统计
+        print(f"[{datetime.now()}] SVN任务 - 生成新的统计数据")
+        task_status['execution_details'].append({
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'message': '生成新的统计数据',
+            'level': 'info'
+        })
+        # 生成新的统计，不使用现有结果
+        gen_analysis_results(commits, start_date, end_date, revision_range, trie=trie, publish=True)
+
+        # 更新缓存文件，只保存缓存数据
+        print(f"[{datetime.now()}] SVN任务 - 正在更新缓存文件")
+        task_status['execution_details'].append({
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'message': '正在更新缓存文件',
+            'level': 'info'
+        })
+        
+        try:
+            # 只保存缓存数据，不保存分析结果
+            save_cache()
+            print(f"[{datetime.now()}] SVN任务 - 缓存文件更新完成")
+            task_status['execution_details'].append({
+                'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'message': '缓存文件更新完成',
+                'level': 'info'
+            })
+        except Exception as e:
+            print(f"[{datetime.now()}] SVN任务 - 更新缓存文件失败: {e}")
+            task_status['execution_details'].append({
+                'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'message': f'更新缓存文件失败: {e}',
+                'level': 'error'
+            })
+        
+        # 汇总本次任务的阶段耗时和缓存命中情况
+        append_metrics_summary(metrics_before)
+        
+        task_status['progress'] = 100
+        task_status['message'] = f'分析完成! 共{len(commits)}条提交记录'
+        task_status['completed'] = True
+        task_status['running'] = False
+        
+        task_status['execution_details'].append({
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'message': f'任务执行完成，共处理 {len(commits)} 条提交记录',
+            'level': 'success'
+        })
+        
+        print(f"[{datetime.now()}] SVN任务 - 任务执行完成，状态: 成功")
+    except Exception as e:
+        error_msg = str(e)
+        print(f"[{datetime.now()}] SVN任务 - 任务执行失败: {error_msg}")
+        task_status['error'] = error_msg
+        task_status['running'] = False
+        task_status['execution_details'].append({
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'message': f'任务执行失败: {error_msg}',
+            'level': 'error'
+        })
+        import traceback
+        traceback.print_exc()
+
+def get_log(start_date=None, end_date=None, filters=None, chart_options=None):
+    """
+    获取SVN任务的日志，包含提交记录的详细信息。
+    
+    参数:
+    branch_url (str): SVN分支URL
+    start_date (str, 可选): 开始日期，格式为 'YYYY-MM-DD'
+    end_date (str, 可选): 结束日期，格式为 'YYYY-MM-DD'
+    filters (dict, 可选): 筛选条件 {'authors', 'branches', 'paths', 'extensions'}
+    chart_options (dict, 可选): 图表数据选项，见 prepare_chart_data
+    withExternals (bool, 可选): 是否包含SVN externals
+    
+    返回:
+    list: 包含提交记录详细信息的列表
+    """
+    global task_status
+    
+    print(f"[{datetime.now()}] SVN任务 - 开始执行SVN代码统计任务")
+    print(f"[{datetime.now()}] SVN任务 - 参数: 开始日期: {start_date}, 结束日期: {end_date}")
+    
+    try:
+        print(f"[{datetime.now()}] SVN任务 - 开始解析日志文件")
+
+        # 解析日志获取版本列表
+        commits = parse_svn_log(start_date, end_date, filters)
+        print(f"[{datetime.now()}] SVN任务 - 日志解析完成，共找到 {len(commits)} 条提交记录")
+        
+        total_commits = len(commits)
+        if total_commits == 0:
+            return gen_analysis_results(commits, start_date, end_date, "", filters, chart_options=chart_options)
+        
+        # 获取每个版本的代码行数变化
+        analyze_revisions(commits, config.get('svn_username', ""), config.get('svn_password', ""))
+        
+        print(f"[{datetime.now()}] SVN任务 - 开始生成统计数据")
+        
+        # 生成新的统计数据（按条件查询的结果不替换分析任务发布的共享结果和目录汇总）
+        results = gen_analysis_results(commits, start_date, end_date, "", filters, chart_options=chart_options)
+
+        # 更新缓存文件，只保存缓存数据
+        print(f"[{datetime.now()}] SVN任务 - 正在更新缓存文件")
+        try:
+            # 只保存缓存数据，不保存分析结果
+            save_cache()
+            print(f"[{datetime.now()}] SVN任务 - 缓存文件更新完成")
+        except Exception as e:
+            print(f"[{datetime.now()}] SVN任务 - 更新缓存文件失败: {e}")
+        
+        print(f"[{datetime.now()}] SVN任务 - 任务执行完成，状态: 成功")
+        return results
+    except Exception as e:
+        error_msg = str(e)
+        print(f"[{datetime.now()}] SVN任务 - 任务执行失败: {error_msg}")
+        import traceback
+        traceback.print_exc()
+        return {}
+
+# 获取查询结果（优先使用快照）
+def get_results_snapshot(start_date=None, end_date=None, filters=None, chart_options=None, refresh=False):
+    """
+    返回同一查询最近一次保存的结果快照，没有快照或 refresh 时同步计算并保存快照；
+    快照超过 result_snapshot_max_age_seconds，或年份日志在其之后有更新时，仍先返回快照并在后台刷新
+    :param refresh: 是否忽略快照重新计算
+    :return: 分析结果，附加 snapshot 字段 {'saved_at', 'age_seconds', 'stale', 'refreshing'}
+    """
+    if not config.get('result_snapshots', True):
+        return get_log(start_date, end_date, filters, chart_options)
+    
+    query = {'start_date': start_date, 'end_date': end_date, 'filters': filters or {},
+             'chart_options': chart_options or {}}
+    snapshot = None if refresh else snapshot_store.get(query)
+    if snapshot is None:
+        snapshot = save_results_snapshot(query)
+        if snapshot is None:
+            return {}
+        return dict(snapshot['results'], snapshot=snapshot_info(snapshot))
+    
+    info = snapshot_info(snapshot)
+    max_age = config.get('result_snapshot_max_age_seconds', DEFAULT_SNAPSHOT_MAX_AGE)
+    info['stale'] = bool((max_age and info['age_seconds'] > max_age)
+                         or snapshot.get('log_state') != year_log_state(start_date, end_date))
+    if info['stale']:
+        info['refreshing'] = refresh_snapshot_in_background(query)
+    return dict(snapshot['results'], snapshot=info)
+
+# 计算查询结果并保存快照
+def save_results_snapshot(query):
+    """
+    :param query: {'start_date', 'end_date', 'filters', 'chart_options'}
+    :return: 保存的快照，计算失败时为None
+    """
+    # 计算前记录日志状态，计算期间日志有更新时下次查询会再次刷新
+    log_state = year_log_state(query['start_date'], query['end_date'])
+    results = get_log(query['start_date'], query['end_date'], query['filters'] or None,
+                      query['chart_options'] or None)
+    if not results:
+        return None
+    try:
+        return snapshot_store.save(query, results, log_state)
+    except OSError as e:
+        print(f"[{datetime.now()}] SVN任务 - 保存结果快照失败: {e}")
+        return {'saved_at': time.time(), 'results': results}
+
+# 后台刷新查询结果快照
+def refresh_snapshot_in_background(query):
+    """
+    同一查询同时只刷新一次，刷新失败后 SNAPSHOT_REFRESH_RETRY_SECONDS 内不再刷新
+    :return: 是否正在刷新
+    """
+    signature = snapshot_store.signature(query)
+    with _snapshot_lock:
+        if signature in _snapshot_refreshing:
+            return True
+        if time.time() - _snapshot_refresh_started.get(signature, 0) < SNAPSHOT_REFRESH_RETRY_SECONDS:
+            return False
+        _snapshot_refreshing.add(signature)
+        _snapshot_refresh_started[signature] = time.time()
+    
+    def refresh():
+        refreshed = False
+        try:
+            print(f"[{datetime.now()}] SVN任务 - 后台刷新结果快照: {query}")
+            refreshed = save_results_snapshot(query) is not None
+        except Exception as e:
+            print(f"[{datetime.now()}] SVN任务 - 后台刷新结果快照失败: {e}")
+        finally:
+            with _snapshot_lock:
+                _snapshot_refreshing.discard(signature)
+                if refreshed:
+                    _snapshot_refresh_started.pop(signature, None)
+    
+    threading.Thread(target=refresh, name='snapshot-refresh', daemon=True).start()
+    return True
+
+# 快照的时间信息
+def snapshot_info(snapshot):
+    saved_at = snapshot['saved_at']
+    return {
+        'saved_at': datetime.fromtimestamp(saved_at).isoformat(timespec='seconds'),
+        'age_seconds': max(0, int(time.time() - saved_at)),
+        'stale': False,
+        'refreshing': False
+    }
+
+# 年份日志的状态（文件名、大小、修改时间），日志更新后快照视为过期
+def year_log_state(start_date=None, end_date=None):
+    state = []
+    for log_file in get_all_year_log_files(start_date, end_date):
+        try:
+            stat = os.stat(log_file)
+        except OSError:
+            continue
+        state.append([os.path.basename(log_file), stat.st_size, stat.st_mtime_ns])
+    return state
+
+# 逐版本获取代码行数变化
+@svn_metrics.timed_stage('analyze')
+def analyze_revisions(commits, username=None, password=None, progress_range=None, trie=None):
+    """
+    并发调用 get_svn_diff，将新增/删除行数、文件详情和获取状态写回提交记录
+    逐版本日志为debug级别，进度按时间间隔输出，结束时输出阶段汇总
+    :param commits: 提交记录列表
+    :param username: SVN用户名
+    :param password: SVN密码
+    :param progress_range: (起始进度, 结束进度)，为None时不更新任务状态（同步请求）
+    :param trie: 目录前缀树，每个版本分析完成后增量加入
+    :return: 阶段汇总字典
+    """
+    total_commits = len(commits)
+    progress = svn_logging.StageProgress(task_logger, '获取代码行数', total_commits,
+                                         config.get('log_progress_interval_seconds', svn_logging.DEFAULT_PROGRESS_INTERVAL))
+    # 并发获取diff：实际并发的svn子进程数由自适应并发限制控制（不超过并发硬上限）
+    workers = max(1, int(config.get('svn_max_concurrency', svn_client.DEFAULT_MAX_CONCURRENCY)))
+    task_logger.info('开始获取代码行数变化，共 %d 个版本需要分析，并发上限 %d', total_commits, workers)
+
+    def fetch(commit):
+        task_logger.debug('分析版本 %s', commit['revision'])
+        # 获取代码行数变化，包含文件详情
+        return get_svn_diff(commit['branch_url'], commit['revision'], username, password, True,
+                            commit.get('changed_files'))
+
+    # asyncio 引擎：全部版本的获取协程提交到事件循环，在循环中等待并发名额，不占用线程；
+    # 否则每个并发的获取占用线程池中的一个线程（线程数为并发硬上限）
+    executor = None if use_async_engine() else ThreadPoolExecutor(max_workers=workers, thread_name_prefix='svn-diff')
+    futures = {}
+    try:
+        if executor is None:
+            futures = {submit_svn_diff(commit['branch_url'], commit['revision'], username, password, True,
+                                       commit.get('changed_files')): commit for commit in commits}
+        else:
+            futures = {executor.submit(fetch, commit): commit for commit in commits}
+        # 结果在当前线程按完成顺序写回提交记录、目录前缀树和任务状态
+        for i, future in enumerate(as_completed(futures)):
+            commit = futures[future]
+            revision = commit['revision']
+            lines_added, lines_deleted, file_details, diff_status = future.result()
+            task_logger.debug('版本 %s 分析完成(%s)，新增 %d 行，删除 %d 行，涉及 %d 个文件',
+                              revision, diff_status, lines_added, lines_deleted, len(file_details))
+            if progress_range:
+                task_status['execution_details'].append({
+                    'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+                    'message': f'分析版本 {revision} 完成 ({i + 1}/{total_commits})',
+                    'level': 'debug'
+                })
+
+            # 保存到提交记录
+            commit['lines_added'] = lines_added
+            commit['lines_deleted'] = lines_deleted
+            commit['file_details'] = file_details
+            commit['diff_status'] = diff_status
+            if trie is not None:
+                trie.add_commit(commit)
+            progress.step(lines_added=lines_added, lines_deleted=lines_deleted, files=len(file_details),
+                          copy_only=int(diff_status == 'copy'), directory_only=int(diff_status == 'directory'),
+                          ignored=int(diff_status == 'ignored'), truncated=int(diff_status == 'truncated'),
+                          failed=int(diff_status == 'failed'))
+
+            # 更新进度
+            if progress_range:
+                start, end = progress_range
+                task_status['progress'] = start + (i + 1) * (end - start) // total_commits
+                task_status['message'] = f'正在获取代码行数... ({i + 1}/{total_commits})'
+    finally:
+        # 中途出错时取消尚未完成的获取
+        for future in futures:
+            future.cancel()
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    summary = progress.finish()
+    if progress_range:
+        task_status['execution_details'].append({
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'message': f"代码行数获取完成，共 {summary['done']} 个版本，耗时 {summary['seconds']:.2f}s，"
+                       f"新增 {summary.get('lines_added', 0)} 行，删除 {summary.get('lines_deleted', 0)} 行，"
+                       f"跳过复制版本 {summary.get('copy_only', 0)} 个、目录版本 {summary.get('directory_only', 0)} 个，"
+                       f"忽略 {summary.get('ignored', 0)} 个版本，截断 {summary.get('truncated', 0)} 个版本，"
+                       f"失败 {summary.get('failed', 0)} 个版本",
+            'level': 'warning' if summary.get('failed') else 'info'
+        })
+    return summary
+
+# 生成分析结果
+@svn_metrics.timed_stage('aggregate')
+def gen_analysis_results(commits, startDate=None, endDate=None, revision_range=None, filters=None, trie=None,
+                         chart_options=None, publish=False):
+    """
+    :param trie: 分析过程中增量构建的目录前缀树
+    :param publish: 是否发布为共享的分析结果和目录汇总（/api/status、/api/modules 使用）；
+                    只有分析任务发布，按条件查询（/api/results）只返回结果，不替换共享的结果
+    """
+    global analysis_results, analysis_trie
+    # 生成统计：与上次同一查询的汇总状态对比，只应用尚未应用的版本、撤销移出范围的版本；
+    # 同步和读取统计在同一次加锁期间完成，并发的同一查询不会读到同步了一半的状态
+    aggregate_state = aggregate_store.get(startDate, endDate, revision_range, filters)
+    with aggregate_state.lock:
+        applied, retracted = aggregate_state.sync(commits)
+        monthly_stats, author_stats, branch_stats, daily_stats = aggregate_state.to_stats()
+    print(f"[{datetime.now()}] SVN任务 - 增量更新统计汇总，应用 {applied} 个版本，撤销 {retracted} 个版本")
+    if applied or retracted:
+        try:
+            aggregate_store.save(aggregate_state, startDate, endDate, revision_range, filters)
+        except OSError as e:
+            print(f"[{datetime.now()}] SVN任务 - 保存统计汇总失败: {str(e)}")
+    chart_data = prepare_chart_data(monthly_stats, author_stats, branch_stats, daily_stats, chart_options)
+    print(f"[{datetime.now()}] SVN任务 - 统计数据生成完成")
+    
+    # 保存结果
+    print(f"[{datetime.now()}] SVN任务 - 正在保存分析结果")
+
+    total_files = sum(c['files_changed'] for c in commits)
+    total_lines_added = sum(c['lines_added'] for c in commits)
+    total_lines_deleted = sum(c['lines_deleted'] for c in commits)
+    
+    results = {
+        'commits': commits,
+        'monthly_stats': monthly_stats,
+        'author_stats': author_stats,
+        'branch_stats': branch_stats,
+        'daily_stats': daily_stats,
+        'chart_data': chart_data,
+        'total_commits': len(commits),
+        'total_files': total_files,
+        'total_lines_added': total_lines_added,
+        'total_lines_deleted': total_lines_deleted,
+        # 获取代码行数失败的版本（未写入缓存，重新分析时会再次获取）
+        'failed_revisions': [c['revision'] for c in commits if c.get('diff_status') == 'failed'],
+        'filter': {
+            'start_date': startDate,
+            'end_date': endDate,
+            'revision_range': revision_range,
+            'filters': filters or {}
+        }
+    }
+    
+    if publish:
+        analysis_results = results
+        # 目录汇总：分析过程中已增量构建时直接使用，否则在首次查询目录汇总时由提交记录构建
+        analysis_trie = trie
+    
+    print(f"[{datetime.now()}] SVN任务 - 分析结果保存完成，共 {len(commits)} 条提交记录, 新增 {total_lines_added} 行代码, 删除 {total_lines_deleted} 行代码")
+    return results
+
+# 统计函数
+def get_monthly_stats(commits):
+    monthly_stats = {}
+    for commit in commits:
+        # 将ISO字符串转换为datetime对象
+        commit_date = datetime.fromisoformat(commit['date'])
+        month_key = commit_date.strftime('%Y-%m')
+        author = commit['author']
+        
+        # 按文件所属分支拆分的行数，跨分支提交不再把全部行数计入每个分支
+        for branch, (files_changed, lines_added, lines_deleted) in branch_lines(commit).items():
+            if month_key not in monthly_stats:
+                monthly_stats[month_key] = {}
+            
+            if branch not in monthly_stats[month_key]:
+                monthly_stats[month_key][branch] = {}
+            
+            if author not in monthly_stats[month_key][branch]:
+                monthly_stats[month_key][branch][author] = {
+                    'files_changed': 0,
+                    'lines_added': 0,
+                    'lines_deleted': 0
+                }
+            
+            # 更新统计数据
+            monthly_stats[month_key][branch][author]['files_changed'] += files_changed
+            monthly_stats[month_key][branch][author]['lines_added'] += lines_added
+            monthly_stats[month_key][branch][author]['lines_deleted'] += lines_deleted
+    
+    return monthly_stats
+
+def get_author_stats(commits):
+    author_stats = {}
+    for commit in commits:
+        author = commit['author']
+        
+        if author not in author_stats:
+            author_stats[author] = {
+                'commits': 0,
+                'files_changed': 0,
+                'lines_added': 0,
+                'lines_deleted': 0,
+                'branches': set()
+            }
+        
+        # 更新统计数据
+        author_stats[author]['commits'] += 1
+        author_stats[author]['files_changed'] += commit['files_changed']
+        author_stats[author]['lines_added'] += commit['lines_added']
+        author_stats[author]['lines_deleted'] += commit['lines_deleted']
+        
+        for branch in commit['branches']:
+            author_stats[author]['branches'].add(branch)
+    
+    for author in author_stats:
+        author_stats[author]['branches'] = list(author_stats[author]['branches'])
+    
+    return author_stats
+
+def get_branch_stats(commits):
+    branch_stats = {}
+    for commit in commits:
+        for branch, (files_changed, lines_added, lines_deleted) in branch_lines(commit).items():
+            if branch not in branch_stats:
+                branch_stats[branch] = {
+                    'commits': 0,
+                    'files_changed': 0,
+                    'lines_added': 0,
+                    'lines_deleted': 0,
+                    'authors': set()
+                }
+            
+            # 更新统计数据
+            branch_stats[branch]['commits'] += 1
+            branch_stats[branch]['files_changed'] += files_changed
+            branch_stats[branch]['lines_added'] += lines_added
+            branch_stats[branch]['lines_deleted'] += lines_deleted
+            branch_stats[branch]['authors'].add(commit['author'])
+    
+    for branch in branch_stats:
+        branch_stats[branch]['authors'] = list(branch_stats[branch]['authors'])
+    
+    return branch_stats
+
+def get_daily_stats(commits):
+    daily_stats = {}
+    for commit in commits:
+        # 将ISO字符串转换为datetime对象
+        commit_date = datetime.fromisoformat(commit['date'])
+        day_key = commit_date.strftime('%Y-%m-%d')
+        author = commit['author']
+        
+        for branch, (files_changed, lines_added, lines_deleted) in branch_lines(commit).items():
+            if day_key not in daily_stats:
+                daily_stats[day_key] = {}
+            
+            if branch not in daily_stats[day_key]:
+                daily_stats[day_key][branch] = {}
+            
+            if author not in daily_stats[day_key][branch]:
+                daily_stats[day_key][branch][author] = {
+                    'files_changed': 0,
+                    'lines_added': 0,
+                    'lines_deleted': 0
+                }
+            
+            # 更新统计数据
+            daily_stats[day_key][branch][author]['files_changed'] += files_changed
+            daily_stats[day_key][branch][author]['lines_added'] += lines_added
+            daily_stats[day_key][branch][author]['lines_deleted'] += lines_deleted
+    
+    return daily_stats
+
+# 准备图表数据
+@svn_metrics.timed_stage('chart_data')
+def prepare_chart_data(monthly_stats, author_stats, branch_stats, daily_stats, chart_options=None):
+    """
+    生成图表数据：每个作者（或分支）一个序列，只保留按指标排名前K的序列，其余合并为“其他”
+    :param chart_options: 图表数据选项，未指定的项使用配置
+                          {'max_points': 每日序列的最大点数（chart_max_points，为0时不降采样）,
+                           'top_k': 保留的序列数（chart_top_k，为0时不合并）,
+                           'rank_by': 排名指标 commits/files_changed/lines_added/lines_deleted/lines_changed（chart_rank_by）,
+                           'group_by': 序列维度 author/branch}
+    """
+    chart_options = chart_options or {}
+    max_points = chart_options.get('max_points')
+    if max_points is None:
+        max_points = config.get('chart_max_points', DEFAULT_CHART_MAX_POINTS)
+    top_k = chart_options.get('top_k')
+    if top_k is None:
+        top_k = config.get('chart_top_k', DEFAULT_CHART_TOP_K)
+    rank_by = chart_options.get('rank_by') or config.get('chart_rank_by', DEFAULT_CHART_RANK_BY)
+    if rank_by not in CHART_RANK_METRICS:
+        rank_by = DEFAULT_CHART_RANK_BY
+    group_by = 'branch' if chart_options.get('group_by') == 'branch' else 'author'
+    
+    authors = list(author_stats.keys())
+    branches = list(branch_stats.keys())
+    
+    months = sorted(monthly_stats.keys())
+    days = sorted(daily_stats.keys())
+    
+    # 前K个序列的行号，其余作者/分支计入最后的“其他”序列
+    ranked = top_k_keys(branch_stats if group_by == 'branch' else author_stats, top_k, rank_by)
+    rows = {key: row for row, key in enumerate(ranked)}
+    others = len(author_stats if group_by == 'author' else branch_stats) - len(ranked)
+    labels = ranked + ([CHART_OTHERS_LABEL] if others else [])
+    other_row = len(ranked) if others else None
+    
+    # 月度、每日的文件数和代码行数（新增行数）序列
+    monthly_data_files, monthly_data_lines = _chart_series(monthly_stats, months, labels, rows, other_row, group_by)
+    daily_data_files, daily_data_lines = _chart_series(daily_stats, days, labels, rows, other_row, group_by)
+    
+    # 时间跨度较长时每日序列按周/月汇总或LTTB选点，点数不超过 max_points
+    series = [entry['data'] for entry in daily_data_files + daily_data_lines]
+    day_labels, series, resolution = downsample_daily(days, series, max_points)
+    for entry, data in zip(daily_data_files + daily_data_lines, series):
+        entry['data'] = data
+    
+    return {
+        'months': months,
+        'days': day_labels,
+        'dailyResolution': resolution,
+        'authors': authors,
+        'branches': branches,
+        'series': labels,
+        'groupBy': group_by,
+        'rankBy': rank_by,
+        'othersCount': others,
+        'monthlyDataFiles': monthly_data_files,
+        'monthlyDataLines': monthly_data_lines,
+        'dailyDataFiles': daily_data_files,
+        'dailyDataLines': daily_data_lines
+    }
+
+# 按指标选出排名前K的作者/分支
+def top_k_keys(stats, k, rank_by=DEFAULT_CHART_RANK_BY):
+    """
+    用堆选出指标最大的K个键，指标相同时按名称排序
+    :param stats: author_stats 或 branch_stats
+    :param k: 保留的个数，为0或不小于总数时返回全部（按指标降序）
+    :param rank_by: 排名指标，见 CHART_RANK_METRICS
+    :return: 键列表（按指标降序）
+    """
+    metric = CHART_RANK_METRICS[rank_by]
+    if not k or k >= len(stats):
+        return sorted(stats, key=lambda key: (-metric(stats[key]), key))
+    return [key for key, _ in heapq.nsmallest(k, stats.items(), key=lambda item: (-metric(item[1]), item[0]))]
+
+# 生成各序列的文件数、代码行数数据
+def _chart_series(stats_by_period, periods, labels, rows, other_row, group_by):
+    """
+    一次遍历 {时间: {分支: {作者: 统计}}}，按作者或分支累加到对应序列
+    :return: (文件数序列列表, 代码行数序列列表)，每项为 {'label', 'data'}
+    """
+    files = [[0] * len(periods) for _ in labels]
+    lines = [[0] * len(periods) for _ in labels]
+    for column, period in enumerate(periods):
+        for branch, by_author in stats_by_period[period].items():
+            for author, stats in by_author.items():
+                row = rows.get(branch if group_by == 'branch' else author, other_row)
+                if row is None:
+                    continue
+                files[row][column] += stats['files_changed']
+                lines[row][column] += stats['lines_added']
+    return ([{'label': label, 'data': data} for label, data in zip(labels, files)],
+            [{'label': label, 'data': data} for label, data in zip(labels, lines)])
+
+# 获取当前分析结果的目录前缀树
+def get_analysis_trie():
+    """
+    返回最近一次分析结果的目录前缀树；共享存储中有其他worker发布的更新结果或分析时未构建前缀树时，由提交记录构建
+    """
+    global analysis_trie, _analysis_trie_version
+    try:
+        version = state_store.version('analysis_results')
+        if version and version != _analysis_trie_version:
+            results = state_store.get('analysis_results') or {}
+            analysis_trie = PathTrie.from_commits(results.get('commits', []))
+            _analysis_trie_version = version
+    except Exception as e:
+        print(f"[{datetime.now()}] API GET /api/modules - 读取共享分析结果失败，使用本进程结果: {e}")
+    if analysis_trie is None:
+        analysis_trie = PathTrie.from_commits((analysis_results or {}).get('commits', []))
+    return analysis_trie
+
+# 解析请求中的筛选条件
+def parse_filters(data):
+    """
+    作者、分支、路径前缀、扩展名筛选，支持列表或逗号分隔的字符串
+    :param data: 请求参数（JSON或查询参数）
+    :return: 筛选条件 {'authors', 'branches', 'paths', 'extensions'}
+    """
+    filters = {}
+    for field in log_index.FILTER_FIELDS:
+        values = data.get(field) or []
+        if isinstance(values, str):
+            values = values.split(',')
+        values = [str(value).strip() for value in values if str(value).strip()]
+        if values:
+            filters[field] = values
+    return filters
+
+# 解析请求中的图表数据选项
+def parse_chart_options(data):
+    """
+    :param data: 请求参数（JSON或查询参数）：maxPoints 每日序列的最大点数，topK 保留的序列数，
+                 rankBy 排名指标，groupBy 序列维度（author/branch）
+    :return: 图表数据选项 {'max_points', 'top_k', 'rank_by', 'group_by'}，未指定的项不包含（使用配置）
+    """
+    chart_options = {}
+    for param, option in (('maxPoints', 'max_points'), ('topK', 'top_k')):
+        value = data.get(param)
+        if value not in (None, ''):
+            try:
+                chart_options[option] = max(0, int(value))
+            except (TypeError, ValueError):
+                pass
+    if data.get('rankBy') in CHART_RANK_METRICS:
+        chart_options['rank_by'] = data['rankBy']
+    if data.get('groupBy') in ('author', 'branch'):
+        chart_options['group_by'] = data['groupBy']
+    return chart_options
+
+# 逐条产生带代码行数的提交记录（只读取缓存）
+def iter_export_commits(startDate=None, endDate=None, filters=None):
+    """
+    按版本号顺序逐条解析日志，并从diff缓存中读取代码行数，不调用svn；
+    缓存中没有的版本 diff_status 为 uncached，行数为0
+    """
+    username = config.get('svn_username', "")
+    password = config.get('svn_password', "")
+    for commit in iter_svn_log(startDate, endDate, filters):
+        lines_added, lines_deleted, file_details, diff_status = get_svn_diff(
+            commit['branch_url'], commit['revision'], username, password, True, commit.get('changed_files'),
+            cache_only=True)
+        commit['lines_added'] = lines_added
+        commit['lines_deleted'] = lines_deleted
+        commit['file_details'] = file_details
+        commit['diff_status'] = diff_status
+        yield commit
+
+
+# 命令行批处理时按流程顺序输出的阶段
+CLI_STAGES = ('svn_log', 'write_log', 'parse_log', 'analyze', 'aggregate', 'chart_data')
+
+
+def main():
+    global CONFIG_FILE
+    import argparse
+
+    parser = argparse.ArgumentParser(description='SVN代码统计（命令行批处理，用于定时任务和CI）')
+    parser.add_argument('--branch-url', action='append',
+                        help='SVN分支URL，可重复指定进行多分支分析（默认使用配置 svn_base_url）')
+    parser.add_argument('--username', help='SVN用户名（默认读取配置）')
+    parser.add_argument('--password', help='SVN密码（默认读取配置）')
+    parser.add_argument('--revision-range', help='版本范围，如 1000:HEAD')
+    parser.add_argument('--start-date', help='开始日期 YYYY-MM-DD（默认为 log_range_days 天前）')
+    parser.add_argument('--end-date', help='结束日期 YYYY-MM-DD（默认为今天）')
+    parser.add_argument('--concurrency', type=int, help='svn调用并发硬上限（默认读取配置 svn_max_concurrency）')
+    parser.add_argument('--config', default=CONFIG_FILE, help='配置文件路径')
+    parser.add_argument('--output', default='results.json', help='分析结果JSON文件路径')
+    args = parser.parse_args()
+
+    CONFIG_FILE = args.config
+    ensure_initialized()
+    if args.concurrency:
+        config['svn_max_concurrency'] = args.concurrency
+        configure_svn_concurrency()
+
+    username = args.username if args.username is not None else config.get('svn_username', '')
+    password = args.password if args.password is not None else config.get('svn_password', '')
+    branch_urls = args.branch_url or [config.get('svn_base_url', '')]
+    end_date = args.end_date or datetime.now().strftime('%Y-%m-%d')
+    start_date = args.start_date or (datetime.now() - timedelta(days=config.get('log_range_days', 180))).strftime('%Y-%m-%d')
+
+    os.makedirs(os.path.join(ROOT_PATH, 'logs'), exist_ok=True)
+    metrics_before = svn_metrics.snapshot()
+    start = time.perf_counter()
+    if len(branch_urls) == 1:
+        svn_log_task(branch_urls[0], username, password, args.revision_range, start_date, end_date)
+    else:
+        branches = [{'branch_url': url, 'username': username, 'password': password} for url in branch_urls]
+        multi_branch_svn_log_task(branches, args.revision_range, start_date, end_date)
+    elapsed = time.perf_counter() - start
+    summary = svn_metrics.summarize_since(metrics_before)
+
+    print(f"[{datetime.now()}] CLI - 阶段耗时: 模块导入 {startup_status['import_seconds'] or 0:.3f}s，"
+          f"加载配置 {startup_status['config_seconds'] or 0:.3f}s，分析任务 {elapsed:.3f}s")
+    for stage in CLI_STAGES + tuple(sorted(set(summary['stages']) - set(CLI_STAGES))):
+        entry = summary['stages'].get(stage)
+        if entry:
+            print(f"[{datetime.now()}] CLI - 阶段 {stage}: {entry['count']} 次，耗时 {entry['seconds']:.3f}s")
+
+    if task_status['error'] or not task_status['completed']:
+        print(f"[{datetime.now()}] CLI - 分析失败: {task_status['error']}")
+        return 1
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(analysis_results, f, ensure_ascii=False, cls=svn_cache.DateTimeEncoder)
+    print(f"[{datetime.now()}] CLI - 分析结果已写入 {args.output}，共 {analysis_results['total_commits']} 条提交记录，"
+          f"新增 {analysis_results['total_lines_added']} 行，删除 {analysis_results['total_lines_deleted']} 行")
+    return 0
+
+
+# 记录模块导入耗时
+startup_status['import_seconds'] = time.perf_counter() - _import_started
+STARTUP_SECONDS.set(startup_status['import_seconds'], phase='import')
+
+if __name__ == '__main__':
+    raise SystemExit(main())
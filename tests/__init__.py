@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+"""
+基于 benchmarks/ 合成数据集和 svn 替身的测试，不需要真实的SVN服务器
+
+运行:
+    python -m pytest -q tests
+    python -m unittest discover -s tests -t .
+"""
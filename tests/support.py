@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+测试环境：用 benchmarks/synthetic.py 生成合成数据集，通过 fake_svn/svn 替身获取日志并写入临时目录
+同一进程内只生成一次，各测试模块共用
+"""
+import atexit
+import contextlib
+import os
+import shutil
+import sys
+import tempfile
+import threading
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.join(REPO_ROOT, 'benchmarks')
+
+# 跨两个年份，覆盖多个年份日志文件
+REVISIONS = 400
+DAYS = 400
+
+_lock = threading.Lock()
+_env = None
+
+
+def quiet():
+    """
+    屏蔽被测代码的进度输出
+    """
+    return contextlib.redirect_stdout(open(os.devnull, 'w'))
+
+
+def load_app():
+    """
+    返回 (svn_stats模块, 数据集元信息, 日志结果)；首次调用时生成数据集并写入XML年份日志
+    """
+    global _env
+    with _lock:
+        if _env is None:
+            for path in (REPO_ROOT, BENCH_DIR):
+                if path not in sys.path:
+                    sys.path.insert(0, path)
+            import run_benchmark
+            from synthetic import generate_dataset
+
+            work_dir = tempfile.mkdtemp(prefix='svn-stat-test-')
+            atexit.register(shutil.rmtree, work_dir, True)
+            data_dir = os.path.join(work_dir, 'data')
+            meta = generate_dataset(data_dir, revisions=REVISIONS, days=DAYS, copy_ratio=0.05)
+            os.environ['PATH'] = run_benchmark.FAKE_SVN_DIR + os.pathsep + os.environ.get('PATH', '')
+            os.environ['SVN_BENCH_DATA'] = data_dir
+            with quiet():
+                svnapp = run_benchmark.setup_app(work_dir, meta)
+                svnapp.config['log_format'] = 'xml'
+                log_result = svnapp.get_svn_log(meta['repos_root'])
+                svnapp.write_svn_log([log_result])
+            _env = (svnapp, meta, log_result)
+        return _env
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+增量统计的等价性：AggregateState.sync 逐步同步后的统计与由提交列表重新计算的结果一致
+"""
+import copy
+import random
+import unittest
+
+from aggregates import AggregateState
+from tests.support import load_app, quiet
+
+
+def with_lines(commits, seed):
+    """
+    为提交记录填充代码行数（部分跨分支提交只带部分文件明细，覆盖按比例分摊的情况）
+    """
+    rng = random.Random(seed)
+    result = []
+    for commit in commits:
+        commit = copy.deepcopy(commit)
+        commit['lines_added'] = rng.randint(0, 500)
+        commit['lines_deleted'] = rng.randint(0, 200)
+        details = {}
+        for changed in commit['changed_files'][:rng.randint(0, len(commit['changed_files']))]:
+            added = rng.randint(0, commit['lines_added'] // max(len(commit['changed_files']), 1))
+            details[changed['path']] = {'lines_added': added, 'lines_deleted': 0}
+        commit['file_details'] = details
+        result.append(commit)
+    return result
+
+
+def normalize(stats):
+    """
+    作者的分支列表、分支的作者列表与累计顺序有关，比较前排序
+    """
+    monthly_stats, author_stats, branch_stats, daily_stats = stats
+    author_stats = {author: dict(entry, branches=sorted(entry['branches'])) for author, entry in author_stats.items()}
+    branch_stats = {branch: dict(entry, authors=sorted(entry['authors'])) for branch, entry in branch_stats.items()}
+    return monthly_stats, author_stats, branch_stats, daily_stats
+
+
+class AggregateSyncTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.svnapp, _, _ = load_app()
+        with quiet():
+            cls.commits = with_lines(cls.svnapp.parse_svn_log(), seed=7)
+
+    def recompute(self, commits):
+        """
+        直接由提交列表计算（与增量汇总之前的实现相同）
+        """
+        return normalize((self.svnapp.get_monthly_stats(commits), self.svnapp.get_author_stats(commits),
+                          self.svnapp.get_branch_stats(commits), self.svnapp.get_daily_stats(commits)))
+
+    def assertMatches(self, state, commits):
+        self.assertEqual(normalize(state.to_stats()), self.recompute(commits))
+
+    def test_full_sync(self):
+        state = AggregateState()
+        self.assertEqual(state.sync(self.commits), (len(self.commits), 0))
+        self.assertMatches(state, self.commits)
+
+    def test_incremental_growth(self):
+        state = AggregateState()
+        for end in range(50, len(self.commits) + 50, 50):
+            state.sync(self.commits[:end])
+            self.assertMatches(state, self.commits[:end])
+
+    def test_sliding_range(self):
+        # 日期范围前移：新版本加入、旧版本移出
+        state = AggregateState()
+        for start in range(0, len(self.commits) - 100, 60):
+            window = self.commits[start:start + 100]
+            state.sync(window)
+            self.assertMatches(state, window)
+        self.assertEqual(state.sync(window), (0, 0))
+
+    def test_failed_revisions_recomputed(self):
+        failed = copy.deepcopy(self.commits)
+        for commit in failed[::5]:
+            commit['diff_status'] = 'failed'
+            commit['lines_added'] = commit['lines_deleted'] = 0
+            commit['file_details'] = {}
+        state = AggregateState()
+        state.sync(failed)
+        self.assertMatches(state, failed)
+
+        # 重新获取成功后，只重新应用失败过的版本
+        applied, retracted = state.sync(self.commits)
+        self.assertEqual((applied, retracted), (len(failed[::5]), 0))
+        self.assertMatches(state, self.commits)
+
+    def test_changed_revision_reapplied(self):
+        # 截断的diff以更大的上限重新获取后行数变化，已应用的版本需要重新应用
+        commit = dict(self.commits[0], lines_added=10, lines_deleted=0, file_details={}, diff_status='truncated')
+        state = AggregateState()
+        self.assertEqual(state.sync([commit]), (1, 0))
+        refetched = dict(commit, lines_added=500, diff_status='ok')
+        self.assertEqual(state.sync([refetched]), (1, 0))
+        self.assertEqual(state.to_stats()[1][commit['author']]['lines_added'], 500)
+        self.assertMatches(state, [refetched])
+        self.assertEqual(state.sync([refetched]), (0, 0))
+
+    def test_returned_stats_not_changed_by_later_sync(self):
+        state = AggregateState()
+        state.sync(self.commits[:200])
+        stats = state.to_stats()
+        expected = copy.deepcopy(normalize(stats))
+        state.sync(self.commits[100:])
+        self.assertEqual(normalize(stats), expected)
+        self.assertMatches(state, self.commits[100:])
+
+    def test_restored_state(self):
+        state = AggregateState()
+        state.sync(self.commits[:300])
+        restored = AggregateState.from_dict(copy.deepcopy(state.to_dict()))
+        self.assertMatches(restored, self.commits[:300])
+        restored.sync(self.commits[150:])
+        self.assertMatches(restored, self.commits[150:])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+基准测试工具：svn 替身回放的日志与合成数据集一致，基准测试脚本可以完整运行并输出各阶段报告
+"""
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from tests.support import BENCH_DIR, load_app, quiet
+
+# 冒烟运行基准测试脚本的数据集规模
+SMOKE_REVISIONS = 60
+SMOKE_DIFF_REVISIONS = 10
+
+
+class SyntheticDatasetTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.svnapp, cls.meta, cls.log_result = load_app()
+
+    def test_log_covers_dataset(self):
+        self.assertEqual(self.log_result.returncode, 0)
+        self.assertEqual(self.log_result.stdout.count('<logentry'), self.meta['revisions'])
+
+    def test_parsed_log_matches_meta(self):
+        with quiet():
+            commits = self.svnapp.parse_svn_log()
+        self.assertEqual({int(commit['revision']) for commit in commits},
+                         set(range(self.meta['first_revision'], self.meta['last_revision'] + 1)))
+        self.assertTrue(all(self.meta['start_date'] <= commit['date'][:10] <= self.meta['end_date']
+                            for commit in commits))
+
+
+class BenchmarkScriptTest(unittest.TestCase):
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix='svn-stat-bench-test-')
+        self.addCleanup(shutil.rmtree, self.work_dir, True)
+
+    def test_report(self):
+        output = os.path.join(self.work_dir, 'bench.json')
+        result = subprocess.run([sys.executable, os.path.join(BENCH_DIR, 'run_benchmark.py'),
+                                 '--revisions', str(SMOKE_REVISIONS), '--diff-revisions', str(SMOKE_DIFF_REVISIONS),
+                                 '--no-memory', '--output', output],
+                                capture_output=True, text=True, timeout=300)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        with open(output, 'r', encoding='utf-8') as f:
+            report = json.load(f)
+
+        stages = report['stages']
+        self.assertEqual(report['dataset']['revisions'], SMOKE_REVISIONS)
+        self.assertGreater(stages['svn_log']['svn_calls'], 0)
+        self.assertEqual(stages['parse_svn_log']['items'], SMOKE_REVISIONS)
+        self.assertEqual(stages['get_svn_diff_cold']['items'], SMOKE_DIFF_REVISIONS)
+        self.assertGreater(stages['get_svn_diff_cold']['svn_calls'], 0)
+        # 第二次分析同样的版本全部命中缓存
+        self.assertEqual(stages['get_svn_diff_warm']['svn_calls'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
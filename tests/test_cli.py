@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+命令行批处理的冒烟测试：在合成数据集的最后几天上运行，第二次运行时从已保存的最新版本增量获取日志
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from tests.support import load_app, quiet
+
+# 只分析数据集最后几天的提交，控制diff调用次数
+WINDOW_DAYS = 5
+
+
+class CliTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.svnapp, cls.meta, _ = load_app()
+        cls.out_dir = tempfile.mkdtemp(prefix='svn-stat-cli-')
+        end = datetime.strptime(cls.meta['end_date'][:10], '%Y-%m-%d')
+        cls.start_date = (end - timedelta(days=WINDOW_DAYS)).strftime('%Y-%m-%d')
+        cls.end_date = end.strftime('%Y-%m-%d')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.out_dir, True)
+
+    def run_cli(self, *args):
+        output = os.path.join(self.out_dir, 'results.json')
+        argv = ['svn_stats.py', '--branch-url', self.meta['repos_root'], '--start-date', self.start_date,
+                '--end-date', self.end_date, '--output', output] + list(args)
+        with mock.patch.object(sys, 'argv', argv), quiet():
+            code = self.svnapp.main()
+        self.assertEqual(code, 0, self.svnapp.task_status['error'])
+        with open(output, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def test_repeated_runs_with_revision_range(self):
+        revision_range = f"{self.meta['first_revision']}:HEAD"
+        first = self.run_cli('--revision-range', revision_range)
+        self.assertGreater(first['total_commits'], 0)
+        # 第二次运行时缓存中已有该分支的最新版本号，版本范围改为从该版本开始
+        latest_revision = str(self.meta['first_revision'] + self.meta['revisions'] // 2)
+        with mock.patch.object(self.svnapp, 'get_latest_revision_for_branch', return_value=latest_revision), \
+                mock.patch.object(self.svnapp, 'run_svn_command', wraps=self.svnapp.run_svn_command) as run:
+            second = self.run_cli('--revision-range', revision_range)
+        log_commands = [call.args[0] for call in run.call_args_list if call.args[0][:2] == ['svn', 'log']]
+        self.assertTrue(any(f'{latest_revision}:HEAD' in command for command in log_commands), log_commands)
+        self.assertEqual(second['total_commits'], first['total_commits'])
+        self.assertEqual(second['total_lines_added'], first['total_lines_added'])
+
+    def test_run_without_revision_range(self):
+        results = self.run_cli()
+        self.assertGreater(results['total_commits'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
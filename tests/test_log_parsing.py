@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+日志解析的等价性：按索引读取与解析整个年份日志的结果一致，XML与jsonl.gz格式的结果一致
+"""
+import unittest
+from unittest import mock
+
+from tests.support import load_app, quiet
+
+# (开始日期, 结束日期, 筛选条件)
+QUERIES = [
+    (None, None, None),
+    ('2023-01-01', '2024-12-31', None),
+    ('2023-06-01', '2023-06-07', None),
+    ('2023-12-25', '2024-01-10', None),
+    (None, None, {'authors': ['dev003', 'dev011']}),
+    (None, None, {'branches': ['/trunk/module03']}),
+    (None, None, {'paths': ['/trunk/module03']}),
+    # 超过索引层级的路径前缀
+    (None, None, {'paths': ['/trunk/module03/src/main']}),
+    # 不在目录边界上的前缀不匹配同级的 module00..module07
+    (None, None, {'paths': ['/trunk/module0']}),
+    (None, None, {'extensions': ['java']}),
+    ('2023-03-01', '2023-09-30', {'authors': ['dev001', 'dev002', 'dev005'], 'extensions': ['.java', 'xml']}),
+    ('2023-03-01', '2024-01-31', {'paths': ['/branches/release-1.0', 'trunk/module01/'], 'authors': ['dev004']}),
+]
+
+
+def revisions(commits):
+    return [commit['revision'] for commit in commits]
+
+
+class IndexedParsingTest(unittest.TestCase):
+    """
+    parse_svn_log / iter_svn_log 通过索引读取的结果与解析整个文件的结果一致
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.svnapp, cls.meta, _ = load_app()
+
+    def full_scan(self, start_date, end_date, filters):
+        # 索引不可用时回退为解析整个年份日志并逐条过滤
+        with mock.patch.object(self.svnapp.log_index, 'load_log_index', side_effect=OSError('no index')), quiet():
+            return self.svnapp.parse_svn_log(start_date, end_date, filters)
+
+    def test_indexed_matches_full_scan(self):
+        for start_date, end_date, filters in QUERIES:
+            with self.subTest(start_date=start_date, end_date=end_date, filters=filters):
+                with quiet():
+                    indexed = self.svnapp.parse_svn_log(start_date, end_date, filters)
+                self.assertEqual(indexed, self.full_scan(start_date, end_date, filters))
+
+    def test_streaming_matches_parse(self):
+        for start_date, end_date, filters in QUERIES:
+            with self.subTest(start_date=start_date, end_date=end_date, filters=filters):
+                with quiet():
+                    expected = self.svnapp.parse_svn_log(start_date, end_date, filters)
+                    streamed = list(self.svnapp.iter_svn_log(start_date, end_date, filters, batch_size=17))
+                self.assertEqual(streamed, expected)
+
+    def test_full_log_covers_dataset(self):
+        with quiet():
+            commits = self.svnapp.parse_svn_log()
+        self.assertEqual(len(commits), self.meta['revisions'])
+        self.assertEqual(revisions(commits), sorted(revisions(commits), key=int))
+
+    def test_date_range_uses_index(self):
+        # 日期范围查询通过索引读取，不回退为解析整个年份日志
+        svnapp = self.svnapp
+        with mock.patch.object(svnapp, 'parse_log_file', side_effect=AssertionError('full parse')), \
+                mock.patch.object(svnapp.log_index, 'read_entries', wraps=svnapp.log_index.read_entries) as read_entries, \
+                quiet():
+            commits = svnapp.parse_svn_log('2023-06-01', '2023-06-07')
+            streamed = list(svnapp.iter_svn_log('2023-06-01', '2023-06-07'))
+        self.assertTrue(commits)
+        self.assertTrue(read_entries.called)
+        self.assertEqual(streamed, commits)
+        self.assertTrue(all('2023-06-01' <= commit['date'][:10] <= '2023-06-07' for commit in commits))
+
+    def test_select_positions_bisects_dates(self):
+        index = {'monotonic': True, 'entries': [[5, '2024-01-03', 0, 1], [4, '2024-01-02', 1, 1],
+                                                [3, '2024-01-02', 2, 1], [2, '2023-12-31', 3, 1]]}
+        select = self.svnapp.log_index.select_positions
+        self.assertEqual(list(select(index, '2024-01-02', '2024-01-02')), [1, 2])
+        self.assertEqual(list(select(index, '2024-01-01', '2024-01-31')), [0, 1, 2])
+        self.assertEqual(list(select(index, None, '2023-12-31')), [3])
+        self.assertEqual(list(select(index, '2024-02-01', None)), [])
+
+    def test_parsing_does_not_call_svn(self):
+        # 查询结果和导出解析日志时只使用已保存的仓库根，不调用 svn info
+        svnapp = self.svnapp
+        with mock.patch.object(svnapp, '_repository_info_by_url', {}), \
+                mock.patch.object(svnapp, '_repository_info_by_root', {}), \
+                mock.patch.object(svnapp, 'run_svn_command', side_effect=AssertionError('svn called')), quiet():
+            commits = svnapp.parse_svn_log('2023-06-01', '2023-06-30', {'authors': ['dev003']})
+            streamed = list(svnapp.iter_svn_log('2023-06-01', '2023-06-30'))
+        self.assertTrue(commits and streamed)
+        root = self.meta['repos_root']
+        self.assertTrue(all(commit['branch_url'].startswith(root + '/') for commit in commits + streamed))
+
+    def test_path_prefix_matches_directory_boundary(self):
+        with quiet():
+            self.assertEqual(self.svnapp.parse_svn_log(filters={'paths': ['/trunk/module0']}), [])
+            commits = self.svnapp.parse_svn_log(filters={'paths': ['/trunk/module03']})
+        self.assertTrue(commits)
+        for commit in commits:
+            self.assertTrue(any(changed['path'].startswith('/trunk/module03/') for changed in commit['changed_files']))
+
+
+class LogFormatTest(unittest.TestCase):
+    """
+    同一份日志以 jsonl.gz 格式写入后，解析结果与XML格式一致
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.svnapp, cls.meta, log_result = load_app()
+        cls.expected = {}
+        with quiet():
+            for query in QUERIES:
+                cls.expected[repr(query)] = cls.svnapp.parse_svn_log(*query)
+            cls.svnapp.config['log_format'] = 'jsonl.gz'
+            try:
+                cls.svnapp.write_svn_log([log_result])
+            except BaseException:
+                cls.svnapp.config['log_format'] = 'xml'
+                raise
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.svnapp.config['log_format'] = 'xml'
+
+    def test_record_log_written(self):
+        log_files = self.svnapp.get_all_year_log_files()
+        self.assertTrue(log_files)
+        self.assertTrue(all(self.svnapp.log_store.is_record_log(log_file) for log_file in log_files))
+
+    def test_jsonl_matches_xml(self):
+        for query in QUERIES:
+            with self.subTest(query=query):
+                with quiet():
+                    commits = self.svnapp.parse_svn_log(*query)
+                self.assertEqual(commits, self.expected[repr(query)])
+
+    def test_jsonl_streaming_matches_xml(self):
+        for query in QUERIES:
+            with self.subTest(query=query):
+                with quiet():
+                    commits = list(self.svnapp.iter_svn_log(*query))
+                self.assertEqual(commits, self.expected[repr(query)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+重复调用合并：同一键并发调用只执行一次，结果和异常由所有等待的调用方共用
+"""
+import asyncio
+import threading
+import time
+import unittest
+
+from singleflight import SingleFlight
+
+WAIT_SECONDS = 5
+
+
+class SingleFlightTest(unittest.TestCase):
+
+    def run_concurrently(self, flight, key, fn, callers):
+        """
+        leader 执行 fn 期间启动其余调用方，等待全部加入后放行 fn
+        :return: 每个调用方的 (结果, 是否共用) 或异常
+        """
+        release = threading.Event()
+        started = threading.Event()
+        results = [None] * callers
+
+        def leader_fn():
+            started.set()
+            self.assertTrue(release.wait(WAIT_SECONDS))
+            return fn()
+
+        def call(index):
+            try:
+                results[index] = flight.do(key, leader_fn)
+            except Exception as e:
+                results[index] = e
+
+        threads = [threading.Thread(target=call, args=(0,))]
+        threads[0].start()
+        self.assertTrue(started.wait(WAIT_SECONDS))
+        threads += [threading.Thread(target=call, args=(index,)) for index in range(1, callers)]
+        for thread in threads[1:]:
+            thread.start()
+        # 等待其余调用方进入等待（它们不会执行 fn，只能按时间判断）
+        time.sleep(0.05)
+        release.set()
+        for thread in threads:
+            thread.join(WAIT_SECONDS)
+        return results
+
+    def test_concurrent_calls_coalesced(self):
+        flight = SingleFlight()
+        calls = []
+        results = self.run_concurrently(flight, 'r100', lambda: calls.append(1) or {'lines': 42}, callers=8)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([result for result, _ in results], [{'lines': 42}] * 8)
+        self.assertEqual(sum(shared for _, shared in results), 7)
+        self.assertIs(results[1][0], results[0][0])
+        self.assertEqual(flight.inflight(), 0)
+
+    def test_error_propagated_to_waiters(self):
+        flight = SingleFlight()
+
+        def fail():
+            raise RuntimeError('svn diff failed')
+
+        results = self.run_concurrently(flight, 'r100', fail, callers=4)
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+        self.assertTrue(all(str(result) == 'svn diff failed' for result in results))
+        self.assertEqual(flight.inflight(), 0)
+
+        # 失败不被缓存，之后的调用重新执行
+        self.assertEqual(flight.do('r100', lambda: 'ok'), ('ok', False))
+
+    def test_distinct_keys_not_coalesced(self):
+        flight = SingleFlight()
+        self.assertEqual(flight.do('a', lambda: 1), (1, False))
+        self.assertEqual(flight.do('b', lambda: 2), (2, False))
+        self.assertEqual(flight.do('a', lambda: 3), (3, False))
+
+    def test_async_callers_coalesced(self):
+        flight = SingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return 'diff'
+
+        async def main():
+            return await asyncio.gather(*(flight.do_async('r100', fetch) for _ in range(5)))
+
+        results = asyncio.run(main())
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(results), [('diff', False)] + [('diff', True)] * 4)
+        self.assertEqual(flight.inflight(), 0)
+
+    def test_async_error_and_thread_waiter(self):
+        flight = SingleFlight()
+        started = threading.Event()
+        thread_result = []
+
+        async def fetch():
+            started.set()
+            await asyncio.sleep(0.1)
+            raise ValueError('timeout')
+
+        def thread_caller():
+            started.wait(WAIT_SECONDS)
+            try:
+                flight.do('r100', lambda: 'not called')
+            except ValueError as e:
+                thread_result.append(e)
+
+        async def main():
+            return await asyncio.gather(flight.do_async('r100', fetch), flight.do_async('r100', fetch),
+                                        return_exceptions=True)
+
+        thread = threading.Thread(target=thread_caller)
+        thread.start()
+        results = asyncio.run(main())
+        thread.join(WAIT_SECONDS)
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+        self.assertEqual(len(thread_result), 1)
+        self.assertEqual(flight.inflight(), 0)
+
+    def test_cancelled_leader_does_not_cancel_waiters(self):
+        flight = SingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.1)
+            return 'diff'
+
+        async def main():
+            leader = asyncio.ensure_future(flight.do_async('r100', fetch))
+            await asyncio.sleep(0.01)
+            waiters = [asyncio.ensure_future(flight.do_async('r100', fetch)) for _ in range(3)]
+            await asyncio.sleep(0.01)
+            leader.cancel()
+            results = await asyncio.gather(*waiters)
+            with self.assertRaises(asyncio.CancelledError):
+                await leader
+            return results
+
+        results = asyncio.run(main())
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [('diff', True)] * 3)
+        self.assertEqual(flight.inflight(), 0)
+
+        # 没有其他调用方时，被取消的调用方不影响之后的调用
+        self.assertEqual(asyncio.run(flight.do_async('r100', fetch)), ('diff', False))
+
+
+if __name__ == '__main__':
+    unittest.main()